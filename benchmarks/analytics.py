@@ -0,0 +1,53 @@
+"""
+Streaming analytics benchmark: exact vs Count-Min Sketch top-k, cost and accuracy
+
+Usage:
+    python -m benchmarks.analytics [orders]
+"""
+
+import sys
+import time
+from collections import Counter
+
+from benchmarks.workload import Workload
+from src.analytics import SalesAnalytics
+
+
+def main(orders: int = 50_000, k: int = 20) -> None:
+    """Feed the same orders to both modes and compare against an offline recount"""
+    workload = Workload(products=50_000, users=orders, seed=9)
+    store = workload.build_store()
+    for user_id, product_id, quantity in workload.cart_lines(orders):
+        store.get_user(user_id).cart.add_item(store.get_product(product_id), quantity)
+
+    exact = SalesAnalytics(store, k=k, mode="exact")
+    sketch = SalesAnalytics(store, k=k, mode="sketch")
+    started = time.perf_counter()
+    store.create_orders_batch(list(store.users))
+    print(f"checkout with both modes attached: {time.perf_counter() - started:.3f}s "
+          f"for {len(store.orders):,} orders")
+
+    # Offline recount over the whole order history for reference
+    started = time.perf_counter()
+    units = Counter()
+    for order in store.orders.values():
+        for product_id, _, _, quantity, _ in order.items.lines():
+            units[product_id] += quantity
+    truth = units.most_common(k)
+    print(f"offline recount:  {(time.perf_counter() - started) * 1000:9.3f} ms")
+
+    for analytics in (exact, sketch):
+        started = time.perf_counter()
+        top = analytics.top_products(k)
+        elapsed = time.perf_counter() - started
+        overlap = len({product_id for product_id, _ in top} & {product_id for product_id, _ in truth})
+        error = max(abs(value - units[product_id]) for product_id, value in top)
+        print(f"{analytics.mode + ' top-k query:':<18}{elapsed * 1000:9.3f} ms  "
+              f"recall {overlap}/{k}  max count error {error:g}")
+    started = time.perf_counter()
+    exact.top_products_window(k)
+    print(f"window top-k:     {(time.perf_counter() - started) * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,76 @@
+"""
+Checkout throughput benchmark: create_order loop vs create_orders_batch
+
+Each path checks out a freshly built store; the best of several runs is
+reported, with garbage collected beforehand so the previous store's
+cleanup is not timed.
+
+Usage:
+    python -m benchmarks.batch_checkout [users] [lines_per_cart] [repeats] [--thread-safe]
+"""
+
+import gc
+import random
+import sys
+import time
+from typing import Callable, List
+
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+def build_store(users: int, lines: int, thread_safe: bool = False, seed: int = 11) -> Store:
+    """
+    Build a store whose users all have a filled cart
+
+    Args:
+        users: Number of users
+        lines: Distinct products per cart
+        thread_safe: Whether the store uses locks
+        seed: Random seed
+
+    Returns:
+        Store: Populated store
+    """
+    rng = random.Random(seed)
+    store = Store("Flash Sale", thread_safe=thread_safe)
+    for i in range(1000):
+        store.add_product(Product(f"P{i:05d}", f"Product {i}", rng.uniform(1, 500), "", 10 ** 6))
+    products = list(store.products.values())
+    for i in range(users):
+        user = User(f"U{i:07d}", "Shopper", "shopper@example.com", "1 Sale St")
+        store.register_user(user)
+        for product in rng.sample(products, lines):
+            user.cart.add_item(product, rng.randint(1, 3))
+    return store
+
+
+def timed(label: str, users: int, lines: int, thread_safe: bool, repeats: int,
+          checkout: Callable[[Store, List[str]], None]) -> float:
+    """Run a checkout function on fresh stores and print its best throughput"""
+    best = float("inf")
+    for _ in range(repeats):
+        store = build_store(users, lines, thread_safe)
+        user_ids = list(store.users)
+        gc.collect()
+        started = time.perf_counter()
+        checkout(store, user_ids)
+        best = min(best, time.perf_counter() - started)
+        del store, user_ids
+    print(f"{label:<22}{best:>8.4f}s {users / best:>12,.0f} orders/s")
+    return best
+
+
+def main(users: int = 20_000, lines: int = 5, repeats: int = 3, thread_safe: bool = False) -> None:
+    """Compare both checkout paths on identical stores"""
+    loop = timed("create_order loop", users, lines, thread_safe, repeats,
+                 lambda store, user_ids: [store.create_order(user_id) for user_id in user_ids])
+    batch = timed("create_orders_batch", users, lines, thread_safe, repeats,
+                  lambda store, user_ids: store.create_orders_batch(user_ids))
+    print(f"speedup: {loop / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    main(*args[:3], thread_safe="--thread-safe" in sys.argv)
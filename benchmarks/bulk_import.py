@@ -0,0 +1,55 @@
+"""
+Bulk import throughput benchmark in rows per second
+
+Writes a synthetic catalog and user export to a temporary directory and
+streams it back into a fresh store with the importer.
+
+Usage:
+    python -m benchmarks.bulk_import [rows]
+"""
+
+import csv
+import json
+import os
+import sys
+import tempfile
+
+from src.importer import load_products, load_users
+from src.store import Store
+
+
+def write_exports(directory: str, rows: int) -> None:
+    """
+    Write products.csv and users.jsonl with a few bad rows mixed in
+
+    Args:
+        directory: Output directory
+        rows: Rows per file
+    """
+    with open(os.path.join(directory, "products.csv"), "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["product_id", "name", "price", "description", "stock"])
+        for i in range(rows):
+            price = "n/a" if i % 10_000 == 9_999 else f"{(i % 997) + 0.99:.2f}"
+            writer.writerow([f"P{i % (rows - 5):08d}", f"Product {i}", price, "Bulk item", i % 50])
+    with open(os.path.join(directory, "users.jsonl"), "w", encoding="utf-8") as handle:
+        for i in range(rows):
+            email = "invalid" if i % 10_000 == 9_999 else f"user{i}@example.com"
+            handle.write(json.dumps({"user_id": f"U{i:08d}", "name": f"User {i}", "email": email}))
+            handle.write("\n")
+
+
+def main(rows: int = 200_000) -> None:
+    """Import both files and print throughput and error counts"""
+    with tempfile.TemporaryDirectory() as directory:
+        write_exports(directory, rows)
+        store = Store("Bulk Store")
+        for label, loader, name in [("products", load_products, "products.csv"),
+                                    ("users", load_users, "users.jsonl")]:
+            report = loader(store, os.path.join(directory, name))
+            print(f"{label:<10}{report['loaded']:>10,} loaded {report['duplicates']:>6,} duplicate "
+                  f"{report['invalid']:>6,} invalid {report['rows_per_second']:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
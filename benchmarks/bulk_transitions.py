@@ -0,0 +1,60 @@
+"""
+Order lifecycle benchmark: per-order status methods vs Store.transition_orders
+
+Usage:
+    python -m benchmarks.bulk_transitions [orders] [--thread-safe]
+"""
+
+import sys
+import time
+from typing import List, Tuple
+
+from benchmarks.workload import Workload
+from src.order import OrderStatus
+from src.store import Store
+
+STEPS: Tuple[Tuple[str, OrderStatus], ...] = (
+    ("confirm_order", OrderStatus.CONFIRMED),
+    ("process_order", OrderStatus.PROCESSING),
+    ("ship_order", OrderStatus.SHIPPED),
+    ("deliver_order", OrderStatus.DELIVERED),
+)
+
+
+def build_store(orders: int, thread_safe: bool) -> Tuple[Store, List[str]]:
+    """Build a store holding the given number of pending orders"""
+    workload = Workload(products=2000, users=orders, seed=5)
+    store = workload.build_store(thread_safe=thread_safe)
+    for user_id, product_id, quantity in workload.cart_lines(orders):
+        store.get_user(user_id).cart.add_item(store.get_product(product_id), quantity)
+    store.create_orders_batch(list(store.users))
+    return store, list(store.orders)
+
+
+def main(orders: int = 50_000, thread_safe: bool = False) -> None:
+    """Move every order from pending to delivered both ways and compare"""
+    store, order_ids = build_store(orders, thread_safe)
+    started = time.perf_counter()
+    for method, _ in STEPS:
+        for order_id in order_ids:
+            getattr(store.get_order(order_id), method)()
+    loop = time.perf_counter() - started
+    assert not store.verify_statistics()
+
+    store, order_ids = build_store(orders, thread_safe)
+    started = time.perf_counter()
+    for _, status in STEPS:
+        failures = store.transition_orders(order_ids, status)
+        assert not failures
+    bulk = time.perf_counter() - started
+    assert not store.verify_statistics()
+
+    transitions = len(order_ids) * len(STEPS)
+    print(f"{'per-order loop':<20}{loop:>8.3f}s {transitions / loop:>12,.0f} transitions/s")
+    print(f"{'transition_orders':<20}{bulk:>8.3f}s {transitions / bulk:>12,.0f} transitions/s")
+    print(f"speedup: {loop / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    main(*args[:1], thread_safe="--thread-safe" in sys.argv)
@@ -0,0 +1,81 @@
+"""
+Cart eviction benchmark: memory held by abandoned carts before and after a sweep
+
+Fills one cart per user, then keeps only the most recently touched carts
+resident and reports traced memory, sweep time and rehydration cost.
+
+Usage:
+    python -m benchmarks.cart_eviction [users] [max_carts]
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+def build_store(users: int, lines: int = 3, seed: int = 1) -> Store:
+    """
+    Build a store where every user has a filled cart
+
+    Args:
+        users: Number of users
+        lines: Products added to each cart
+        seed: Random seed
+
+    Returns:
+        Store: Populated store
+    """
+    rng = random.Random(seed)
+    store = Store("Carts")
+    store.add_products(Product(f"P{i:05d}", f"Product {i}", 10.0, "", 10**9) for i in range(1_000))
+    store.register_users(User(f"U{i:07d}", "Shopper", f"u{i}@example.com") for i in range(users))
+    products = list(store.products.values())
+    for user in store.users.values():
+        cart = user.cart
+        for product in rng.sample(products, lines):
+            cart.add_item(product, 1)
+    return store
+
+
+def main(users: int = 200_000, max_carts: int = 10_000) -> None:
+    """Print memory before and after evicting all but max_carts carts"""
+    tracemalloc.start()
+    store = build_store(users)
+    manager = store.manage_carts(max_carts=max_carts)
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    evicted = manager.sweep()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{users:,} carts, {max_carts:,} kept resident, {evicted:,} evicted")
+    print(f"traced memory before sweep: {before / 2**20:8.1f} MiB")
+    print(f"traced memory after sweep:  {after / 2**20:8.1f} MiB "
+          f"({(before - after) / max(evicted, 1):.0f} B saved per evicted cart)")
+
+    del store, manager
+    gc.collect()  # the first store is cyclic garbage that would slow later collections
+    store = build_store(users)
+    manager = store.manage_carts(max_carts=max_carts)
+    started = time.perf_counter()
+    evicted = manager.sweep()
+    elapsed = time.perf_counter() - started
+    print(f"sweep: {elapsed:.3f}s ({elapsed / max(evicted, 1) * 1e6:.1f} us per evicted cart)")
+
+    user_ids = random.Random(2).sample(list(store.users), min(10_000, len(store.users)))
+    started = time.perf_counter()
+    for user_id in user_ids:
+        store.get_user(user_id).cart.get_total()
+    elapsed = time.perf_counter() - started
+    print(f"rehydrate on access: {elapsed / len(user_ids) * 1e6:.1f} us per cart")
+    print(manager.stats())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
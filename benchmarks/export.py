@@ -0,0 +1,69 @@
+"""
+Export benchmark: collecting summaries into a list vs Store.export_orders
+
+Usage:
+    python -m benchmarks.export [orders]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from benchmarks.suite import seed_history
+from benchmarks.workload import Workload
+from src.store import Store
+
+
+def collect_then_write(store: Store, path: str) -> None:
+    """Export the way reporting jobs did: build every summary, then write"""
+    summaries = [order.get_order_summary() for order in store.orders.values()]
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("\n".join(json.dumps(summary) for summary in summaries) + "\n")
+
+
+def run(function: Callable[[], None]) -> Tuple[float, float, float]:
+    """
+    Time a first and a repeated call, then a third under tracemalloc for peak memory
+
+    Returns:
+        (first seconds, repeat seconds, peak MiB)
+    """
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return timings[0], timings[1], peak / (1024 * 1024)
+
+
+def main(orders: int = 50_000) -> None:
+    """Print export times and peak memory for both approaches"""
+    workload = Workload(10_000, 10_000)
+    store = workload.build_store()
+    seed_history(store, workload, orders)
+    print(f"{len(store.orders):,} orders, {store.get_store_statistics()['orders_by_status']}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "orders")
+        cases = [
+            ("collect then write", lambda: collect_then_write(store, path + ".jsonl")),
+            ("export_orders jsonl", lambda: store.export_orders(path + ".jsonl")),
+            ("export_orders csv", lambda: store.export_orders(path + ".csv", "csv")),
+        ]
+        # Repeated exports reuse the cached text of delivered and cancelled orders
+        print(f"{'':<22}{'first s':>10}{'repeat s':>10}{'peak MiB':>10}")
+        for label, function in cases:
+            first, repeat, peak = run(function)
+            print(f"{label:<22}{first:>10.3f}{repeat:>10.3f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
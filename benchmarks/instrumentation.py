@@ -0,0 +1,57 @@
+"""
+Instrumentation overhead: the same workload with metrics disabled, enabled and profiling
+
+Usage:
+    python -m benchmarks.instrumentation [users]
+"""
+
+import sys
+import time
+
+from benchmarks.workload import Workload
+from src import metrics
+
+
+def run_workload(users: int) -> float:
+    """
+    Fill carts, check out and read statistics on a fresh store
+
+    Args:
+        users: Number of shoppers
+
+    Returns:
+        float: Elapsed seconds of the timed part
+    """
+    workload = Workload(products=5000, users=users, seed=7)
+    store = workload.build_store()
+    lines = workload.cart_lines(users)
+    started = time.perf_counter()
+    for user_id, product_id, quantity in lines:
+        cart = store.get_user(user_id).cart
+        cart.add_item(store.get_product(product_id), quantity)
+        cart.get_total()
+    for user_id in dict.fromkeys(user_id for user_id, _, _ in lines):
+        order = store.create_order(user_id)
+        if order:
+            order.confirm_order()
+        store.get_store_statistics()
+    return time.perf_counter() - started
+
+
+def main(users: int = 20_000) -> None:
+    """Print the workload time in each mode and the overhead against disabled"""
+    metrics.disable()
+    baseline = run_workload(users)
+    print(f"{'disabled':<12}{baseline:>8.3f}s")
+    for label, options in (("enabled", {}), ("profiling", {'profile_threshold_ms': 1.0})):
+        metrics.reset()
+        metrics.enable(**options)
+        elapsed = run_workload(users)
+        metrics.disable()
+        calls = sum(method['count'] for method in metrics.snapshot()['methods'].values())
+        print(f"{label:<12}{elapsed:>8.3f}s  +{(elapsed / baseline - 1) * 100:5.1f}%  "
+              f"{calls:,} calls recorded")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
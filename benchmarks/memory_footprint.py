@@ -0,0 +1,114 @@
+"""
+Memory benchmark: bytes per Product, User, Cart and Order object
+
+Compares the slotted classes with a dict-based replica of the original layout
+(per-instance __dict__ and an eagerly created cart for every user).
+
+Usage:
+    python -m benchmarks.memory_footprint [count]
+"""
+
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List
+
+from src.cart import Cart
+from src.order import Order, OrderStatus
+from src.product import Product
+from src.user import User
+
+
+class LegacyProduct:
+    """Product with the original __dict__-based layout"""
+
+    def __init__(self, product_id, name, price, description="", stock=0):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.description = description
+        self.stock = stock
+
+
+class LegacyCart:
+    """Cart with the original __dict__-based layout"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.items = {}
+        self.products = {}
+
+
+class LegacyUser:
+    """User with the original __dict__-based layout and eager cart"""
+
+    def __init__(self, user_id, name, email, address=""):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.address = address
+        self.cart = LegacyCart(user_id)
+        self.is_active = True
+
+
+class LegacyOrder:
+    """Order with the original __dict__-based layout"""
+
+    def __init__(self, order_id, user_id, cart, shipping_address=""):
+        self.order_id = order_id
+        self.user_id = user_id
+        self.items = cart.get_cart_items().copy()
+        self.shipping_address = shipping_address
+        self.total_amount = cart.get_total()
+        self.status = OrderStatus.PENDING
+        self.order_date = datetime.now()
+        self.delivery_date = None
+
+
+def measure(factory: Callable[[int], object], count: int) -> float:
+    """
+    Measure the average allocated bytes per object
+
+    Args:
+        factory: Callable building one object from an index
+        count: Number of objects to build
+
+    Returns:
+        float: Bytes per object
+    """
+    keep: List[object] = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        keep.append(factory(i))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+def main(count: int = 100_000) -> None:
+    """Print bytes per object for the legacy and slotted layouts"""
+    name, email = "Jane Smith", "jane@example.com"
+    cart = Cart("U0")
+    cart.add_item(Product("P0", "Laptop", 999.99, "", 10), 1)
+
+    cases = [
+        ("Product", lambda i: LegacyProduct("P", name, 1.0, "", 1),
+                    lambda i: Product("P", name, 1.0, "", 1)),
+        ("User", lambda i: LegacyUser("U", name, email),
+                 lambda i: User("U", name, email)),
+        ("Cart", lambda i: LegacyCart("U"),
+                 lambda i: Cart("U")),
+        ("Order", lambda i: LegacyOrder("O", "U", cart),
+                  lambda i: Order("O", "U", cart)),
+    ]
+
+    print(f"{'class':<10}{'before (B/obj)':>16}{'after (B/obj)':>16}{'saved':>8}")
+    for label, legacy, slotted in cases:
+        before = measure(legacy, count)
+        after = measure(slotted, count)
+        print(f"{label:<10}{before:>16.1f}{after:>16.1f}{1 - after / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,125 @@
+"""
+Money benchmark: float vs integer cents vs Decimal totals
+
+Checks that a cents store reads every price and browse bound in major units,
+then totals synthetic orders from their lines and sums the revenue the way
+the store's counters do, in each representation, and checks a float and a
+cents store against an exact re-total of their delivered orders.
+
+Usage:
+    python -m benchmarks.money [orders]
+"""
+
+import random
+import sys
+import time
+from decimal import Decimal
+from typing import Callable, List, Tuple
+
+from benchmarks.suite import seed_history
+from benchmarks.workload import Workload
+from src.money import from_minor, to_minor
+from src.order import OrderStatus
+from src.product import Product
+from src.store import Store
+
+Lines = List[List[Tuple[object, int]]]
+
+
+def check_cents_inputs() -> None:
+    """Assert that a cents store converts int and float prices alike"""
+    store = Store("Cents", money="cents")
+    store.add_products([Product("P1", "Int", 100, "", 1), Product("P2", "Float", 100.0, "", 1),
+                        Product("P3", "Minor", 1999, "", 1)])
+    store.add_product(Product("P4", "Restored", 1999, "", 1), minor_units=True)
+    assert [store.get_product(pid).price for pid in ("P1", "P2", "P3", "P4")] == [10000, 10000, 199900, 1999]
+    assert "$100.00" in str(store.get_product("P1"))
+    product = store.get_product("P1")
+    assert product.update_price(4) and product.price == 400
+    assert product.update_price(4.5) and product.price == 450
+    assert product.update_price(450, minor_units=True) and product.price == 450
+    store.get_product("P2").update_price(19.99)
+    assert [p.product_id for p in store.browse_products(10.0, 30.0)['products']] == ["P2", "P4"]
+    assert [p.product_id for p in store.browse_products(10, 30)['products']] == ["P2", "P4"]
+    assert [p.product_id for p in store.browse_products(1000, 3000)['products']] == ["P3"]
+    print("cents store inputs: int and float prices and browse bounds all read as major units")
+
+
+def make_orders(orders: int, seed: int = 1) -> List[List[Tuple[int, int]]]:
+    """
+    Build orders of 1-5 (price in cents, quantity) lines
+
+    Prices follow the workload's catalog distribution.
+    """
+    rng = random.Random(seed)
+    prices = [to_minor(round(rng.lognormvariate(3.5, 1.0), 2)) for _ in range(10_000)]
+    return [[(rng.choice(prices), rng.randint(1, 3)) for _ in range(rng.randint(1, 5))]
+            for _ in range(orders)]
+
+
+def total_revenue(orders: Lines, zero) -> Tuple[object, float]:
+    """
+    Total every order from its lines, then sum the order totals
+
+    Returns:
+        (revenue, seconds)
+    """
+    started = time.perf_counter()
+    revenue = zero
+    for lines in orders:
+        total = zero
+        for price, quantity in lines:
+            total += price * quantity
+        revenue += total
+    return revenue, time.perf_counter() - started
+
+
+def reconcile(store: Store, amount: Callable) -> Tuple[Decimal, float]:
+    """
+    Re-total the delivered orders from their lines in Decimal, as reconciliation jobs do
+
+    Returns:
+        (exact revenue, seconds)
+    """
+    started = time.perf_counter()
+    revenue = Decimal(0)
+    for order in store.get_orders_by_status(OrderStatus.DELIVERED):
+        for _, _, price, quantity, _ in order.items.lines():
+            revenue += amount(price) * quantity
+    return revenue, time.perf_counter() - started
+
+
+def main(orders: int = 1_000_000) -> None:
+    """Print aggregation time and drift for each representation, then per store"""
+    check_cents_inputs()
+    cent_orders = make_orders(orders)
+    exact = from_minor(sum(price * quantity for lines in cent_orders for price, quantity in lines))
+    cases = [
+        ("float", [[(price / 100, quantity) for price, quantity in lines] for lines in cent_orders],
+         0.0, Decimal),
+        ("cents", cent_orders, 0, from_minor),
+        ("Decimal", [[(from_minor(price), quantity) for price, quantity in lines] for lines in cent_orders],
+         Decimal(0), Decimal),
+    ]
+    print(f"{orders:,} orders, exact revenue {exact}")
+    print(f"{'':<10}{'seconds':>10}{'ns/line':>10}  drift")
+    line_count = sum(len(lines) for lines in cent_orders)
+    for label, data, zero, to_decimal in cases:
+        revenue, elapsed = total_revenue(data, zero)
+        drift = to_decimal(revenue) - exact
+        print(f"{label:<10}{elapsed:>10.3f}{elapsed / line_count * 1e9:>10.1f}  {float(drift):+.2e}")
+
+    history = max(orders // 20, 10_000)
+    print(f"\nstores with {history:,} orders: running revenue counter vs exact re-total")
+    for money, amount in (("float", lambda price: Decimal(str(price))), ("cents", from_minor)):
+        workload = Workload(10_000, 10_000)
+        store = workload.build_store(money=money)
+        seed_history(store, workload, history)
+        counter = store.get_store_statistics()['total_revenue']
+        exact_revenue, elapsed = reconcile(store, amount)
+        drift = (Decimal(counter) if money == "float" else from_minor(counter)) - exact_revenue
+        print(f"{money:<10}counter {counter!r:<22} drift {float(drift):+.2e}  re-total {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,107 @@
+"""
+Catalog read benchmark under a concurrent writer: dict vs mvcc catalog
+
+Reader threads search, fetch and list available products while one writer
+thread reprices, restocks and periodically bulk-adds products. Both stores
+are thread-safe; dict readers take the index lock, mvcc readers pin a
+published catalog version instead.
+
+Usage:
+    python -m benchmarks.mvcc_catalog [products] [seconds] [readers]
+"""
+
+import random
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.workload import Workload
+from src.product import Product
+from src.store import Store
+
+
+def writer(store: Store, workload: Workload, stop: threading.Event, counts: Dict[str, int]) -> None:
+    """Reprice and restock random products, adding a batch of new products every 2000 writes"""
+    rng = random.Random(7)
+    product_ids = list(store.products)
+    added = 0
+    while not stop.is_set():
+        product = store.get_product(rng.choice(product_ids))
+        if rng.random() < 0.5:
+            product.update_price(round(rng.uniform(1, 500), 2))
+        else:
+            product.update_stock(rng.randint(-3, 5))
+        counts['writes'] += 1
+        if counts['writes'] % 2000 == 0:
+            store.add_products(Product(f"N{added + i:08d}", f"New Lamp {i}", 9.99, "", 5)
+                               for i in range(2000))
+            added += 2000
+
+
+def reader(store: Store, keywords: List[str], stop: threading.Event, latencies: List[float],
+           seed: int) -> None:
+    """Mix of get_product, search_products and get_available_products calls"""
+    rng = random.Random(seed)
+    product_ids = list(store.products)
+    clock = time.perf_counter
+    while not stop.is_set():
+        roll = rng.random()
+        started = clock()
+        if roll < 0.70:
+            store.get_product(rng.choice(product_ids))
+        elif roll < 0.99:
+            store.search_products(rng.choice(keywords))
+        else:
+            store.get_available_products()
+        latencies.append(clock() - started)
+
+
+def run(catalog: str, products: int, seconds: float, readers: int) -> Dict:
+    """
+    Run readers and one writer against a fresh store for a fixed time
+
+    Returns:
+        Dict: reads, reads_per_second, p50/p99 read latency (us), writes
+    """
+    workload = Workload(products, 1)
+    store = workload.build_store(catalog=catalog, thread_safe=True)
+    keywords = workload.search_keywords(200)
+    stop = threading.Event()
+    counts = {'writes': 0}
+    latencies: List[List[float]] = [[] for _ in range(readers)]
+    threads = [threading.Thread(target=writer, args=(store, workload, stop, counts))]
+    threads += [threading.Thread(target=reader, args=(store, keywords, stop, latencies[i], i))
+                for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    ordered = sorted(latency for thread_latencies in latencies for latency in thread_latencies)
+    return {
+        'reads': len(ordered),
+        'reads_per_second': len(ordered) / seconds,
+        'p50_us': ordered[len(ordered) // 2] * 1e6,
+        'p99_us': ordered[int(len(ordered) * 0.99)] * 1e6,
+        'writes': counts['writes']
+    }
+
+
+def main(products: int = 50_000, seconds: float = 5.0, readers: int = 4) -> None:
+    """Print read throughput and latency for both catalogs"""
+    print(f"{products:,} products, {readers} readers + 1 writer, {seconds:g}s each")
+    print(f"{'catalog':<8}{'reads/s':>10}{'p50 us':>10}{'p99 us':>10}{'writes':>10}")
+    for catalog in ("dict", "mvcc"):
+        result = run(catalog, products, seconds, readers)
+        print(f"{catalog:<8}{result['reads_per_second']:>10.0f}{result['p50_us']:>10.1f}"
+              f"{result['p99_us']:>10.1f}{result['writes']:>10}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 50_000,
+         float(args[1]) if len(args) > 1 else 5.0,
+         int(args[2]) if len(args) > 2 else 4)
@@ -0,0 +1,71 @@
+"""
+Memory benchmark: order line items as dicts of dicts vs compact LineItems
+
+Builds the same order history twice, once keeping a copy of
+Cart.get_cart_items() per order as before and once with LineItems, and
+reports the bytes held per order for several cart sizes.
+
+Usage:
+    python -m benchmarks.order_items [orders]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+from src.cart import Cart
+from src.product import Product
+
+
+def measure(build: Callable[[Cart], object], carts: List[Cart]) -> float:
+    """
+    Measure the average bytes held by the line items built from each cart
+
+    Args:
+        build: Callable turning a cart into line items
+        carts: Carts to convert, one per order
+
+    Returns:
+        float: Bytes per order
+    """
+    keep: List[object] = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for cart in carts:
+        keep.append(build(cart))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(carts)
+
+
+def main(orders: int = 100_000, seed: int = 5) -> None:
+    """Print bytes per order for both layouts and the cost of rebuilding dicts"""
+    rng = random.Random(seed)
+    catalog = [Product(f"P{i:06d}", f"Product {i}", round(rng.uniform(1, 500), 2), "", 10**9)
+               for i in range(5_000)]
+
+    print(f"{'lines':<8}{'dicts (B/order)':>17}{'LineItems (B/order)':>21}{'saved':>8}")
+    for lines in (1, 3, 8):
+        carts = []
+        for _ in range(min(orders, 2_000)):
+            cart = Cart("U")
+            for product in rng.sample(catalog, lines):
+                cart.add_item(product, rng.randint(1, 3))
+            carts.append(cart)
+        carts = [carts[i % len(carts)] for i in range(orders)]
+        before = measure(lambda cart: cart.get_cart_items().copy(), carts)
+        after = measure(Cart.get_line_items, carts)
+        print(f"{lines:<8}{before:>17.1f}{after:>21.1f}{1 - after / before:>8.0%}")
+
+    items = [cart.get_line_items() for cart in carts]
+    started = time.perf_counter()
+    for line_items in items:
+        line_items.to_dict()
+    rebuild = (time.perf_counter() - started) / len(items) * 1e6
+    print(f"\nrebuilding the dict shape for get_order_summary(): {rebuild:.2f} us/order (8 lines)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
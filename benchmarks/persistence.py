@@ -0,0 +1,93 @@
+"""
+Write-ahead log benchmark: logging overhead per operation and recovery time
+
+Usage:
+    python -m benchmarks.persistence [users]
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Optional
+
+from src.persistence import StoreJournal, recover
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+def run_workload(store: Store, users: int, seed: int = 3) -> int:
+    """
+    Apply a mixed workload of catalog, cart and order operations
+
+    Args:
+        store: Store to mutate
+        users: Number of users to register and check out
+        seed: Random seed
+
+    Returns:
+        int: Number of mutations reported by the store's change feed
+    """
+    rng = random.Random(seed)
+    mutations = []
+    count_mutation = lambda store, event, payload: mutations.append(None)
+    store.add_listener(count_mutation)
+    for i in range(1000):
+        store.add_product(Product(f"P{i:05d}", f"Product {i}", rng.uniform(1, 500), "", 10 ** 6))
+    products = list(store.products.values())
+    for i in range(users):
+        user = User(f"U{i:07d}", "Customer", "customer@example.com", "1 Main St")
+        store.register_user(user)
+        for product in rng.sample(products, 3):
+            user.cart.add_item(product, rng.randint(1, 3))
+        order = store.create_order(user.user_id)
+        order.confirm_order()
+        if i % 2:
+            order.process_order()
+            order.ship_order()
+            order.deliver_order()
+        if i % 10 == 0:
+            rng.choice(products).update_price(rng.uniform(1, 500))
+    store.remove_listener(count_mutation)
+    return len(mutations)
+
+
+def timed_workload(users: int, directory: Optional[str], snapshot_every: int) -> float:
+    """Run the workload with or without a journal and return the elapsed seconds"""
+    store = Store("Persistent Store")
+    journal = None
+    if directory:
+        journal = StoreJournal(store, directory, snapshot_every=snapshot_every)
+    started = time.perf_counter()
+    run_workload(store, users)
+    if journal:
+        journal.close()
+    return time.perf_counter() - started
+
+
+def main(users: int = 20_000) -> None:
+    """Print logging overhead and recovery time"""
+    operations = run_workload(Store("Dry Run"), users)
+    baseline = timed_workload(users, None, 0)
+    directory = tempfile.mkdtemp()
+    try:
+        # Snapshot roughly halfway so recovery exercises snapshot + log tail
+        journaled = timed_workload(users, directory, snapshot_every=operations // 2 + 1)
+        overhead = (journaled - baseline) / operations * 1e6
+        print(f"mutations:          {operations:,}")
+        print(f"without journal:    {baseline:.3f}s")
+        print(f"with journal:       {journaled:.3f}s ({overhead:.1f} us/op overhead)")
+
+        started = time.perf_counter()
+        store, last_seq = recover(directory)
+        elapsed = time.perf_counter() - started
+        print(f"recovery:           {elapsed:.3f}s ({last_seq:,} records, "
+              f"{len(store.orders):,} orders)")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,89 @@
+"""
+Scaling benchmark for the process-sharded store: 1 to N worker processes
+
+Each run registers the same users, fills their carts and checks them out in
+batches; the single-process Store.create_orders_batch is the baseline.
+
+Usage:
+    python -m benchmarks.sharding [max_processes] [users] [lines_per_cart]
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from src.product import Product
+from src.sharding import ShardedStore
+from src.store import Store
+from src.user import User
+
+BATCH = 2000
+
+
+def build_workload(users: int, lines: int, seed: int = 11) -> Tuple[List[Product], List[User], List[Tuple[str, str, int]]]:
+    """
+    Build products, users and cart lines shared by every run
+
+    Args:
+        users: Number of users
+        lines: Distinct products per cart
+        seed: Random seed
+
+    Returns:
+        (products, users, cart lines as (user_id, product_id, quantity))
+    """
+    rng = random.Random(seed)
+    products = [Product(f"P{i:05d}", f"Product {i}", round(rng.uniform(1, 500), 2), "", 10 ** 6)
+                for i in range(1000)]
+    shoppers = [User(f"U{i:07d}", "Shopper", "shopper@example.com", "1 Sale St") for i in range(users)]
+    cart_lines = [(user.user_id, product.product_id, rng.randint(1, 3))
+                  for user in shoppers for product in rng.sample(products, lines)]
+    return products, shoppers, cart_lines
+
+
+def run_single(products, users, cart_lines) -> float:
+    """Run the workload on a plain Store and return the elapsed seconds"""
+    store = Store("Flash Sale")
+    store.add_products(Product(p.product_id, p.name, p.price, p.description, p.stock) for p in products)
+    started = time.perf_counter()
+    store.register_users(User(u.user_id, u.name, u.email, u.address) for u in users)
+    for user_id, product_id, quantity in cart_lines:
+        store.get_user(user_id).cart.add_item(store.get_product(product_id), quantity)
+    user_ids = [user.user_id for user in users]
+    for start in range(0, len(user_ids), BATCH):
+        store.create_orders_batch(user_ids[start:start + BATCH])
+    return time.perf_counter() - started
+
+
+def run_sharded(processes: int, products, users, cart_lines) -> float:
+    """Run the workload on a ShardedStore and return the elapsed seconds"""
+    with ShardedStore("Flash Sale", processes) as store:
+        store.add_products(Product(p.product_id, p.name, p.price, p.description, p.stock) for p in products)
+        started = time.perf_counter()
+        store.register_users(users)
+        for start in range(0, len(cart_lines), BATCH):
+            store.add_to_carts(cart_lines[start:start + BATCH])
+        user_ids = [user.user_id for user in users]
+        for start in range(0, len(user_ids), BATCH):
+            store.create_orders(user_ids[start:start + BATCH])
+        elapsed = time.perf_counter() - started
+        assert store.get_store_statistics()['total_orders'] == len(users)
+    return elapsed
+
+
+def main(max_processes: int = 0, users: int = 40_000, lines: int = 5) -> None:
+    """Print throughput for the baseline and every shard count"""
+    max_processes = max_processes or multiprocessing.cpu_count()
+    products, shoppers, cart_lines = build_workload(users, lines)
+    baseline = run_single(products, shoppers, cart_lines)
+    print(f"{'single Store':<16}{baseline:>8.3f}s {users / baseline:>12,.0f} orders/s")
+    for processes in range(1, max_processes + 1):
+        elapsed = run_sharded(processes, products, shoppers, cart_lines)
+        print(f"{f'{processes} process(es)':<16}{elapsed:>8.3f}s {users / elapsed:>12,.0f} orders/s"
+              f"  {baseline / elapsed:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
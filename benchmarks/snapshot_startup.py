@@ -0,0 +1,108 @@
+"""
+Startup benchmark: time to first request when rebuilding vs loading a binary snapshot
+
+Builds a store with order history once, writes a JSON snapshot and a binary
+snapshot of it, then starts a fresh worker process per approach and times
+imports, loading and the first request (search, add to cart, checkout,
+order history):
+    scratch  rebuild the catalog, users and order history from the workload
+    json     rebuild the store from the JSON snapshot (load_snapshot)
+    binary   map the binary snapshot (load_binary_snapshot)
+
+Usage:
+    python -m benchmarks.snapshot_startup [products] [users] [orders]
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ("scratch", "json", "binary")
+
+
+def first_request(store, user_id: str, product_id: str, keyword: str) -> None:
+    """Serve a typical request: search, add to cart, check out, list the user's orders"""
+    store.search_products(keyword)
+    store.get_user(user_id).cart.add_item(store.get_product(product_id), 1)
+    store.create_order(user_id)
+    store.get_user_orders(user_id)
+
+
+def worker(mode: str, path: str, products: int, users: int, orders: int) -> None:
+    """Start a store the given way, serve one request and print the phase timings as JSON"""
+    started = time.perf_counter()
+    from benchmarks.workload import Workload
+    if mode == "scratch":
+        from benchmarks.suite import seed_history
+    elif mode == "json":
+        from src.persistence import load_snapshot
+    else:
+        from src.binary_snapshot import load_binary_snapshot
+    imported = time.perf_counter()
+
+    workload = Workload(products, users)
+    if mode == "scratch":
+        store = workload.build_store()
+        seed_history(store, workload, orders)
+    elif mode == "json":
+        store, _ = load_snapshot(path)
+    else:
+        store, _ = load_binary_snapshot(path)
+    loaded = time.perf_counter()
+
+    first_request(store, workload.random_user(), workload.popular_product(), workload.search_keywords(1)[0])
+    served = time.perf_counter()
+    print(json.dumps({'import': imported - started, 'load': loaded - imported, 'request': served - loaded}))
+
+
+def start_worker(mode: str, path: str, products: int, users: int, orders: int) -> dict:
+    """Run a worker process and add its wall time, interpreter startup included"""
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-m", "benchmarks.snapshot_startup", "--worker", mode, path,
+                             str(products), str(users), str(orders)],
+                            capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output)
+    timings['wall'] = time.perf_counter() - started
+    return timings
+
+
+def main(products: int = 100_000, users: int = 100_000, orders: int = 200_000) -> None:
+    """Print snapshot sizes and each worker's startup phases"""
+    from benchmarks.suite import seed_history
+    from benchmarks.workload import Workload
+    from src.binary_snapshot import write_binary_snapshot
+    from src.persistence import write_snapshot
+
+    workload = Workload(products, users)
+    store = workload.build_store()
+    seed_history(store, workload, orders)
+    directory = tempfile.mkdtemp(prefix="snapshot-startup-")
+    try:
+        paths = {'scratch': "", 'json': os.path.join(directory, "store.json"),
+                 'binary': os.path.join(directory, "store.snap")}
+        for mode, write in (("json", write_snapshot), ("binary", write_binary_snapshot)):
+            started = time.perf_counter()
+            write(store, paths[mode], 0)
+            print(f"{mode:<8} snapshot {os.path.getsize(paths[mode]) / 2 ** 20:7.1f} MiB, "
+                  f"written in {time.perf_counter() - started:.2f} s")
+        del store
+
+        print(f"\n{products:,} products, {users:,} users, {orders:,} orders")
+        print(f"{'':<10}{'import':>9}{'load':>9}{'request':>9}{'wall':>9}  (seconds)")
+        for mode in MODES:
+            timings = start_worker(mode, paths[mode], products, users, orders)
+            print(f"{mode:<10}{timings['import']:>9.3f}{timings['load']:>9.3f}{timings['request']:>9.3f}"
+                  f"{timings['wall']:>9.3f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        worker(sys.argv[2], sys.argv[3], *(int(arg) for arg in sys.argv[4:7]))
+    else:
+        main(*(int(arg) for arg in sys.argv[1:4]))
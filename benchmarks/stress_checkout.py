@@ -0,0 +1,141 @@
+"""
+Multi-threaded checkout stress test for the thread-safe store
+
+Many threads fill carts, then a barrier releases all their checkouts at
+once against a few products whose stock covers only part of the carts,
+while another thread restocks them. A stock listener yields the GIL after
+every stock change to widen race windows. Afterwards the run is checked
+for oversold stock, unconserved stock, duplicate order IDs and drifted
+statistics.
+
+Usage:
+    python -m benchmarks.stress_checkout [threads] [users_per_thread] [products] [--unsafe]
+
+--unsafe runs the same workload against a store without locks, as a control
+that should fail; the exit status is 0 when the checks caught its race.
+"""
+
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+def run(threads: int = 64, users_per_thread: int = 500, products: int = 32, seed: int = 7,
+        thread_safe: bool = True) -> bool:
+    """
+    Run the stress test
+
+    Args:
+        threads: Number of checkout threads
+        users_per_thread: Users checking out per thread
+        products: Number of products all threads compete for
+        seed: Random seed
+        thread_safe: Whether the store uses locks
+
+    Returns:
+        bool: True if all invariants held
+    """
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    store = Store("Stress Store", thread_safe=thread_safe)
+    for i in range(products):
+        store.add_product(Product(f"P{i:03d}", f"Product {i}", 10.0 + i, "", 10**9))
+    product_ids = list(store.products)
+    initial_stock = 0
+    restocked = Counter()
+    orders = []
+    orders_lock = threading.Lock()
+    stop = threading.Event()
+
+    def yield_on_stock(product: Product, event: str, old_value) -> None:
+        # Give up the GIL after every stock change, so a checkout that has
+        # checked its lines is preempted before it decrements the rest
+        if event == "stock":
+            time.sleep(0)
+
+    def limit_stock() -> None:
+        # Cover a different share of each product's carts, so products sell
+        # out one after another and each sell-out is a fresh race for the last units
+        nonlocal initial_stock
+        demand = Counter()
+        for user in store.users.values():
+            demand.update(user.cart.items)
+        for rank, product_id in enumerate(product_ids, 1):
+            product = store.products[product_id]
+            product.update_stock(demand[product_id] * rank // (products + 1) - product.stock)
+        for product in store.products.values():
+            product.add_listener(yield_on_stock)
+        initial_stock = sum(product.stock for product in store.products.values())
+
+    # Carts are filled first; the barrier then releases every checkout at once
+    start = threading.Barrier(threads + 1, action=limit_stock)
+
+    def checkout(worker: int) -> None:
+        rng = random.Random(seed + worker)
+        users = []
+        for n in range(users_per_thread):
+            user = User(f"U{worker}-{n}", "Stress User", "stress@example.com")
+            store.register_user(user)
+            for product_id in rng.sample(product_ids, min(4, len(product_ids))):
+                user.cart.add_item(store.get_product(product_id), rng.randint(1, 3))
+            users.append(user)
+        start.wait()
+        for user in users:
+            order = store.create_order(user.user_id)
+            if order is not None:
+                with orders_lock:
+                    orders.append(order)
+
+    def restock() -> None:
+        rng = random.Random(seed)
+        start.wait()
+        while not stop.is_set():
+            product_id = rng.choice(product_ids)
+            if store.get_product(product_id).update_stock(1):
+                restocked[product_id] += 1
+            time.sleep(0.0005)
+
+    workers = [threading.Thread(target=checkout, args=(i,)) for i in range(threads)]
+    restocker = threading.Thread(target=restock)
+    started = time.perf_counter()
+    restocker.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    restocker.join()
+    elapsed = time.perf_counter() - started
+
+    sold = sum(sum(line['quantity'] for line in order.items.values()) for order in orders)
+    final_stock = sum(product.stock for product in store.products.values())
+    order_ids = [order.order_id for order in orders]
+
+    drift = final_stock - (initial_stock + sum(restocked.values()) - sold)
+    checks = {
+        'no negative stock': all(p.stock >= 0 for p in store.products.values()),
+        'stock conserved': not drift,
+        'unique order ids': len(set(order_ids)) == len(order_ids),
+        'orders registered': len(store.orders) == len(orders),
+        'statistics consistent': not store.verify_statistics(),
+    }
+    print(f"{len(orders)} orders, {sold} units sold in {elapsed:.2f}s "
+          f"({threads} threads x {users_per_thread} users, {products} products, "
+          f"stock drift {drift:+d} units)")
+    for name, passed in checks.items():
+        print(f"  {'PASS' if passed else 'FAIL'}  {name}")
+    return all(checks.values())
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:] if arg.isdigit()]
+    unsafe = "--unsafe" in sys.argv
+    passed = run(*args[:3], thread_safe=not unsafe)
+    if unsafe:
+        print(f"control {'did not catch' if passed else 'caught'} the race")
+    sys.exit(0 if passed != unsafe else 1)
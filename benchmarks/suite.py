@@ -0,0 +1,272 @@
+"""
+Benchmark suite timing the store's hot paths on a seeded synthetic workload
+
+Every operation is timed call by call; the report gives throughput, p50/p99
+latency and peak memory as JSON so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.suite [--products N] [--users N] [--ops N] [--seed N]
+                               [--catalog dict|columnar] [--thread-safe] [--money float|cents]
+                               [--output report.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from benchmarks.workload import Workload
+from src.cart import Cart
+from src.order import Order
+from src.store import Store
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the working tree, if run inside a git checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_calls(function: Callable, arguments: Iterable[tuple]) -> List[int]:
+    """
+    Call a function once per argument tuple and time every call
+
+    Args:
+        function: Function under test
+        arguments: Positional arguments for each call
+
+    Returns:
+        List of call latencies in nanoseconds
+    """
+    clock = time.perf_counter_ns
+    latencies = []
+    for args in arguments:
+        started = clock()
+        function(*args)
+        latencies.append(clock() - started)
+    return latencies
+
+
+def summarize(latencies: List[int]) -> Dict:
+    """
+    Reduce call latencies to throughput and percentiles
+
+    Args:
+        latencies: Call latencies in nanoseconds
+
+    Returns:
+        Dict: ops, seconds, ops_per_second and p50/p99/max in microseconds
+    """
+    if not latencies:
+        return {'ops': 0}
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1000, 2)
+
+    return {
+        'ops': len(ordered),
+        'seconds': round(total / 1e9, 6),
+        'ops_per_second': round(len(ordered) / (total / 1e9), 1) if total else None,
+        'p50_us': percentile(0.50),
+        'p99_us': percentile(0.99),
+        'max_us': round(ordered[-1] / 1000, 2)
+    }
+
+
+def run_lifecycle(order: Order, path: tuple) -> None:
+    """Apply a sequence of status methods to an order"""
+    for method in path:
+        getattr(order, method)()
+
+
+def seed_history(store: Store, workload: Workload, orders: int) -> None:
+    """
+    Create past orders and move them through the lifecycle mix
+
+    Args:
+        store: Populated store
+        workload: Workload generator
+        orders: Number of historical orders
+    """
+    for start in range(0, orders, 10_000):
+        lines = workload.cart_lines(min(10_000, orders - start))
+        for user_id, product_id, quantity in lines:
+            store.get_user(user_id).cart.add_item(store.get_product(product_id), quantity)
+        results = store.create_orders_batch(dict.fromkeys(user_id for user_id, _, _ in lines))
+        created = [result['order'] for result in results.values() if result['order']]
+        for order, path in workload.lifecycle_paths(created):
+            run_lifecycle(order, path)
+
+
+def run_suite(products: int, users: int, ops: int, seed: int = 42, history: Optional[int] = None,
+              **store_options) -> Dict:
+    """
+    Build the store and time every hot path
+
+    Args:
+        products: Catalog size
+        users: Number of users
+        ops: Calls per operation
+        seed: Random seed
+        history: Orders created before timing starts (defaults to ops)
+        **store_options: Passed to the Store constructor
+
+    Returns:
+        Dict: JSON-compatible report
+    """
+    workload = Workload(products, users, seed)
+    history = ops if history is None else history
+
+    started = time.perf_counter()
+    store = workload.build_store(**store_options)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    seed_history(store, workload, history)
+    history_seconds = time.perf_counter() - started
+    build_rss = peak_rss_mb()
+
+    operations: Dict[str, Dict] = {}
+    operations['search_products'] = summarize(time_calls(
+        store.search_products, [(keyword,) for keyword in workload.search_keywords(ops)]))
+
+    prefixes = [keyword[:workload.rng.randint(1, len(keyword))]
+                 for keyword in workload.search_keywords(ops)]
+    operations['autocomplete'] = summarize(time_calls(
+        store.autocomplete, [(prefix,) for prefix in prefixes]))
+
+    ranges = []
+    for _ in range(ops):
+        low = workload.rng.uniform(1, 200)
+        ranges.append((low, low * workload.rng.uniform(1.1, 3)))
+    operations['browse_products'] = summarize(time_calls(
+        store.browse_products, ranges))
+
+    lines = workload.cart_lines(max(1, ops // 3))[:ops]
+    shoppers = list(dict.fromkeys(user_id for user_id, _, _ in lines))
+    operations['add_item'] = summarize(time_calls(
+        Cart.add_item,
+        [(store.get_user(user_id).cart, store.get_product(product_id), quantity)
+         for user_id, product_id, quantity in lines]))
+
+    carts = [store.get_user(user_id).cart for user_id in shoppers]
+    operations['get_total'] = summarize(time_calls(
+        Cart.get_total, [(carts[i % len(carts)],) for i in range(ops)]))
+
+    before = set(store.orders)
+    operations['create_order'] = summarize(time_calls(
+        store.create_order, [(user_id,) for user_id in shoppers]))
+    created = [order for order_id, order in store.orders.items() if order_id not in before]
+
+    operations['get_user_orders'] = summarize(time_calls(
+        store.get_user_orders, [(workload.random_user(),) for _ in range(ops)]))
+
+    operations['get_store_statistics'] = summarize(time_calls(
+        store.get_store_statistics, [() for _ in range(ops)]))
+
+    operations['order_lifecycle'] = summarize(time_calls(
+        run_lifecycle, workload.lifecycle_paths(created)))
+
+    now = datetime.now()
+    windows = [now - timedelta(minutes=workload.rng.choice((60, 1440, 10080))) for _ in range(ops)]
+    operations['get_revenue_report'] = summarize(time_calls(
+        store.get_revenue_report, [(start, now) for start in windows]))
+    operations['get_orders_between'] = summarize(time_calls(
+        store.get_orders_between, [(now - timedelta(seconds=1), now) for _ in range(ops)]))
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'products': products,
+            'users': users,
+            'ops': ops,
+            'history_orders': history,
+            'store_options': store_options
+        },
+        'build': {
+            'store_seconds': round(build_seconds, 3),
+            'history_seconds': round(history_seconds, 3),
+            'peak_rss_mb': build_rss
+        },
+        'operations': operations,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def compare(report: Dict, baseline: Dict) -> str:
+    """
+    Format per-operation changes against an earlier report
+
+    Args:
+        report: Current report
+        baseline: Report to compare against
+
+    Returns:
+        str: Table of throughput and p99 ratios (current / baseline)
+    """
+    rows = [f"{'operation':<22}{'ops/s':>10}{'p99':>10}"]
+    for name, current in report['operations'].items():
+        old = baseline.get('operations', {}).get(name)
+        if not old or not old.get('ops_per_second') or not current.get('ops_per_second'):
+            continue
+        throughput = current['ops_per_second'] / old['ops_per_second']
+        p99 = current['p99_us'] / old['p99_us'] if old['p99_us'] else float('nan')
+        rows.append(f"{name:<22}{throughput:>9.2f}x{p99:>9.2f}x")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the suite from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=10_000, help="calls per operation")
+    parser.add_argument("--history", type=int, default=None, help="orders created before timing")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--catalog", choices=("dict", "columnar"), default="dict")
+    parser.add_argument("--thread-safe", action="store_true")
+    parser.add_argument("--money", choices=("float", "cents"), default="float")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.products, args.users, args.ops, args.seed, args.history,
+                       catalog=args.catalog, thread_safe=args.thread_safe, money=args.money)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            print(compare(report, json.load(handle)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Seeded synthetic workload generator shared by the benchmark suite
+
+Everything is derived from one seed, so two runs with the same arguments
+build identical stores and replay identical operations.
+"""
+
+import bisect
+import itertools
+import math
+import random
+from typing import Iterator, List, Sequence, Tuple
+
+from src.order import Order
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+# Small vocabulary so product names share tokens the way real catalogs do
+ADJECTIVES = ("wireless", "portable", "smart", "compact", "premium", "classic", "ultra", "eco",
+              "pro", "mini", "digital", "ergonomic", "heavy", "light", "vintage", "modern")
+NOUNS = ("laptop", "mouse", "keyboard", "monitor", "headphones", "speaker", "camera", "charger",
+         "cable", "lamp", "chair", "desk", "backpack", "watch", "phone", "tablet", "router",
+         "printer", "microphone", "drive")
+MATERIALS = ("steel", "bamboo", "leather", "carbon", "glass", "aluminium", "cotton", "plastic")
+
+# Share of orders ending in each lifecycle path, as the sequence of Order methods applied
+LIFECYCLE_MIX: Tuple[Tuple[float, Tuple[str, ...]], ...] = (
+    (0.70, ("confirm_order", "process_order", "ship_order", "deliver_order")),
+    (0.10, ("confirm_order", "process_order", "ship_order")),
+    (0.05, ("confirm_order",)),
+    (0.10, ("cancel_order",)),
+    (0.05, ()),
+)
+
+# Cart sizes in distinct lines and their relative frequency
+CART_SIZES = (1, 2, 3, 4, 5, 8, 12)
+CART_SIZE_WEIGHTS = (30, 25, 18, 10, 8, 6, 3)
+
+
+class Workload:
+    """Deterministic source of catalog, users and operation arguments"""
+
+    def __init__(self, products: int, users: int, seed: int = 42, skew: float = 1.1):
+        """
+        Initialize the generator
+
+        Args:
+            products: Catalog size
+            users: Number of registered users
+            seed: Random seed
+            skew: Zipf exponent of product popularity (0 = uniform)
+        """
+        self.products = products
+        self.users = users
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Cumulative Zipf weights over a capped head of the catalog; the tail is drawn uniformly
+        head = min(products, 100_000)
+        self._popularity = list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(head)))
+        # Spread popular ranks over the ID space with a coprime stride instead of a shuffled list
+        self._stride = 1_000_003
+        while math.gcd(self._stride, products) != 1:
+            self._stride += 2
+        self._offset = random.Random(seed + 1).randrange(products)
+
+    @staticmethod
+    def product_id(index: int) -> str:
+        """ID of the product with the given index"""
+        return f"P{index:08d}"
+
+    @staticmethod
+    def user_id(index: int) -> str:
+        """ID of the user with the given index"""
+        return f"U{index:08d}"
+
+    def iter_products(self) -> Iterator[Product]:
+        """
+        Stream the catalog without holding it in memory
+
+        Yields:
+            Product: Products in ID order
+        """
+        rng = random.Random(self.seed + 2)
+        for index in range(self.products):
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(NOUNS)}"
+            price = round(rng.lognormvariate(3.5, 1.0), 2)
+            stock = 0 if rng.random() < 0.05 else rng.randint(1, 10 ** 6)
+            yield Product(self.product_id(index), name.title(), price, f"{name} #{index}", stock)
+
+    def iter_users(self) -> Iterator[User]:
+        """
+        Stream the user base
+
+        Yields:
+            User: Users in ID order
+        """
+        for index in range(self.users):
+            yield User(self.user_id(index), f"User {index}", f"user{index}@example.com",
+                       f"{index} Benchmark Rd")
+
+    def build_store(self, chunk_size: int = 50_000, **store_options) -> Store:
+        """
+        Build a populated store
+
+        Args:
+            chunk_size: Entities inserted per bulk call
+            **store_options: Passed to the Store constructor
+
+        Returns:
+            Store: Store holding the whole catalog and user base
+        """
+        store = Store("Benchmark Store", **store_options)
+        for chunk in _chunks(self.iter_products(), chunk_size):
+            store.add_products(chunk)
+        for chunk in _chunks(self.iter_users(), chunk_size):
+            store.register_users(chunk)
+        return store
+
+    def popular_product(self) -> str:
+        """ID of a product drawn from the popularity distribution"""
+        rank = bisect.bisect(self._popularity, self.rng.random() * self._popularity[-1])
+        if self.products > len(self._popularity) and self.rng.random() < 0.2:
+            rank = self.rng.randrange(self.products)
+        return self.product_id((rank * self._stride + self._offset) % self.products)
+
+    def random_user(self) -> str:
+        """ID of a uniformly drawn user"""
+        return self.user_id(self.rng.randrange(self.users))
+
+    def search_keywords(self, count: int) -> List[str]:
+        """
+        Search queries: single words, two-word phrases and misses
+
+        Args:
+            count: Number of queries
+
+        Returns:
+            List of keywords
+        """
+        keywords = []
+        for _ in range(count):
+            roll = self.rng.random()
+            if roll < 0.6:
+                keywords.append(self.rng.choice(NOUNS))
+            elif roll < 0.9:
+                keywords.append(f"{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)}")
+            else:
+                keywords.append("nonexistent")
+        return keywords
+
+    def cart_lines(self, user_count: int) -> List[Tuple[str, str, int]]:
+        """
+        Cart contents for distinct shoppers following the cart size mix
+
+        Args:
+            user_count: Number of shoppers (capped at the user base)
+
+        Returns:
+            List of (user_id, product_id, quantity)
+        """
+        lines = []
+        shoppers = self.rng.sample(range(self.users), min(user_count, self.users))
+        for index in shoppers:
+            size = self.rng.choices(CART_SIZES, CART_SIZE_WEIGHTS)[0]
+            for _ in range(size):
+                lines.append((self.user_id(index), self.popular_product(), self.rng.randint(1, 3)))
+        return lines
+
+    def lifecycle_paths(self, orders: Sequence[Order]) -> List[Tuple[Order, Tuple[str, ...]]]:
+        """
+        Assign each order a lifecycle path from the lifecycle mix
+
+        Args:
+            orders: Orders to move through their lifecycle
+
+        Returns:
+            List of (order, methods to call in order)
+        """
+        weights = [share for share, _ in LIFECYCLE_MIX]
+        paths = [path for _, path in LIFECYCLE_MIX]
+        return [(order, self.rng.choices(paths, weights)[0]) for order in orders]
+
+
+def _chunks(iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
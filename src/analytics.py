@@ -0,0 +1,378 @@
+"""
+Streaming best-seller and top-customer analytics fed by the store's order feed
+"""
+
+import heapq
+import random
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Tuple
+from src.order import Order
+from src.store import Store
+
+
+_MASK64 = (1 << 64) - 1
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch; estimates never undercount"""
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 0):
+        """
+        Initialize an empty sketch
+
+        Args:
+            width: Counters per row, rounded up to a power of two
+                   (error is about total / width)
+            depth: Number of rows (error probability is about e ** -depth)
+            seed: Seed of the row hash functions
+        """
+        bits = max(1, (width - 1).bit_length())
+        self.width = 1 << bits
+        self.depth = depth
+        self.rows = [array('d', bytes(8 * self.width)) for _ in range(depth)]
+        # Independent multiply-shift hash per row; hashing (row, key) tuples
+        # would give nearly the same column in every row
+        rng = random.Random(seed)
+        self._shift = 64 - bits
+        self._hashes = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(depth)]
+
+    def columns(self, key: str) -> List[int]:
+        """
+        Counter index of a key in every row
+
+        Sketches built with the same width, depth and seed share columns, so
+        one lookup can feed several of them through add_at().
+
+        Args:
+            key: Item to hash
+
+        Returns:
+            List of column indexes, one per row
+        """
+        value = hash(key) & _MASK64
+        shift = self._shift
+        return [((a * value + b) & _MASK64) >> shift for a, b in self._hashes]
+
+    def add(self, key: str, value: float = 1.0) -> float:
+        """
+        Add to a key's count
+
+        Args:
+            key: Item to count
+            value: Amount to add
+
+        Returns:
+            float: New estimate for the key
+        """
+        return self.add_at(self.columns(key), value)
+
+    def add_at(self, columns: List[int], value: float = 1.0) -> float:
+        """
+        Add to the count of a key whose columns are already known
+
+        Args:
+            columns: Result of columns(key)
+            value: Amount to add
+
+        Returns:
+            float: New estimate for the key
+        """
+        estimate = float('inf')
+        for row, column in zip(self.rows, columns):
+            count = row[column] = row[column] + value
+            if count < estimate:
+                estimate = count
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        """
+        Estimate a key's count
+
+        Args:
+            key: Item to look up
+
+        Returns:
+            float: Upper bound of the true count
+        """
+        return min(row[column] for row, column in zip(self.rows, self.columns(key)))
+
+
+class TopK:
+    """
+    Candidate set of the k largest counts
+
+    Counts fed in must only grow. With exact counts the set is exactly the
+    top k; with sketch estimates it holds the heavy hitters.
+    """
+
+    def __init__(self, k: int):
+        """
+        Initialize an empty candidate set
+
+        Args:
+            k: Number of items to keep
+        """
+        self.k = k
+        self.candidates: Dict[str, float] = {}
+        self._floor: Optional[Tuple[float, str]] = None  # smallest candidate once full
+
+    def offer(self, key: str, value: float) -> None:
+        """
+        Report the current count of a key
+
+        Args:
+            key: Item whose count grew
+            value: Its current count
+        """
+        candidates = self.candidates
+        if key in candidates:
+            candidates[key] = value
+            if self._floor is not None and self._floor[1] == key:
+                self._floor = None
+            return
+        if len(candidates) < self.k:
+            candidates[key] = value
+            return
+        floor = self._floor
+        if floor is None:
+            floor = self._floor = min((count, item) for item, count in candidates.items())
+        if value > floor[0]:
+            del candidates[floor[1]]
+            candidates[key] = value
+            self._floor = None
+
+    def items(self, n: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Get the largest candidates
+
+        Args:
+            n: Number of items (defaults to k)
+
+        Returns:
+            List of (key, count) from largest to smallest
+        """
+        ranked = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n or self.k]
+
+
+class _SlidingWindow:
+    """Ring of time slots holding per-product units and revenue"""
+
+    def __init__(self, seconds: float, slots: int):
+        self.slot_seconds = seconds / slots
+        self.slot_ids = [-1] * slots
+        self.slots: List[Dict[str, List[float]]] = [{} for _ in range(slots)]
+
+    def _live_slots(self, now: float) -> List[Dict[str, List[float]]]:
+        """Slots whose time is inside the window ending now"""
+        current = int(now // self.slot_seconds)
+        oldest = current - len(self.slots)
+        return [slot for slot_id, slot in zip(self.slot_ids, self.slots) if oldest < slot_id <= current]
+
+    def add(self, now: float, product_id: str, units: int, revenue: float) -> None:
+        """Record a sale in the slot for the given time"""
+        slot_id = int(now // self.slot_seconds)
+        position = slot_id % len(self.slots)
+        if self.slot_ids[position] != slot_id:
+            self.slot_ids[position] = slot_id
+            self.slots[position] = {}
+        totals = self.slots[position].get(product_id)
+        if totals is None:
+            self.slots[position][product_id] = [units, revenue]
+        else:
+            totals[0] += units
+            totals[1] += revenue
+
+    def totals(self, now: float, product_id: str) -> Tuple[float, float]:
+        """Units and revenue of a product inside the window"""
+        units = revenue = 0
+        for slot in self._live_slots(now):
+            sale = slot.get(product_id)
+            if sale is not None:
+                units += sale[0]
+                revenue += sale[1]
+        return units, revenue
+
+    def merged(self, now: float, column: int) -> Dict[str, float]:
+        """Units (column 0) or revenue (column 1) of every product sold inside the window"""
+        merged: Dict[str, float] = {}
+        get = merged.get
+        for slot in self._live_slots(now):
+            for product_id, totals in slot.items():
+                merged[product_id] = get(product_id, 0) + totals[column]
+        return merged
+
+
+class SalesAnalytics:
+    """
+    Live top products and top customers maintained from newly created orders
+
+    In "exact" mode every product and customer keeps an exact counter. In
+    "sketch" mode counts live in Count-Min Sketches, so memory is bounded
+    regardless of catalog and customer count, and only the heavy hitters
+    are kept by key. The sliding window keeps exact totals per slot for the
+    products sold inside it in both modes. Queries read the maintained top-k
+    candidates or the window, so their cost does not depend on the order
+    history. Orders are counted when they are placed; later cancellations
+    are not subtracted.
+    """
+
+    def __init__(self, store: Store, k: int = 10, mode: str = "exact", window_seconds: float = 3600,
+                 window_slots: int = 60, sketch_width: int = 2048, sketch_depth: int = 4,
+                 clock: Callable[[], float] = time.time):
+        """
+        Start following the store's new orders
+
+        Args:
+            store: Store whose orders are analyzed
+            k: Number of top items kept per ranking
+            mode: "exact" or "sketch"
+            window_seconds: Length of the sliding window
+            window_slots: Number of slots the window advances by
+            sketch_width: Counters per sketch row in sketch mode
+            sketch_depth: Rows per sketch in sketch mode
+            clock: Time source for the sliding window
+        """
+        if mode not in ("exact", "sketch"):
+            raise ValueError(f"Unknown analytics mode: {mode}")
+        self.store = store
+        self.k = k
+        self.mode = mode
+        self._clock = clock
+        self._lock = threading.Lock()
+        if mode == "exact":
+            self._units: Dict[str, float] = {}
+            self._revenue: Dict[str, float] = {}
+            self._spend: Dict[str, float] = {}
+        else:
+            self._units_sketch = CountMinSketch(sketch_width, sketch_depth)
+            self._revenue_sketch = CountMinSketch(sketch_width, sketch_depth)
+            self._spend_sketch = CountMinSketch(sketch_width, sketch_depth)
+        self._top_units = TopK(k)
+        self._top_revenue = TopK(k)
+        self._top_customers = TopK(k)
+        self._window = _SlidingWindow(window_seconds, window_slots)
+        store.add_listener(self._on_store_event)
+
+    def close(self) -> None:
+        """Stop following the store"""
+        self.store.remove_listener(self._on_store_event)
+
+    def _on_store_event(self, store: Store, event: str, payload) -> None:
+        """Feed newly created orders into the counters"""
+        if event == "order_created":
+            self.record_order(payload)
+
+    def record_order(self, order: Order) -> None:
+        """
+        Count the lines and spend of an order
+
+        Args:
+            order: Newly created order
+        """
+        now = self._clock()
+        with self._lock:
+            for product_id, _, _, units, revenue in order.items.lines():
+                if self.mode == "exact":
+                    total_units = self._units[product_id] = self._units.get(product_id, 0) + units
+                    total_revenue = self._revenue[product_id] = self._revenue.get(product_id, 0) + revenue
+                else:
+                    columns = self._units_sketch.columns(product_id)
+                    total_units = self._units_sketch.add_at(columns, units)
+                    total_revenue = self._revenue_sketch.add_at(columns, revenue)
+                self._top_units.offer(product_id, total_units)
+                self._top_revenue.offer(product_id, total_revenue)
+                self._window.add(now, product_id, units, revenue)
+            user_id = order.user_id
+            if self.mode == "exact":
+                spend = self._spend[user_id] = self._spend.get(user_id, 0) + order.total_amount
+            else:
+                spend = self._spend_sketch.add(user_id, order.total_amount)
+            self._top_customers.offer(user_id, spend)
+
+    def top_products(self, n: Optional[int] = None, by: str = "units") -> List[Tuple[str, float]]:
+        """
+        Get the best-selling products since analytics started
+
+        Args:
+            n: Number of products (at most k)
+            by: "units" or "revenue"
+
+        Returns:
+            List of (product_id, units or revenue), best first
+        """
+        tracker = self._tracker(by)
+        with self._lock:
+            return tracker.items(n)
+
+    def top_customers(self, n: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Get the customers with the highest spend since analytics started
+
+        Args:
+            n: Number of customers (at most k)
+
+        Returns:
+            List of (user_id, spend), highest first
+        """
+        with self._lock:
+            return self._top_customers.items(n)
+
+    def product_sales(self, product_id: str) -> Dict:
+        """
+        Get the units sold and revenue of a product since analytics started
+
+        Args:
+            product_id: ID of the product
+
+        Returns:
+            Dict: {'units', 'revenue'} (upper-bound estimates in sketch mode)
+        """
+        with self._lock:
+            if self.mode == "exact":
+                return {'units': self._units.get(product_id, 0),
+                        'revenue': self._revenue.get(product_id, 0)}
+            return {'units': self._units_sketch.estimate(product_id),
+                    'revenue': self._revenue_sketch.estimate(product_id)}
+
+    def window_sales(self, product_id: str) -> Dict:
+        """
+        Get the units sold and revenue of a product inside the sliding window
+
+        Args:
+            product_id: ID of the product
+
+        Returns:
+            Dict: {'units', 'revenue'}
+        """
+        with self._lock:
+            units, revenue = self._window.totals(self._clock(), product_id)
+        return {'units': units, 'revenue': revenue}
+
+    def top_products_window(self, n: Optional[int] = None, by: str = "units") -> List[Tuple[str, float]]:
+        """
+        Get the best-selling products inside the sliding window
+
+        Cost depends on the number of distinct products sold inside the window.
+
+        Args:
+            n: Number of products (defaults to k)
+            by: "units" or "revenue"
+
+        Returns:
+            List of (product_id, units or revenue), best first
+        """
+        column = 0 if self._tracker(by) is self._top_units else 1
+        with self._lock:
+            merged = self._window.merged(self._clock(), column)
+        return heapq.nlargest(n or self.k, merged.items(), key=lambda item: item[1])
+
+    def _tracker(self, by: str) -> TopK:
+        """Top-k candidates for a product ranking"""
+        if by == "units":
+            return self._top_units
+        if by == "revenue":
+            return self._top_revenue
+        raise ValueError(f"Unknown ranking: {by}")
@@ -0,0 +1,279 @@
+"""
+Prefix autocomplete over product name tokens
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+from src.product import Product
+from src.search_index import tokenize
+
+# score(product) -> ranking value, higher first
+Score = Callable[[Product], float]
+
+# Position in a token's ranking: (-score, product_id), so the best sorts first
+RankKey = Tuple[float, str]
+
+# Prefixes up to this length match many tokens, so their best completions are cached
+_SHORT_PREFIX = 2
+
+# A batch at least 1/_MERGE_RATIO the size of a token's ranking is merged into
+# it in one pass instead of being moved one insertion at a time
+_MERGE_RATIO = 64
+
+
+def stock_score(product: Product) -> float:
+    """Default ranking: products with more stock first"""
+    return product.stock
+
+
+class Autocomplete:
+    """
+    Sorted token array over product names answering prefix queries
+
+    Tokens are kept in one sorted list, so the tokens sharing a prefix are a
+    contiguous slice found by bisection. Every token keeps its products
+    sorted by score, so the best completions are the heads of sorted lists
+    merged lazily. Scores are re-read whenever the store reports a change to
+    the product.
+
+    A query costs one heap entry per token sharing the prefix plus the
+    entries read until the limit is reached. Prefixes of one or two
+    characters share many tokens, so their completions are cached until a
+    product with a matching token changes. When the query has complete
+    words, the smaller of the rarest word's ranking and the prefix's
+    rankings is scanned, so the cost grows with that list when few of its
+    products match every word.
+    """
+
+    def __init__(self, score: Score = stock_score):
+        """
+        Initialize an empty index
+
+        Args:
+            score: Ranking function called as score(product), higher first
+        """
+        self.score = score
+        self.tokens: List[str] = []  # sorted, unique
+        self.ranked: Dict[str, List[RankKey]] = {}  # {token: products best first}
+        self.name_tokens: Dict[str, Set[str]] = {}  # {product_id: tokens}
+        self.scores: Dict[str, float] = {}  # {product_id: indexed -score}
+        # Products added in bulk are sorted into their tokens on the next read
+        self._pending: Dict[str, List[RankKey]] = {}
+        # {short prefix: (best product IDs, True if that is every match)}
+        self._short_cache: Dict[str, Tuple[List[str], bool]] = {}
+
+    def __getstate__(self) -> Dict:
+        """
+        Pickle the index without a custom score function, which may be a lambda
+
+        An unpickled index with a custom score has score None, and the loader
+        must set it again (see load_binary_snapshot()).
+        """
+        state = self.__dict__.copy()
+        if self.score is not stock_score:
+            state['score'] = None
+        return state
+
+    def _ranking(self, token: str) -> List[RankKey]:
+        """A token's ranked products, with pending additions sorted in"""
+        ranked = self.ranked[token]
+        pending = self._pending.pop(token, None)
+        if pending:
+            if len(pending) * _MERGE_RATIO < len(ranked):
+                for key in pending:
+                    insort(ranked, key)
+            else:
+                ranked.extend(pending)
+                ranked.sort()
+        return ranked
+
+    def add_product(self, product: Product) -> None:
+        """
+        Index the tokens of a product's name
+
+        Args:
+            product: Product to index
+        """
+        product_id = product.product_id
+        tokens = set(tokenize(product.name))
+        self._invalidate(tokens)
+        key = (-self.score(product), product_id)
+        self.name_tokens[product_id] = tokens
+        self.scores[product_id] = key[0]
+        for token in tokens:
+            if token not in self.ranked:
+                self.ranked[token] = []
+                insort(self.tokens, token)
+            self._pending.setdefault(token, []).append(key)
+
+    def remove_product(self, product_id: str) -> None:
+        """
+        Drop a product from the index
+
+        Args:
+            product_id: ID of the product to remove
+        """
+        tokens = self.name_tokens.pop(product_id, None)
+        if tokens is None:
+            return
+        self._invalidate(tokens)
+        key = (self.scores.pop(product_id), product_id)
+        for token in tokens:
+            ranked = self._ranking(token)
+            _remove(ranked, key)
+            if not ranked:
+                del self.ranked[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+
+    def update_product(self, product: Product) -> None:
+        """
+        Bring a product's tokens and score up to date
+
+        Args:
+            product: Product that was renamed or whose score inputs changed
+        """
+        product_id = product.product_id
+        tokens = self.name_tokens.get(product_id)
+        if tokens is None:
+            return  # removed from the catalog
+        if set(tokenize(product.name)) != tokens:
+            self.remove_product(product_id)
+            self.add_product(product)
+            return
+        old_score = self.scores[product_id]
+        new_score = -self.score(product)
+        if new_score == old_score:
+            return
+        self.scores[product_id] = new_score
+        self._invalidate(tokens)
+        for token in tokens:
+            ranked = self._ranking(token)
+            _remove(ranked, (old_score, product_id))
+            insort(ranked, (new_score, product_id))
+
+    def update_products(self, products: Iterable[Product]) -> None:
+        """
+        Bring many products up to date at once, e.g. after a bulk catalog update
+
+        Args:
+            products: Products that were renamed or whose score inputs changed
+        """
+        rescored: Dict[str, List[Tuple[RankKey, RankKey]]] = {}  # {token: [(old key, new key)]}
+        for product in products:
+            product_id = product.product_id
+            tokens = self.name_tokens.get(product_id)
+            if tokens is None:
+                continue  # removed from the catalog
+            if set(tokenize(product.name)) != tokens:
+                self.remove_product(product_id)
+                self.add_product(product)
+                continue
+            old_score = self.scores[product_id]
+            new_score = -self.score(product)
+            if new_score == old_score:
+                continue
+            self.scores[product_id] = new_score
+            self._invalidate(tokens)
+            change = ((old_score, product_id), (new_score, product_id))
+            for token in tokens:
+                rescored.setdefault(token, []).append(change)
+        for token, changes in rescored.items():
+            ranked = self._ranking(token)
+            if len(changes) * _MERGE_RATIO < len(ranked):
+                for old_key, new_key in changes:
+                    _remove(ranked, old_key)
+                    insort(ranked, new_key)
+                continue
+            dropped = {old_key[1] for old_key, _ in changes}
+            ranked[:] = [key for key in ranked if key[1] not in dropped]
+            ranked.extend(sorted(new_key for _, new_key in changes))
+            ranked.sort()  # two sorted runs, merged in linear time
+
+    def _invalidate(self, tokens: Set[str]) -> None:
+        """Drop the cached completions of the short prefixes of some tokens"""
+        cache = self._short_cache
+        if cache:
+            for token in tokens:
+                for length in range(1, _SHORT_PREFIX + 1):
+                    cache.pop(token[:length], None)
+
+    def rebuild(self, products: Iterable[Product], score: Score) -> None:
+        """
+        Re-index every product with a new ranking function
+
+        Args:
+            products: Whole catalog
+            score: New ranking function
+        """
+        self.__init__(score)
+        for product in products:
+            self.add_product(product)
+
+    def complete(self, text: str, limit: int = 10) -> List[str]:
+        """
+        Get the best products whose name matches what has been typed so far
+
+        Every complete word must appear in the name and the last word is
+        matched as a prefix, so "wireless mo" finds "Wireless Mouse".
+
+        Args:
+            text: Query typed so far
+            limit: Number of completions
+
+        Returns:
+            List of product IDs, best first
+        """
+        words = tokenize(text)
+        if not words:
+            return []
+        prefix, required = words[-1], words[:-1]
+        if any(word not in self.ranked for word in required):
+            return []
+        short = not required and len(prefix) <= _SHORT_PREFIX
+        if short:
+            cached = self._short_cache.get(prefix)
+            if cached is not None and (cached[1] or len(cached[0]) >= limit):
+                return cached[0][:limit]
+        tokens = self.tokens
+        position = bisect_left(tokens, prefix)
+        rankings = []
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            rankings.append(self._ranking(tokens[position]))
+            position += 1
+        if not rankings:
+            return []
+        check_prefix = False
+        if required:
+            # Scan whichever side has fewer candidates: the rarest complete word or the prefix
+            rarest = min((self._ranking(word) for word in required), key=len)
+            if len(rarest) < sum(len(ranked) for ranked in rankings):
+                rankings, check_prefix = [rarest], True
+        merged = rankings[0] if len(rankings) == 1 else heapq.merge(*rankings)
+
+        results: List[str] = []
+        seen: Set[str] = set()
+        for _, product_id in merged:
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+            if required:
+                name_tokens = self.name_tokens[product_id]
+                if not all(word in name_tokens for word in required):
+                    continue
+                if check_prefix and not any(token.startswith(prefix) for token in name_tokens):
+                    continue
+            results.append(product_id)
+            if len(results) >= limit:
+                break
+        if short:
+            self._short_cache[prefix] = (results, len(results) < limit)
+            results = results[:]
+        return results
+
+
+def _remove(keys: List[RankKey], key: RankKey) -> None:
+    """Remove a key from a sorted list"""
+    position = bisect_left(keys, key)
+    if position < len(keys) and keys[position] == key:
+        del keys[position]
@@ -0,0 +1,477 @@
+"""
+Binary store snapshots that load with a few large reads and hydrate entities lazily
+
+The snapshot is one pickle (protocol 5) of the store's entity maps and
+indexes. Products, users and orders are pickled as empty stubs holding a row
+number; their fields are kept in column tables whose numeric columns (prices,
+stock, totals, dates, statuses) are written as out-of-band buffers after the
+pickle. Loading maps the file and unpickles the maps and indexes at C speed;
+the numeric columns stay views into the mapped file, and each entity copies
+its row into its own slots the first time one of them is read. A worker can
+serve its first request without rebuilding indexes or touching the entities
+the request does not need.
+"""
+
+import gc
+import io
+import mmap
+import os
+import pickle
+import struct
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from src.autocomplete import Score, stock_score
+from src.cart import Cart
+from src.line_items import LineItems
+from src.locking import NO_LOCK, OrderIdAllocator
+from src.order import Order, OrderStatus
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+BINARY_SNAPSHOT_FORMAT = 1
+_MAGIC = b"STORESNP"
+# magic, format, payload length, number of buffers
+_HEADER = struct.Struct("<8sIQI")
+_ALIGNMENT = 64  # buffers start on cache-line boundaries
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_DATE = -2 ** 63
+_STATUSES = tuple(OrderStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+# Store attributes pickled as they are; they reference entities, not copies
+_INDEXES = ('_search_index', '_price_index', '_autocomplete', '_order_index', '_order_timeline',
+            '_rollups', '_counters', '_product_refs')
+
+# A list, or (typecode, buffer) for a column written out of band
+Column = Union[list, Tuple[str, object]]
+
+
+def _column(values: list, typecode: str) -> Column:
+    """
+    Pack a column into an array written out of band, if every value fits the array type
+
+    Args:
+        values: One value per row
+        typecode: "d" for float columns, "q" for int columns
+
+    Returns:
+        Column: (typecode, PickleBuffer), or the list itself for mixed or oversized values
+    """
+    kind = float if typecode == "d" else int
+    if any(type(value) is not kind for value in values):
+        return values
+    try:
+        return typecode, pickle.PickleBuffer(array(typecode, values))
+    except OverflowError:
+        return values
+
+
+def _date_column(values: Sequence[Optional[datetime]]) -> Column:
+    """Pack datetimes (or None) as int64 microseconds since the epoch"""
+    return _column([_NO_DATE if value is None else (value - _EPOCH) // _MICROSECOND for value in values], "q")
+
+
+def _to_date(value: int) -> Optional[datetime]:
+    """Unpack a date packed by _date_column"""
+    return None if value == _NO_DATE else _EPOCH + timedelta(microseconds=value)
+
+
+def _fill(entity, fields: Dict[str, object]) -> None:
+    """Set the fields that were not assigned since the stub was loaded"""
+    for name, value in fields.items():
+        try:
+            object.__getattribute__(entity, name)
+        except AttributeError:
+            object.__setattr__(entity, name, value)
+
+
+def _load_slot(entity, name: str):
+    """Hydrate an entity on the first read of an unset slot, then read it"""
+    table = entity._table
+    if table is not None:
+        table.hydrate(entity)
+    return object.__getattribute__(entity, name)
+
+
+class _Table(ABC):
+    """
+    Columns of one entity type, copied into each stub on first access
+
+    Hydration holds the table lock but never an entity lock, so it cannot
+    deadlock with callers that hold striped locks while reading a stub.
+    """
+
+    def __init__(self, columns: Dict[str, Column]):
+        """
+        Initialize the table
+
+        Args:
+            columns: {field: column}, all columns with one value per row
+        """
+        self.columns = columns
+        self.store: Optional[Store] = None  # set after loading
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> Dict:
+        return {'columns': self.columns}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.columns = {name: memoryview(column[1]).cast("B").cast(column[0]) if isinstance(column, tuple) else column
+                        for name, column in state['columns'].items()}
+        self.store = None
+        self._lock = threading.RLock()
+
+    def hydrate(self, entity) -> None:
+        """
+        Copy an entity's row into its slots, once
+
+        Args:
+            entity: Stub created from this table
+        """
+        with self._lock:
+            if entity._table is None:
+                return
+            self._hydrate(entity, entity._row)
+            entity._table = None
+
+    @abstractmethod
+    def _hydrate(self, entity, row: int) -> None:
+        """Set the entity's fields and subscribe the store; the caller holds the table lock"""
+
+
+class _ProductTable(_Table):
+    """Product columns: product_id, name, price, description, stock"""
+
+    def _hydrate(self, product: Product, row: int) -> None:
+        store = self.store
+        columns = self.columns
+        product_id = columns['product_id'][row]
+        _fill(product, {
+            'product_id': product_id,
+            'name': columns['name'][row],
+            'price': columns['price'][row],
+            'description': columns['description'][row],
+            'stock': columns['stock'][row],
+            '_cents': store.money == "cents",
+            '_lock': store._product_locks.lock_for(product_id) if store.thread_safe else NO_LOCK
+        })
+        product._init_listeners()
+        product.add_listener(store._on_product_event)
+
+
+class _UserTable(_Table):
+    """User columns: user_id, name, email, address, is_active, and the lines of non-empty carts"""
+
+    def __init__(self, columns: Dict[str, Column], carts: Dict[int, Tuple[Tuple[str, int], ...]]):
+        """
+        Initialize the table
+
+        Args:
+            columns: {field: column}
+            carts: {row: ((product_id, quantity), ...)} of users with a non-empty cart
+        """
+        super().__init__(columns)
+        self.carts = carts
+
+    def __getstate__(self) -> Dict:
+        return {'columns': self.columns, 'carts': self.carts}
+
+    def __setstate__(self, state: Dict) -> None:
+        super().__setstate__(state)
+        self.carts = state['carts']
+
+    def _hydrate(self, user: User, row: int) -> None:
+        store = self.store
+        columns = self.columns
+        user_id = columns['user_id'][row]
+        lock = store._user_locks.lock_for(user_id) if store.thread_safe else NO_LOCK
+        cart = None
+        lines = self.carts.pop(row, None)
+        if lines:
+            # Filled before it is shared, so no cart lock is needed yet
+            cart = Cart(user_id)
+            cart._restore((store.products[product_id], quantity) for product_id, quantity in lines
+                          if product_id in store.products)
+            cart._lock = lock
+            cart.add_listener(store._on_cart_event)
+        _fill(user, {
+            'user_id': user_id,
+            'name': columns['name'][row],
+            'email': columns['email'][row],
+            'address': columns['address'][row],
+            'is_active': columns['is_active'][row],
+            '_cart': cart,
+            '_lock': lock
+        })
+        user._init_listeners()
+        user.add_listener(store._on_user_event)
+
+
+class _OrderTable(_Table):
+    """Order columns: order_id, user_id, line products and quantities, address, total, status and dates"""
+
+    def _hydrate(self, order: Order, row: int) -> None:
+        store = self.store
+        columns = self.columns
+        order_id = columns['order_id'][row]
+        _fill(order, {
+            'order_id': order_id,
+            'user_id': columns['user_id'][row],
+            'items': LineItems(columns['line_products'][row], columns['line_quantities'][row]),
+            'shipping_address': columns['shipping_address'][row],
+            'total_amount': columns['total_amount'][row],
+            'status': _STATUSES[columns['status'][row]],
+            'order_date': _to_date(columns['order_date'][row]),
+            'delivery_date': _to_date(columns['delivery_date'][row]),
+            '_summaries': None,
+            '_cents': store.money == "cents",
+            '_lock': store._order_locks.lock_for(order_id) if store.thread_safe else NO_LOCK
+        })
+        order._init_listeners()
+        order.add_listener(store._on_order_event)
+
+
+class _SnapshotProduct(Product):
+    """Product loaded from a binary snapshot, hydrated on first access"""
+
+    __slots__ = ('_row', '_table')
+
+    def __setstate__(self, state: Tuple[int, _Table]) -> None:
+        self._row, self._table = state
+
+    def __getattr__(self, name: str):
+        return _load_slot(self, name)
+
+
+class _SnapshotUser(User):
+    """User loaded from a binary snapshot, hydrated on first access"""
+
+    __slots__ = ('_row', '_table')
+
+    def __setstate__(self, state: Tuple[int, _Table]) -> None:
+        self._row, self._table = state
+
+    def __getattr__(self, name: str):
+        return _load_slot(self, name)
+
+
+class _SnapshotOrder(Order):
+    """Order loaded from a binary snapshot, hydrated on first access"""
+
+    __slots__ = ('_row', '_table')
+
+    def __setstate__(self, state: Tuple[int, _Table]) -> None:
+        self._row, self._table = state
+
+    def __getattr__(self, name: str):
+        return _load_slot(self, name)
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickles every entity of the store as a stub pointing at its table row"""
+
+    def __init__(self, file, rows: Dict[int, Tuple[type, _Table, int]], **kwargs):
+        """
+        Initialize the pickler
+
+        Args:
+            file: Binary file to write to
+            rows: {id(entity): (stub class, table, row)}
+            **kwargs: Passed to pickle.Pickler
+        """
+        super().__init__(file, protocol=5, **kwargs)
+        self.rows = rows
+
+    def reducer_override(self, obj):
+        entry = self.rows.get(id(obj))
+        if entry is None:
+            return NotImplemented
+        stub_class, table, row = entry
+        return object.__new__, (stub_class,), (row, table)
+
+
+def _product_table(products: List[Product]) -> _ProductTable:
+    """Build the product columns"""
+    prices = [product.price for product in products]
+    return _ProductTable({
+        'product_id': [product.product_id for product in products],
+        'name': [product.name for product in products],
+        'price': _column(prices, "d" if not prices or type(prices[0]) is float else "q"),
+        'description': [product.description for product in products],
+        'stock': _column([product.stock for product in products], "q")
+    })
+
+
+def _user_table(users: List[User], store: Store) -> _UserTable:
+    """Build the user columns, including carts evicted by the cart manager"""
+    carts = {}
+    manager = store.cart_manager
+    for row, user in enumerate(users):
+        with user._lock:
+            if user._cart is not None:
+                items = user._cart.items
+            else:
+                items = manager.spilled_items(user.user_id) if manager is not None else None
+            if items:
+                carts[row] = tuple(items.items())
+    return _UserTable({
+        'user_id': [user.user_id for user in users],
+        'name': [user.name for user in users],
+        'email': [user.email for user in users],
+        'address': [user.address for user in users],
+        'is_active': [user.is_active for user in users]
+    }, carts)
+
+
+def _order_table(orders: List[Order]) -> _OrderTable:
+    """Build the order columns"""
+    totals = [order.total_amount for order in orders]
+    return _OrderTable({
+        'order_id': [order.order_id for order in orders],
+        'user_id': [order.user_id for order in orders],
+        'line_products': [order.items._products for order in orders],
+        'line_quantities': [order.items._quantities for order in orders],
+        'shipping_address': [order.shipping_address for order in orders],
+        'total_amount': _column(totals, "d" if not totals or type(totals[0]) is float else "q"),
+        'status': ("b", pickle.PickleBuffer(array("b", [_STATUS_CODES[order.status] for order in orders]))),
+        'order_date': _date_column([order.order_date for order in orders]),
+        'delivery_date': _date_column([order.delivery_date for order in orders])
+    })
+
+
+def write_binary_snapshot(store: Store, path: str, seq: int = 0) -> None:
+    """
+    Atomically write a binary snapshot of the full store state
+
+    Indexes are saved as they are rather than rebuilt on load, so take the
+    snapshot while no other thread is changing the store, e.g. when
+    preparing the image that new workers start from. A custom autocomplete
+    score is not saved; pass it again to load_binary_snapshot().
+
+    Args:
+        store: Store with the "dict" catalog
+        path: Snapshot file path
+        seq: Sequence number of the last log record contained in the snapshot
+
+    Raises:
+        ValueError: For other catalog modes
+    """
+    if type(store.products) is not dict:
+        raise ValueError("Binary snapshots support the dict catalog only")
+    temp_path = path + ".tmp"
+    try:
+        with store._index_lock, open(temp_path, "wb") as handle:
+            _write_state(store, handle, seq)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+def _write_state(store: Store, handle, seq: int) -> None:
+    """Pickle the store into an open snapshot file; the caller holds the index lock"""
+    buffers: List[pickle.PickleBuffer] = []
+    products = list(store.products.values())
+    users = list(store.users.values())
+    orders = list(store.orders.values())
+    tables = (_product_table(products), _user_table(users, store), _order_table(orders))
+    rows = {}
+    for stub_class, table, entities in zip((_SnapshotProduct, _SnapshotUser, _SnapshotOrder), tables,
+                                           (products, users, orders)):
+        for row, entity in enumerate(entities):
+            rows[id(entity)] = (stub_class, table, row)
+    state = {
+        'seq': seq,
+        'store_name': store.store_name,
+        'money': store.money,
+        'order_ids': (store._order_ids.prefix, store._order_ids._next),
+        'tables': tables,
+        'products': store.products,
+        'users': store.users,
+        'orders': store.orders,
+        'indexes': {name: getattr(store, name) for name in _INDEXES}
+    }
+    payload = io.BytesIO()
+    _SnapshotPickler(payload, rows, buffer_callback=buffers.append).dump(state)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    handle.write(_HEADER.pack(_MAGIC, BINARY_SNAPSHOT_FORMAT, payload.tell(), len(raw_buffers)))
+    handle.write(struct.pack(f"<{len(raw_buffers)}Q", *(buffer.nbytes for buffer in raw_buffers)))
+    handle.write(payload.getbuffer())
+    for buffer in raw_buffers:
+        handle.write(bytes(-handle.tell() % _ALIGNMENT))
+        handle.write(buffer)
+    handle.flush()
+    os.fsync(handle.fileno())
+
+
+def load_binary_snapshot(path: str, thread_safe: bool = False,
+                         autocomplete_score: Optional[Score] = None) -> Tuple[Store, int]:
+    """
+    Build a store from a binary snapshot without rebuilding its indexes
+
+    The file stays memory-mapped while the store uses it; entities are
+    hydrated from it on first access.
+
+    Args:
+        path: Snapshot file path
+        thread_safe: Passed to the Store constructor
+        autocomplete_score: The score given to set_autocomplete_score() before
+                            the snapshot was written; if the store had one and
+                            it is not given, autocomplete is rebuilt with the
+                            default score, hydrating every product
+
+    Raises:
+        ValueError: If the file is not a binary snapshot of a supported format
+
+    Returns:
+        (store, sequence number of the snapshot)
+    """
+    with open(path, "rb") as handle:
+        data = memoryview(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+    magic, file_format, payload_size, buffer_count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or file_format != BINARY_SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported binary snapshot: {path}")
+    offset = _HEADER.size
+    sizes = struct.unpack_from(f"<{buffer_count}Q", data, offset)
+    offset += 8 * buffer_count
+    payload = data[offset:offset + payload_size]
+    offset += payload_size
+    buffers = []
+    for size in sizes:
+        offset += -offset % _ALIGNMENT
+        buffers.append(data[offset:offset + size])
+        offset += size
+    # Every object unpickled stays alive, so collections during the load would only rescan them
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        state = pickle.loads(payload, buffers=buffers)
+    finally:
+        if collecting:
+            gc.enable()
+
+    store = Store(state['store_name'], thread_safe=thread_safe, money=state['money'])
+    store.products = state['products']
+    store.users = state['users']
+    store.orders = state['orders']
+    for name, index in state['indexes'].items():
+        setattr(store, name, index)
+    prefix, next_number = state['order_ids']
+    store._order_ids = OrderIdAllocator(next_number, prefix)
+    for table in state['tables']:
+        table.store = store
+    autocomplete = store._autocomplete
+    if autocomplete.score is None:
+        if autocomplete_score is None:
+            autocomplete.rebuild(store.products.values(), stock_score)
+        else:
+            autocomplete.score = autocomplete_score
+    return store, state['seq']
@@ -2,13 +2,24 @@
 Shopping Cart class for managing user's cart items
 """
 
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Iterable, Optional, Tuple
+from src.line_items import LineItems, ProductRefs
+from src.locking import NO_LOCK
+from src.money import format_amount
+from src.observable import Observable
 from src.product import Product
 
+# Shared by empty carts until their first line, so an empty cart allocates one dict
+_NO_LINES = MappingProxyType({})
 
-class Cart:
+
+class Cart(Observable):
     """Represents a shopping cart for a user"""
     
+    __slots__ = ('user_id', 'items', 'products', '_unit_prices', '_total', '_count', '_pricing', '_lock',
+                 '_on_access')
+    
     def __init__(self, user_id: str):
         """
         Initialize a shopping cart
@@ -18,7 +29,15 @@ class Cart:
         """
         self.user_id = user_id
         self.items: Dict[str, int] = {}  # {product_id: quantity}
-        self.products: Dict[str, Product] = {}  # {product_id: Product}
+        self.products: Dict[str, Product] = _NO_LINES  # {product_id: Product}
+        # Running totals, kept current by _apply_line and product price events
+        self._unit_prices: Dict[str, float] = _NO_LINES  # {product_id: price included in _total}
+        self._total = 0  # stays an int while prices are in minor units
+        self._count = 0
+        self._pricing = None  # (engine, rules version, CartPricing) memoized by PromotionEngine
+        self._lock = NO_LOCK
+        self._on_access = None  # called with user_id by User.cart, set by a CartManager
+        self._init_listeners()
     
     def add_item(self, product: Product, quantity: int = 1) -> bool:
         """
@@ -34,19 +53,17 @@ class Cart:
         if quantity <= 0:
             return False
         
-        if not product.is_available():
-            return False
-        
-        if product.stock < quantity:
-            return False
-        
-        if product.product_id in self.items:
-            self.items[product.product_id] += quantity
-        else:
-            self.items[product.product_id] = quantity
-            self.products[product.product_id] = product
-        
-        return True
+        with self._lock:
+            if not product.is_available():
+                return False
+            
+            if product.stock < quantity:
+                return False
+            
+            old_quantity = self.items.get(product.product_id, 0)
+            self._apply_line(product, old_quantity + quantity)
+            self._notify("item", (product.product_id, old_quantity))
+            return True
     
     def remove_item(self, product_id: str, quantity: int = None) -> bool:
         """
@@ -59,19 +76,15 @@ class Cart:
         Returns:
             bool: True if item removed successfully
         """
-        if product_id not in self.items:
-            return False
-        
-        if quantity is None:
-            del self.items[product_id]
-            del self.products[product_id]
-        else:
-            self.items[product_id] -= quantity
-            if self.items[product_id] <= 0:
-                del self.items[product_id]
-                del self.products[product_id]
-        
-        return True
+        with self._lock:
+            if product_id not in self.items:
+                return False
+            
+            old_quantity = self.items[product_id]
+            new_quantity = 0 if quantity is None else old_quantity - quantity
+            self._apply_line(self.products[product_id], new_quantity)
+            self._notify("item", (product_id, old_quantity))
+            return True
     
     def update_quantity(self, product_id: str, quantity: int) -> bool:
         """
@@ -84,31 +97,117 @@ class Cart:
         Returns:
             bool: True if quantity updated successfully
         """
-        if product_id not in self.items:
-            return False
+        with self._lock:
+            if product_id not in self.items:
+                return False
+            
+            if quantity <= 0:
+                return self.remove_item(product_id)
+            
+            product = self.products[product_id]
+            if product.stock < quantity:
+                return False
+            
+            old_quantity = self.items[product_id]
+            self._apply_line(product, quantity)
+            self._notify("item", (product_id, old_quantity))
+            return True
+    
+    def _set_quantity(self, product: Product, quantity: int) -> None:
+        """
+        Set the quantity of a line without stock checks, e.g. when restoring a saved cart
         
-        if quantity <= 0:
-            return self.remove_item(product_id)
+        Args:
+            product: Product of the line
+            quantity: New quantity (0 removes the line)
+        """
+        with self._lock:
+            old_quantity = self.items.get(product.product_id, 0)
+            if quantity <= 0 and not old_quantity:
+                return
+            self._apply_line(product, quantity)
+            self._notify("item", (product.product_id, old_quantity))
+    
+    def _restore(self, lines: Iterable[Tuple[Product, int]]) -> None:
+        """
+        Refill an evicted cart without notifying, since its contents did not change
         
-        product = self.products[product_id]
-        if product.stock < quantity:
-            return False
+        Args:
+            lines: (product, quantity) of every line
+        """
+        with self._lock:
+            for product, quantity in lines:
+                self._apply_line(product, quantity)
+    
+    def _apply_line(self, product: Product, quantity: int) -> None:
+        """
+        Set a line's quantity and adjust the running totals in O(1)
+        
+        Lines subscribe to their product so price changes reach the total.
+        The caller must hold the cart lock.
+        
+        Args:
+            product: Product of the line
+            quantity: New quantity (0 or less removes the line)
+        """
+        product_id = product.product_id
+        old_quantity = self.items.get(product_id, 0)
+        self._pricing = None
+        if old_quantity:
+            self._total -= self._unit_prices[product_id] * old_quantity
+            self._count -= old_quantity
         
-        self.items[product_id] = quantity
-        return True
+        if quantity > 0:
+            if not old_quantity:
+                if self.products is _NO_LINES:
+                    self.products = {}
+                    self._unit_prices = {}
+                self.products[product_id] = product
+                product.add_price_listener(self._on_product_event)
+            price = product.price
+            self.items[product_id] = quantity
+            self._unit_prices[product_id] = price
+            self._total += price * quantity
+            self._count += quantity
+        elif old_quantity:
+            del self.items[product_id]
+            del self._unit_prices[product_id]
+            del self.products[product_id]
+            product.remove_price_listener(self._on_product_event)
+        
+        if not self.items:
+            self._total = 0  # drop accumulated rounding error
+    
+    def _on_product_event(self, product: Product, event: str, old_value) -> None:
+        """
+        Re-price a line when its product's price changes
+        
+        Args:
+            product: Product that changed
+            event: Name of the change
+            old_value: Value before the change
+        """
+        if event != "price":
+            return
+        with self._lock:
+            product_id = product.product_id
+            if self.products.get(product_id) is not product:
+                return
+            # Compare against the price already in the total rather than
+            # old_value, so late or repeated notifications stay correct
+            price = product.price
+            self._total += (price - self._unit_prices[product_id]) * self.items[product_id]
+            self._unit_prices[product_id] = price
+            self._pricing = None
     
     def get_total(self) -> float:
         """
-        Calculate the total price of all items in the cart
+        Get the total price of all items in the cart (maintained incrementally)
         
         Returns:
             float: Total price
         """
-        total = 0.0
-        for product_id, quantity in self.items.items():
-            product = self.products[product_id]
-            total += product.price * quantity
-        return total
+        return self._total
     
     def get_item_count(self) -> int:
         """
@@ -117,12 +216,30 @@ class Cart:
         Returns:
             int: Total item count
         """
-        return sum(self.items.values())
+        return self._count
     
     def clear(self) -> None:
         """Clear all items from the cart"""
-        self.items.clear()
-        self.products.clear()
+        with self._lock:
+            if not self.items:
+                return
+            old_items = dict(self.items)
+            for product in self.products.values():
+                product.remove_price_listener(self._on_product_event)
+            self.items.clear()
+            self.products = _NO_LINES
+            self._unit_prices = _NO_LINES
+            self._total = 0
+            self._count = 0
+            self._pricing = None
+            self._notify("clear", old_items)
+    
+    def _detach(self) -> None:
+        """Stop following product prices without changing or notifying the cart"""
+        with self._lock:
+            self._on_access = None
+            for product in self.products.values():
+                product.remove_price_listener(self._on_product_event)
     
     def get_cart_items(self) -> Dict[str, Dict]:
         """
@@ -131,18 +248,37 @@ class Cart:
         Returns:
             Dict: Cart items with product details and quantities
         """
-        cart_details = {}
-        for product_id, quantity in self.items.items():
-            product = self.products[product_id]
-            cart_details[product_id] = {
-                'name': product.name,
-                'price': product.price,
-                'quantity': quantity,
-                'subtotal': product.price * quantity
-            }
-        return cart_details
+        with self._lock:
+            cart_details = {}
+            for product_id, quantity in self.items.items():
+                product = self.products[product_id]
+                cart_details[product_id] = {
+                    'name': product.name,
+                    'price': product.price,
+                    'quantity': quantity,
+                    'subtotal': product.price * quantity
+                }
+            return cart_details
+    
+    def get_line_items(self, refs: Optional[ProductRefs] = None) -> LineItems:
+        """
+        Get a compact copy of the cart's lines for an order
+        
+        Args:
+            refs: Intern table for the product references (defaults to the module table)
+            
+        Returns:
+            LineItems: Lines priced at the current product prices
+        """
+        with self._lock:
+            products = self.products
+            return LineItems.from_lines(
+                ((product_id, products[product_id].name, products[product_id].price, quantity)
+                 for product_id, quantity in self.items.items()), refs)
     
     def __str__(self) -> str:
         """String representation of the cart"""
-        return f"Cart(user_id={self.user_id}, items={self.get_item_count()}, total=${self.get_total():.2f})"
+        # A cart holds products of one store, so any of them tells its money mode
+        cents = any(product._cents for product in self.products.values())
+        return f"Cart(user_id={self.user_id}, items={self.get_item_count()}, total=${format_amount(self.get_total(), cents)})"
 
@@ -0,0 +1,195 @@
+"""
+Idle cart eviction with TTL and LRU budget, spilling contents for later rehydration
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Mapping, MutableMapping, Optional
+from src.locking import NO_LOCK
+from src.product import Product
+from src.user import User
+
+
+class CartManager:
+    """
+    Tracks when each resident cart was last touched and evicts idle ones
+
+    Evicting a cart keeps its quantities in the spill mapping (an in-memory
+    dict unless another mapping such as a shelve is given) and drops the
+    Cart object, releasing its product references. The next access to
+    User.cart creates a new cart, which is refilled from the spill; products
+    removed from the catalog meanwhile are left out.
+
+    Eviction only happens in sweep(), never while a store operation is
+    running, so carts held by an operation are never detached under it.
+    Code should not keep Cart references across idle periods.
+    """
+
+    def __init__(self, users: Mapping[str, User], products: Mapping[str, Product],
+                 ttl: Optional[float] = None, max_carts: Optional[int] = None,
+                 spill: Optional[MutableMapping[str, Dict[str, int]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the manager and track the carts that already exist
+
+        Args:
+            users: Store users by ID
+            products: Store catalog by product ID
+            ttl: Seconds after which an untouched cart is evicted (no limit if None)
+            max_carts: Most resident carts kept after a sweep, least recently
+                       touched evicted first (no limit if None)
+            spill: Where evicted cart quantities are kept ({user_id: {product_id: quantity}})
+            clock: Time source
+        """
+        if max_carts is not None and max_carts < 1:
+            raise ValueError("max_carts must be at least 1")
+        self.users = users
+        self.products = products
+        self.ttl = ttl
+        self.max_carts = max_carts
+        self.spill = {} if spill is None else spill
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._touched: "OrderedDict[str, float]" = OrderedDict()  # {user_id: last touch}, oldest first
+        self._counters = {'hits': 0, 'misses': 0, 'created': 0, 'evicted_idle': 0, 'evicted_lru': 0}
+        now = clock()
+        for user in list(users.values()):
+            cart = user._cart
+            if cart is not None:
+                self._touched[user.user_id] = now
+                cart._on_access = self.cart_accessed
+
+    def cart_created(self, user: User) -> None:
+        """
+        Refill a newly created cart from the spill and start tracking it
+
+        Called by the store while it holds the user's lock.
+
+        Args:
+            user: User whose cart was just created
+        """
+        user_id = user.user_id
+        with self._lock:
+            spilled = self.spill.pop(user_id, None)
+            self._counters['misses' if spilled else 'created'] += 1
+            self._touched[user_id] = self._clock()
+        user._cart._on_access = self.cart_accessed
+        if spilled:
+            products = self.products
+            user._cart._restore((products[product_id], quantity)
+                                for product_id, quantity in spilled.items() if product_id in products)
+
+    def cart_accessed(self, user_id: str) -> None:
+        """
+        Record a hit on a resident cart, called by User.cart
+
+        Args:
+            user_id: Owner of the cart that was accessed
+        """
+        with self._lock:
+            touched = self._touched
+            if user_id in touched:
+                touched[user_id] = self._clock()
+                touched.move_to_end(user_id)
+                self._counters['hits'] += 1
+
+    def cart_touched(self, user_id: str) -> None:
+        """
+        Record activity on a resident cart, including changes made through a
+        Cart reference held across accesses
+
+        Args:
+            user_id: Owner of the cart that changed
+        """
+        with self._lock:
+            touched = self._touched
+            if user_id in touched:
+                touched[user_id] = self._clock()
+                touched.move_to_end(user_id)
+
+    def spilled_items(self, user_id: str) -> Optional[Dict[str, int]]:
+        """
+        Get the quantities of an evicted cart
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            Dict of {product_id: quantity}, or None if the cart is not spilled
+        """
+        with self._lock:
+            return self.spill.get(user_id)
+
+    def sweep(self) -> int:
+        """
+        Evict carts idle for longer than the TTL, then the least recently
+        touched ones until at most max_carts remain
+
+        In a thread-safe store carts whose lock is busy are skipped.
+
+        Returns:
+            int: Number of carts evicted
+        """
+        with self._lock:
+            now = self._clock()
+            cutoff = None if self.ttl is None else now - self.ttl
+            excess = 0 if self.max_carts is None else len(self._touched) - self.max_carts
+            candidates: List[str] = []
+            for user_id, last_touch in self._touched.items():
+                expired = cutoff is not None and last_touch <= cutoff
+                if not expired and len(candidates) >= excess:
+                    break
+                candidates.append(user_id)
+
+            evicted = 0
+            for user_id in candidates:
+                expired = cutoff is not None and self._touched[user_id] <= cutoff
+                if not expired and evicted >= excess:
+                    break
+                if self._evict(user_id):
+                    evicted += 1
+                    self._counters['evicted_idle' if expired else 'evicted_lru'] += 1
+            return evicted
+
+    def _evict(self, user_id: str) -> bool:
+        """Spill and drop one cart unless its user is locked elsewhere"""
+        user = self.users.get(user_id)
+        if user is None or user._cart is None:
+            del self._touched[user_id]
+            return False
+        lock = user._lock
+        if lock is not NO_LOCK and not lock.acquire(blocking=False):
+            return False
+        try:
+            cart = user._cart
+            if cart.items:
+                self.spill[user_id] = dict(cart.items)
+            cart._detach()
+            user._cart = None
+            del self._touched[user_id]
+        finally:
+            if lock is not NO_LOCK:
+                lock.release()
+        return True
+
+    def stats(self) -> Dict:
+        """
+        Get cart residency and eviction counters
+
+        Hits count accesses to resident carts through User.cart and misses
+        count carts refilled from the spill on access.
+
+        Returns:
+            Dict: {'resident', 'spilled', 'hits', 'misses', 'hit_rate',
+                   'created', 'evicted_idle', 'evicted_lru'}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            lookups = counters['hits'] + counters['misses']
+            return {
+                'resident': len(self._touched),
+                'spilled': len(self.spill),
+                **counters,
+                'hit_rate': counters['hits'] / lookups if lookups else None
+            }
@@ -0,0 +1,298 @@
+"""
+Columnar product catalog backed by NumPy arrays for vectorized bulk updates
+"""
+
+from typing import Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence
+from src.locking import NO_LOCK
+from src.observable import Observable
+from src.product import Product
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional
+    np = None
+
+
+class ProductView(Product):
+    """Product whose price and stock live in a row of a ColumnarCatalog"""
+
+    __slots__ = ('_catalog', '_row')
+
+    def __init__(self, catalog, row: int, product_id: str, name: str, description: str = ""):
+        """
+        Initialize a view on a catalog row
+
+        Args:
+            catalog: Object holding the _prices and _stock columns
+            row: Row of this product in the columns
+            product_id: Unique identifier for the product
+            name: Product name
+            description: Product description
+        """
+        self._catalog = catalog
+        self._row = row
+        self.product_id = product_id
+        self.name = name
+        self.description = description
+        self._cents = False
+        self._lock = NO_LOCK
+        self._init_listeners()
+
+    @property
+    def price(self) -> float:
+        """Product price"""
+        return float(self._catalog._prices[self._row])
+
+    @price.setter
+    def price(self, value: float) -> None:
+        self._catalog._prices[self._row] = value
+
+    @property
+    def stock(self) -> int:
+        """Available stock quantity"""
+        return int(self._catalog._stock[self._row])
+
+    @stock.setter
+    def stock(self, value: int) -> None:
+        self._catalog._stock[self._row] = value
+
+
+class _DetachedRow:
+    """Single-row column storage for views removed from their catalog"""
+
+    __slots__ = ('_prices', '_stock')
+
+    def __init__(self, price: float, stock: int):
+        self._prices = np.array([price], dtype=np.float64)
+        self._stock = np.array([stock], dtype=np.int64)
+
+
+class ColumnarCatalog(MutableMapping, Observable):
+    """
+    Mapping of product_id -> Product that stores prices and stock in NumPy columns
+
+    Products added to the catalog are copied into the columns and replaced by
+    ProductView objects, so callers should fetch the stored product back from
+    the catalog (e.g. Store.get_product) instead of keeping the original.
+    Removing a product moves the last row into its slot, so iteration order is
+    not guaranteed to follow insertion order. Bulk operations do not take the
+    per-product locks of a thread-safe store.
+
+    Listeners added to the catalog receive one event per bulk operation,
+    listener(catalog, "price" or "stock", [(view, old_value), ...]), before
+    the per-product events, so indexes can be updated once per operation.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize an empty catalog
+
+        Args:
+            capacity: Initial number of rows to allocate
+        """
+        if np is None:
+            raise ImportError("numpy is required for the columnar catalog")
+        capacity = max(capacity, 1)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._stock = np.zeros(capacity, dtype=np.int64)
+        self._views: List[ProductView] = []
+        self._rows: Dict[str, int] = {}  # {product_id: row}
+        self._init_listeners()
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([view.product_id for view in self._views])
+
+    def __contains__(self, product_id) -> bool:
+        return product_id in self._rows
+
+    def __getitem__(self, product_id: str) -> ProductView:
+        return self._views[self._rows[product_id]]
+
+    def __setitem__(self, product_id: str, product: Product) -> None:
+        if product_id in self._rows:
+            del self[product_id]
+        row = len(self._views)
+        if row == len(self._prices):
+            self._grow()
+        self._prices[row] = product.price
+        self._stock[row] = product.stock
+        self._views.append(ProductView(self, row, product_id, product.name, product.description))
+        self._rows[product_id] = row
+
+    def __delitem__(self, product_id: str) -> None:
+        row = self._rows.pop(product_id)
+        view = self._views[row]
+        view._catalog = _DetachedRow(view.price, view.stock)
+        view._row = 0
+
+        last = len(self._views) - 1
+        moved = self._views.pop()
+        if row != last:
+            self._prices[row] = self._prices[last]
+            self._stock[row] = self._stock[last]
+            moved._row = row
+            self._views[row] = moved
+            self._rows[moved.product_id] = row
+
+    def _grow(self) -> None:
+        """Double the capacity of the columns"""
+        self._prices = np.concatenate([self._prices, np.zeros_like(self._prices)])
+        self._stock = np.concatenate([self._stock, np.zeros_like(self._stock)])
+
+    @property
+    def prices(self):
+        """Read-only array of prices for all rows"""
+        prices = self._prices[:len(self._views)]
+        prices.flags.writeable = False
+        return prices
+
+    @property
+    def stock(self):
+        """Read-only array of stock quantities for all rows"""
+        stock = self._stock[:len(self._views)]
+        stock.flags.writeable = False
+        return stock
+
+    def select(self, product_ids: Optional[Iterable[str]] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               in_stock_only: bool = False):
+        """
+        Select rows matching all given filters
+
+        Args:
+            product_ids: Restrict to these products (unknown IDs are ignored)
+            min_price: Minimum price, inclusive
+            max_price: Maximum price, inclusive
+            in_stock_only: Only rows with stock > 0
+
+        Returns:
+            Array of matching row numbers
+        """
+        size = len(self._views)
+        if product_ids is None:
+            mask = np.ones(size, dtype=bool)
+        else:
+            mask = np.zeros(size, dtype=bool)
+            rows = [self._rows[pid] for pid in product_ids if pid in self._rows]
+            mask[rows] = True
+        prices = self._prices[:size]
+        if min_price is not None:
+            mask &= prices >= min_price
+        if max_price is not None:
+            mask &= prices <= max_price
+        if in_stock_only:
+            mask &= self._stock[:size] > 0
+        return np.flatnonzero(mask)
+
+    def get_discount_prices(self, discount_percent: float, rows=None):
+        """
+        Vectorized Product.get_discount_price
+
+        Args:
+            discount_percent: Discount percentage (0-100)
+            rows: Rows to price (None for all)
+
+        Returns:
+            Array of discounted prices
+        """
+        prices = self._prices[:len(self._views)] if rows is None else self._prices[rows]
+        if discount_percent < 0 or discount_percent > 100:
+            return prices.copy()
+        return prices - prices * (discount_percent / 100)
+
+    def apply_discount(self, discount_percent: float, rows=None) -> int:
+        """
+        Permanently discount the price of the selected rows
+
+        Args:
+            discount_percent: Discount percentage (0-100)
+            rows: Rows to discount, e.g. from select() (None for all)
+
+        Returns:
+            int: Number of products repriced
+        """
+        if discount_percent < 0 or discount_percent > 100:
+            return 0
+        rows = np.arange(len(self._views)) if rows is None else np.asarray(rows, dtype=np.intp)
+        return self._set_prices(rows, self.get_discount_prices(discount_percent, rows))
+
+    def bulk_update_prices(self, product_ids: Sequence[str], new_prices: Sequence[float]) -> int:
+        """
+        Set new prices for many products at once
+
+        Args:
+            product_ids: Products to reprice
+            new_prices: New price for each product (negative prices are skipped)
+
+        Returns:
+            int: Number of products repriced
+        """
+        rows = np.fromiter((self._rows[pid] for pid in product_ids), dtype=np.intp,
+                           count=len(product_ids))
+        new_prices = np.asarray(new_prices, dtype=np.float64)
+        valid = new_prices >= 0
+        return self._set_prices(rows[valid], new_prices[valid])
+
+    def bulk_restock(self, product_ids: Sequence[str], quantities: Sequence[int]) -> int:
+        """
+        Add stock to many products at once
+
+        Args:
+            product_ids: Products to restock
+            quantities: Quantity to add (positive) or remove (negative) per product;
+                        changes that would make stock negative are skipped
+
+        Returns:
+            int: Number of products whose stock changed
+        """
+        rows = np.fromiter((self._rows[pid] for pid in product_ids), dtype=np.intp,
+                           count=len(product_ids))
+        quantities = np.asarray(quantities, dtype=np.int64)
+        # Sum repeated IDs so they behave like consecutive update_stock calls
+        rows, inverse = np.unique(rows, return_inverse=True)
+        quantities = np.bincount(inverse, weights=quantities).astype(np.int64)
+
+        old_stock = self._stock[rows]
+        new_stock = old_stock + quantities
+        changed = (new_stock >= 0) & (quantities != 0)
+        rows, old_stock = rows[changed], old_stock[changed]
+        self._stock[rows] = new_stock[changed]
+        self._notify_rows("stock", rows, old_stock.tolist())
+        return len(rows)
+
+    def _set_prices(self, rows, new_prices) -> int:
+        """
+        Write new prices and notify listeners of the products that changed
+
+        Args:
+            rows: Rows to update
+            new_prices: New price per row
+
+        Returns:
+            int: Number of rows whose price changed
+        """
+        old_prices = self._prices[rows]
+        changed = old_prices != new_prices
+        rows, old_prices = rows[changed], old_prices[changed]
+        self._prices[rows] = new_prices[changed]
+        self._notify_rows("price", rows, old_prices.tolist())
+        return len(rows)
+
+    def _notify_rows(self, event: str, rows, old_values: list) -> None:
+        """
+        Send one catalog change notification, then per-product ones, after a bulk update
+
+        Args:
+            event: Name of the changed attribute
+            rows: Rows that changed
+            old_values: Value of each row before the change
+        """
+        views = self._views
+        changes = [(views[row], old_value) for row, old_value in zip(rows.tolist(), old_values)]
+        if changes:
+            self._notify(event, changes)
+        for view, old_value in changes:
+            view._notify(event, old_value)
@@ -0,0 +1,108 @@
+"""
+Streaming export of orders to CSV or JSONL files
+"""
+
+import csv
+import gzip
+import io
+import json
+from typing import IO, Callable, Iterable, Iterator, List, Union
+from src.order import Order
+
+# Columns of a CSV export; items holds the order lines as a JSON object
+CSV_FIELDS = ('order_id', 'user_id', 'status', 'total_amount', 'order_date',
+              'delivery_date', 'shipping_address', 'items')
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def to_jsonl(order: Order) -> str:
+    """
+    Serialize an order summary as one JSON line
+
+    Args:
+        order: Order to serialize
+
+    Returns:
+        str: get_order_summary() as JSON, ending in a newline
+    """
+    return _encode(order.get_order_summary()) + "\n"
+
+
+class _CsvRows:
+    """Formats CSV rows into strings through one reused buffer"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def format(self, row: Iterable) -> str:
+        """Format one row, ending in a newline"""
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        self._writer.writerow(row)
+        return buffer.getvalue()
+
+    def __call__(self, order: Order) -> str:
+        """Serialize an order summary as one CSV row"""
+        summary = order.get_order_summary()
+        summary['items'] = _encode(summary['items'])
+        return self.format(summary[field] for field in CSV_FIELDS)
+
+
+def iter_export(orders: Iterable[Order], file_format: str = "jsonl",
+                chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Serialize orders lazily, joined into chunks of text
+
+    Delivered and cancelled orders reuse their cached serialized summary,
+    so repeated exports of the order history mostly skip formatting.
+
+    Args:
+        orders: Orders to export, read one at a time
+        file_format: "jsonl" or "csv" (with a header row)
+        chunk_size: Orders per yielded chunk
+
+    Returns:
+        Iterator of text chunks of up to chunk_size orders
+    """
+    if file_format == "jsonl":
+        return _chunks(orders, file_format, to_jsonl, [], chunk_size)
+    if file_format == "csv":
+        rows = _CsvRows()
+        return _chunks(orders, file_format, rows, [rows.format(CSV_FIELDS)], chunk_size)
+    raise ValueError(f"Unknown file format: {file_format}")
+
+
+def _chunks(orders: Iterable[Order], file_format: str, serialize: Callable[[Order], str],
+            lines: List[str], chunk_size: int) -> Iterator[str]:
+    """Join serialized orders into chunks, starting with the given lines"""
+    for order in orders:
+        lines.append(order.get_serialized_summary(file_format, serialize))
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def write_export(chunks: Iterable[str], destination: Union[str, IO[str]]) -> None:
+    """
+    Write exported chunks to a file
+
+    Args:
+        chunks: Text chunks from iter_export()
+        destination: Path (gzip-compressed if it ends in .gz) or open text file
+    """
+    if not isinstance(destination, str):
+        for chunk in chunks:
+            destination.write(chunk)
+        return
+    if destination.endswith(".gz"):
+        handle = gzip.open(destination, "wt", encoding="utf-8", newline="")
+    else:
+        handle = open(destination, "w", encoding="utf-8", newline="", buffering=1 << 20)
+    with handle:
+        for chunk in chunks:
+            handle.write(chunk)
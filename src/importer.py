@@ -0,0 +1,254 @@
+"""
+Streaming bulk import of products and users from CSV or JSONL files
+"""
+
+import csv
+import gzip
+import io
+import json
+import math
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+# progress(rows_processed, report)
+ProgressCallback = Callable[[int, Dict], None]
+
+
+def detect_format(path: str) -> str:
+    """
+    Guess the file format from its extension
+
+    Args:
+        path: File path, optionally ending in .gz
+
+    Returns:
+        str: "csv" or "jsonl"
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Cannot detect file format of {path}")
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    """Open a plain or gzip-compressed text file for reading"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_records(path: str, file_format: Optional[str] = None) -> Iterator[Tuple[int, object]]:
+    """
+    Stream records from a CSV or JSONL file one at a time
+
+    Args:
+        path: File to read
+        file_format: "csv" or "jsonl" (detected from the extension if omitted)
+
+    Yields:
+        (line number, record) where record is a dict, or an error message
+        string for lines that could not be parsed
+    """
+    file_format = file_format or detect_format(path)
+    with _open_text(path) as handle:
+        if file_format == "csv":
+            reader = csv.DictReader(handle)
+            for record in reader:
+                yield reader.line_num, record
+        elif file_format == "jsonl":
+            for line_number, line in enumerate(handle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as error:
+                    yield line_number, f"invalid JSON: {error}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, "record is not an object"
+                    continue
+                yield line_number, record
+        else:
+            raise ValueError(f"Unknown file format: {file_format}")
+
+
+def parse_product(record: Dict) -> Product:
+    """
+    Build a Product from an import record
+
+    Args:
+        record: Dict with product_id, name, price and optional description, stock
+
+    Returns:
+        Product: Parsed product
+    """
+    product_id = str(record.get("product_id") or "").strip()
+    name = str(record.get("name") or "").strip()
+    if not product_id:
+        raise ValueError("missing product_id")
+    if not name:
+        raise ValueError("missing name")
+    price = float(record.get("price"))
+    stock = int(record.get("stock") or 0)
+    if not math.isfinite(price):
+        raise ValueError("non-finite price")
+    if price < 0:
+        raise ValueError("negative price")
+    if stock < 0:
+        raise ValueError("negative stock")
+    return Product(product_id, name, price, str(record.get("description") or ""), stock)
+
+
+def parse_user(record: Dict) -> User:
+    """
+    Build a User from an import record
+
+    Args:
+        record: Dict with user_id, name, email and optional address
+
+    Returns:
+        User: Parsed user
+    """
+    user_id = str(record.get("user_id") or "").strip()
+    email = str(record.get("email") or "").strip()
+    if not user_id:
+        raise ValueError("missing user_id")
+    if "@" not in email:
+        raise ValueError("invalid email")
+    return User(user_id, str(record.get("name") or ""), email, str(record.get("address") or ""))
+
+
+def _load(path: str, file_format: Optional[str], parse: Callable, insert: Callable,
+          id_of: Callable, chunk_size: int, progress: Optional[ProgressCallback],
+          max_errors: int) -> Dict:
+    """
+    Stream records into the store in chunks
+
+    Args:
+        path: File to read
+        file_format: "csv" or "jsonl" (detected if omitted)
+        parse: Builds an entity from a record, raising ValueError/TypeError if invalid
+        insert: Inserts a chunk of entities, returning the IDs of duplicates
+        id_of: Returns the ID of an entity
+        chunk_size: Entities per insert
+        progress: Called after every chunk
+        max_errors: Maximum number of duplicate/invalid rows kept in the report
+
+    Returns:
+        Dict: Import report
+    """
+    report = {
+        'rows': 0,
+        'loaded': 0,
+        'duplicates': 0,
+        'invalid': 0,
+        'errors': [],  # first max_errors problems as {'line', 'id', 'reason'}
+        'elapsed': 0.0,
+        'rows_per_second': 0.0
+    }
+    started = time.perf_counter()
+
+    def record_error(line_number: int, entity_id: Optional[str], reason: str) -> None:
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'line': line_number, 'id': entity_id, 'reason': reason})
+
+    def flush(chunk: List[Tuple[int, object]]) -> None:
+        duplicates = set(insert([entity for _, entity in chunk]))
+        report['duplicates'] += len(duplicates)
+        report['loaded'] += len(chunk) - len(duplicates)
+        if duplicates:
+            for line_number, entity in chunk:
+                if id_of(entity) in duplicates:
+                    record_error(line_number, id_of(entity), "duplicate id")
+        update_timing()
+        if progress:
+            progress(report['rows'], report)
+
+    def update_timing() -> None:
+        report['elapsed'] = time.perf_counter() - started
+        if report['elapsed'] > 0:
+            report['rows_per_second'] = report['rows'] / report['elapsed']
+
+    chunk: List[Tuple[int, object]] = []
+    seen_in_chunk = set()
+    for line_number, record in iter_records(path, file_format):
+        report['rows'] += 1
+        if isinstance(record, str):
+            report['invalid'] += 1
+            record_error(line_number, None, record)
+            continue
+        try:
+            entity = parse(record)
+        except (ValueError, TypeError) as error:
+            report['invalid'] += 1
+            record_error(line_number, None, str(error))
+            continue
+        # Keep IDs unique within a chunk so duplicates map back to a single row
+        if id_of(entity) in seen_in_chunk:
+            flush(chunk)
+            chunk, seen_in_chunk = [], set()
+        chunk.append((line_number, entity))
+        seen_in_chunk.add(id_of(entity))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk, seen_in_chunk = [], set()
+    if chunk:
+        flush(chunk)
+    update_timing()
+    return report
+
+
+def load_products(store: Store, path: str, file_format: Optional[str] = None,
+                  chunk_size: int = 10_000, progress: Optional[ProgressCallback] = None,
+                  max_errors: int = 1000) -> Dict:
+    """
+    Stream products from a CSV or JSONL file into the store
+
+    Rows need product_id, name and price; description and stock are optional.
+    Duplicate and invalid rows are counted and reported without aborting.
+
+    Args:
+        store: Store to load into
+        path: File to read (.csv, .jsonl or .ndjson, optionally .gz)
+        file_format: "csv" or "jsonl" (detected from the extension if omitted)
+        chunk_size: Products inserted per store call
+        progress: Called as progress(rows_processed, report) after every chunk
+        max_errors: Maximum number of problem rows listed in the report
+
+    Returns:
+        Dict: Report with row, loaded, duplicate and invalid counts, the first
+              errors, elapsed seconds and rows per second
+    """
+    return _load(path, file_format, parse_product, store.add_products,
+                 lambda product: product.product_id, chunk_size, progress, max_errors)
+
+
+def load_users(store: Store, path: str, file_format: Optional[str] = None,
+               chunk_size: int = 10_000, progress: Optional[ProgressCallback] = None,
+               max_errors: int = 1000) -> Dict:
+    """
+    Stream users from a CSV or JSONL file into the store
+
+    Rows need user_id and email; name and address are optional.
+    Duplicate and invalid rows are counted and reported without aborting.
+
+    Args:
+        store: Store to load into
+        path: File to read (.csv, .jsonl or .ndjson, optionally .gz)
+        file_format: "csv" or "jsonl" (detected from the extension if omitted)
+        chunk_size: Users registered per store call
+        progress: Called as progress(rows_processed, report) after every chunk
+        max_errors: Maximum number of problem rows listed in the report
+
+    Returns:
+        Dict: Report with row, loaded, duplicate and invalid counts, the first
+              errors, elapsed seconds and rows per second
+    """
+    return _load(path, file_format, parse_user, store.register_users,
+                 lambda user: user.user_id, chunk_size, progress, max_errors)
@@ -0,0 +1,137 @@
+"""
+Compact line items for orders
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Interned (product_id, name, price) shared by every line that sold a product
+# at that name and price. Each store keeps its own table, which grows with the
+# number of distinct prices sold at and goes away with the store; the module
+# table serves line items built outside a store.
+ProductRef = Tuple[str, str, float]
+ProductRefs = Dict[Tuple[str, str, float, type], ProductRef]
+_PRODUCT_REFS: ProductRefs = {}
+
+
+def intern_product(product_id: str, name: str, price: float, refs: Optional[ProductRefs] = None) -> ProductRef:
+    """
+    Get the shared reference for a product sold at a name and price
+
+    Args:
+        product_id: ID of the product
+        name: Product name at the time of sale
+        price: Unit price at the time of sale
+        refs: Intern table to use (defaults to the module table)
+
+    Returns:
+        ProductRef: Shared (product_id, name, price) tuple
+    """
+    if refs is None:
+        refs = _PRODUCT_REFS
+    key = (product_id, name, price, type(price))  # 100 == 100.0, but cents and floats must not mix
+    ref = refs.get(key)
+    if ref is None:
+        ref = refs.setdefault(key, (sys.intern(product_id), sys.intern(name), price))
+    return ref
+
+
+class LineItems(Mapping):
+    """
+    Read-only order lines stored as two parallel tuples
+
+    Each line is an interned product reference plus a quantity; the subtotal
+    is derived. Lookups and iteration behave like the dict returned by
+    Cart.get_cart_items(), building each line's dict on access, so code that
+    reads order.items keeps working. Use lines() to read without building dicts.
+    """
+
+    __slots__ = ('_products', '_quantities')
+
+    def __init__(self, products: Tuple[ProductRef, ...] = (), quantities: Tuple[int, ...] = ()):
+        """
+        Initialize from parallel tuples
+
+        Args:
+            products: Interned product references, one per line
+            quantities: Quantity of each line
+        """
+        self._products = products
+        self._quantities = quantities
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[Tuple[str, str, float, int]],
+                   refs: Optional[ProductRefs] = None) -> 'LineItems':
+        """
+        Build line items from (product_id, name, price, quantity) tuples
+
+        Args:
+            lines: One tuple per line
+            refs: Intern table for the product references (defaults to the module table)
+
+        Returns:
+            LineItems: New line items
+        """
+        products = []
+        quantities = []
+        for product_id, name, price, quantity in lines:
+            products.append(intern_product(product_id, name, price, refs))
+            quantities.append(quantity)
+        return cls(tuple(products), tuple(quantities))
+
+    @classmethod
+    def from_dict(cls, items: Mapping, refs: Optional[ProductRefs] = None) -> 'LineItems':
+        """
+        Build line items from the shape returned by Cart.get_cart_items()
+
+        Args:
+            items: {product_id: {'name', 'price', 'quantity', 'subtotal'}}
+            refs: Intern table for the product references (defaults to the module table)
+
+        Returns:
+            LineItems: New line items (items itself if it already is one)
+        """
+        if isinstance(items, LineItems):
+            return items
+        return cls.from_lines(((product_id, line['name'], line['price'], line['quantity'])
+                               for product_id, line in items.items()), refs)
+
+    def lines(self) -> Iterator[Tuple[str, str, float, int, float]]:
+        """
+        Iterate the lines without building dicts
+
+        Yields:
+            (product_id, name, price, quantity, subtotal)
+        """
+        for (product_id, name, price), quantity in zip(self._products, self._quantities):
+            yield product_id, name, price, quantity, price * quantity
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """
+        Get the lines in the shape returned by Cart.get_cart_items()
+
+        Returns:
+            Dict: {product_id: {'name', 'price', 'quantity', 'subtotal'}}
+        """
+        return {product_id: {'name': name, 'price': price, 'quantity': quantity, 'subtotal': subtotal}
+                for product_id, name, price, quantity, subtotal in self.lines()}
+
+    def __getitem__(self, product_id: str) -> Dict:
+        """Get one line as a dict (orders have few lines, so this is a scan)"""
+        for (line_product_id, name, price), quantity in zip(self._products, self._quantities):
+            if line_product_id == product_id:
+                return {'name': name, 'price': price, 'quantity': quantity, 'subtotal': price * quantity}
+        raise KeyError(product_id)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate product IDs in line order"""
+        return (ref[0] for ref in self._products)
+
+    def __len__(self) -> int:
+        """Number of lines"""
+        return len(self._products)
+
+    def __repr__(self) -> str:
+        """Official string representation"""
+        return f"LineItems({self.to_dict()!r})"
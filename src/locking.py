@@ -0,0 +1,109 @@
+"""
+Locking primitives for the thread-safe store mode
+"""
+
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Iterable, Iterator, List
+
+
+# Shared do-nothing lock used by entities outside a thread-safe store
+NO_LOCK = nullcontext()
+
+
+class StripedLock:
+    """Fixed pool of reentrant locks shared by keys hashing to the same stripe"""
+
+    def __init__(self, stripes: int = 64):
+        """
+        Initialize the lock pool
+
+        Args:
+            stripes: Number of locks in the pool
+        """
+        self._locks: List[threading.RLock] = [threading.RLock() for _ in range(stripes)]
+
+    def lock_for(self, key: str) -> threading.RLock:
+        """
+        Get the lock guarding a key
+
+        Args:
+            key: Entity ID
+
+        Returns:
+            RLock for the key's stripe
+        """
+        return self._locks[hash(key) % len(self._locks)]
+
+    @contextmanager
+    def acquire(self, keys: Iterable[str]) -> Iterator[None]:
+        """
+        Hold the locks of several keys at once
+
+        Stripes are always acquired in index order so that concurrent callers
+        locking overlapping key sets cannot deadlock.
+
+        Args:
+            keys: Entity IDs to lock
+        """
+        stripes = sorted({hash(key) % len(self._locks) for key in keys})
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._locks[stripe])
+            yield
+
+
+class OrderIdAllocator:
+    """Hands out unique, increasing order IDs"""
+
+    def __init__(self, start: int = 1, prefix: str = "ORD-"):
+        """
+        Initialize the allocator
+
+        Args:
+            start: First sequence number to hand out
+            prefix: Prefix of every order ID
+        """
+        self.prefix = prefix
+        self._next = start
+        self._lock = threading.Lock()
+
+    def allocate(self, count: int = 1) -> List[str]:
+        """
+        Reserve a block of consecutive order IDs
+
+        Args:
+            count: Number of IDs to reserve
+
+        Returns:
+            List of order IDs
+        """
+        with self._lock:
+            first = self._next
+            self._next += count
+        return [f"{self.prefix}{number:06d}" for number in range(first, first + count)]
+
+    def advance_past(self, order_id: str) -> None:
+        """
+        Make sure future IDs sort after an existing order ID
+
+        Args:
+            order_id: Order ID that is already taken
+        """
+        if not order_id.startswith(self.prefix):
+            return
+        try:
+            number = int(order_id[len(self.prefix):])
+        except ValueError:
+            return
+        with self._lock:
+            self._next = max(self._next, number + 1)
+
+    def next_id(self) -> str:
+        """
+        Reserve a single order ID
+
+        Returns:
+            str: Order ID
+        """
+        return self.allocate(1)[0]
@@ -0,0 +1,297 @@
+"""
+Opt-in latency instrumentation for the public Store, Cart and Order methods
+
+Nothing is measured until enable() is called: it replaces the public methods
+of the classes with timing wrappers, and disable() puts the originals back,
+so a disabled process runs the unmodified code. Metrics are process-wide.
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the style of HdrHistogram
+
+    Values are bucketed with SUB_BITS significant bits, so every bucket is at
+    most 1/2**(SUB_BITS - 1) wide relative to its values (about 6%) while the
+    range is unbounded and memory grows only with the number of used buckets.
+    """
+
+    SUB_BITS = 5
+
+    def __init__(self):
+        """Initialize an empty histogram"""
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all recorded values"""
+        with self._lock:
+            self.counts: Dict[int, int] = {}
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = 0
+
+    @classmethod
+    def _bucket(cls, value: int) -> int:
+        """Bucket index of a value"""
+        shift = max(0, value.bit_length() - cls.SUB_BITS)
+        return (shift << (cls.SUB_BITS - 1)) + (value >> shift)
+
+    @classmethod
+    def _bucket_bounds(cls, index: int) -> Tuple[int, int]:
+        """Lowest and highest value of a bucket"""
+        half = 1 << (cls.SUB_BITS - 1)
+        shift = max(0, index // half - 1)
+        lowest = (index - (shift << (cls.SUB_BITS - 1))) << shift
+        return lowest, lowest + (1 << shift) - 1
+
+    def record(self, value: int) -> None:
+        """
+        Record one latency
+
+        Args:
+            value: Latency in nanoseconds
+        """
+        index = self._bucket(value)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Latency below which the given fraction of calls fall
+
+        Args:
+            fraction: Between 0 and 1
+
+        Returns:
+            int: Upper bound of the matching bucket in nanoseconds, capped at the maximum
+        """
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = max(1, int(round(fraction * self.count)))
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= rank:
+                    return min(self._bucket_bounds(index)[1], self.max)
+            return self.max
+
+    def snapshot(self) -> Dict:
+        """
+        Summarize the histogram
+
+        Returns:
+            Dict: count plus mean, min, percentiles and max in microseconds
+        """
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'total_us': round(self.total / 1000, 3),
+            'mean_us': round(self.total / self.count / 1000, 3),
+            'min_us': round(self.min / 1000, 3),
+            'p50_us': round(self.percentile(0.50) / 1000, 3),
+            'p90_us': round(self.percentile(0.90) / 1000, 3),
+            'p99_us': round(self.percentile(0.99) / 1000, 3),
+            'p999_us': round(self.percentile(0.999) / 1000, 3),
+            'max_us': round(self.max / 1000, 3)
+        }
+
+
+# Process-wide state
+_histograms: Dict[str, LatencyHistogram] = {}
+_slow_calls: Deque[Dict] = deque(maxlen=100)
+_patched: List[Tuple[type, str, Callable]] = []
+_state_lock = threading.Lock()
+_profiling = threading.local()  # .active is set while a sampled call is being profiled
+
+
+def _instrumented_classes() -> List[type]:
+    """Classes whose public methods are instrumented"""
+    from src.cart import Cart
+    from src.order import Order
+    from src.store import Store
+    return [Store, Cart, Order]
+
+
+def _public_methods(cls: type) -> List[str]:
+    """Names of the plain public methods defined on a class"""
+    return [name for name, member in vars(cls).items()
+            if not name.startswith("_") and inspect.isfunction(member)
+            and name not in ("metrics", "metrics_text")]
+
+
+def _timed(name: str, function: Callable) -> Callable:
+    """Wrap a method so every call is recorded in its histogram"""
+    histogram = _histograms.setdefault(name, LatencyHistogram())
+    clock = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.record(clock() - started)
+    return wrapper
+
+
+def _profiled(name: str, function: Callable, threshold_ns: int, rate: float,
+              limit: int) -> Callable:
+    """Wrap a method so calls are timed and a sample of them is run under cProfile"""
+    histogram = _histograms.setdefault(name, LatencyHistogram())
+    clock = time.perf_counter_ns
+    sample = random.random
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # Only one profiler can run per thread, so nested calls are timed normally
+        if getattr(_profiling, 'active', False) or sample() >= rate:
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(clock() - started)
+        profiler = cProfile.Profile()
+        _profiling.active = True
+        started = clock()
+        try:
+            return profiler.runcall(function, *args, **kwargs)
+        finally:
+            elapsed = clock() - started
+            _profiling.active = False
+            histogram.record(elapsed)
+            if elapsed >= threshold_ns:
+                _record_slow_call(name, elapsed, profiler, limit)
+    return wrapper
+
+
+def _record_slow_call(name: str, elapsed: int, profiler: cProfile.Profile, limit: int) -> None:
+    """Keep the profile of a call above the latency threshold"""
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+    _slow_calls.append({
+        'method': name,
+        'latency_us': round(elapsed / 1000, 3),
+        'timestamp': time.time(),
+        'profile': stream.getvalue().strip()
+    })
+
+
+def enable(profile_threshold_ms: Optional[float] = None, profile_rate: float = 0.01,
+           profile_limit: int = 15) -> None:
+    """
+    Start recording call counts and latencies of public Store, Cart and Order methods
+
+    Args:
+        profile_threshold_ms: Keep cProfile output for sampled calls at least this slow
+                              (profiling is off when None)
+        profile_rate: Fraction of outermost calls run under cProfile
+        profile_limit: Number of functions kept per profile
+    """
+    with _state_lock:
+        if _patched:
+            _restore()
+        for cls in _instrumented_classes():
+            for method in _public_methods(cls):
+                function = vars(cls)[method]
+                name = f"{cls.__name__}.{method}"
+                if profile_threshold_ms is None:
+                    wrapper = _timed(name, function)
+                else:
+                    wrapper = _profiled(name, function, int(profile_threshold_ms * 1e6),
+                                        profile_rate, profile_limit)
+                _patched.append((cls, method, function))
+                setattr(cls, method, wrapper)
+
+
+def disable() -> None:
+    """Stop recording and restore the original methods (recorded metrics are kept)"""
+    with _state_lock:
+        _restore()
+
+
+def _restore() -> None:
+    """Put back every patched method; the caller holds _state_lock"""
+    while _patched:
+        cls, method, function = _patched.pop()
+        setattr(cls, method, function)
+
+
+def is_enabled() -> bool:
+    """Whether instrumentation is active"""
+    return bool(_patched)
+
+
+def reset() -> None:
+    """Clear all recorded metrics"""
+    with _state_lock:
+        for histogram in _histograms.values():
+            histogram.clear()
+        _slow_calls.clear()
+
+
+def snapshot() -> Dict:
+    """
+    Get the recorded metrics
+
+    Returns:
+        Dict: {'enabled': bool, 'methods': {"Class.method": histogram summary},
+               'slow_calls': [{'method', 'latency_us', 'timestamp', 'profile'}]}
+    """
+    return {
+        'enabled': is_enabled(),
+        'methods': {name: histogram.snapshot()
+                    for name, histogram in sorted(_histograms.items()) if histogram.count},
+        'slow_calls': list(_slow_calls)
+    }
+
+
+def exposition(prefix: str = "ecart") -> str:
+    """
+    Render the metrics in the Prometheus text exposition format
+
+    Args:
+        prefix: Metric name prefix
+
+    Returns:
+        str: Counters and latency summaries, one sample per line
+    """
+    lines = [
+        f"# HELP {prefix}_method_calls_total Calls of instrumented methods.",
+        f"# TYPE {prefix}_method_calls_total counter",
+    ]
+    recorded = [(name, histogram) for name, histogram in sorted(_histograms.items()) if histogram.count]
+    for name, histogram in recorded:
+        lines.append(f'{prefix}_method_calls_total{{method="{name}"}} {histogram.count}')
+    lines.append(f"# HELP {prefix}_method_latency_seconds Latency of instrumented methods.")
+    lines.append(f"# TYPE {prefix}_method_latency_seconds summary")
+    for name, histogram in recorded:
+        for quantile in (0.5, 0.9, 0.99, 0.999):
+            lines.append(f'{prefix}_method_latency_seconds{{method="{name}",quantile="{quantile}"}} '
+                         f'{histogram.percentile(quantile) / 1e9:.9f}')
+        lines.append(f'{prefix}_method_latency_seconds_sum{{method="{name}"}} {histogram.total / 1e9:.9f}')
+        lines.append(f'{prefix}_method_latency_seconds_count{{method="{name}"}} {histogram.count}')
+    lines.append(f"# HELP {prefix}_slow_calls_kept Profiled calls above the latency threshold.")
+    lines.append(f"# TYPE {prefix}_slow_calls_kept gauge")
+    lines.append(f"{prefix}_slow_calls_kept {len(_slow_calls)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+"""
+Fixed-point money: amounts held as integer minor units (cents)
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Union
+
+MINOR_UNITS = 100  # minor units per major unit, e.g. cents per dollar
+
+# A float amount in major units, or an int amount in minor units
+Amount = Union[float, int]
+
+
+def to_minor(amount) -> int:
+    """
+    Convert an amount in major units to minor units
+
+    The amount is read as the decimal it prints as (19.99 becomes 1999, not
+    1998), and half a minor unit rounds away from zero.
+
+    Args:
+        amount: Amount as a float, int, str or Decimal
+
+    Returns:
+        int: Amount in minor units
+    """
+    return int((Decimal(str(amount)) * MINOR_UNITS).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def from_minor(amount: int) -> Decimal:
+    """
+    Convert an amount in minor units to an exact Decimal in major units
+
+    Args:
+        amount: Amount in minor units
+
+    Returns:
+        Decimal: Amount in major units, e.g. Decimal('19.99')
+    """
+    return Decimal(amount) / MINOR_UNITS
+
+
+def format_amount(amount: Amount, cents: bool = False) -> str:
+    """
+    Format an amount with two decimals
+
+    Args:
+        amount: Amount in major units, or in minor units if cents is True
+        cents: Whether the amount belongs to a money="cents" store
+
+    Returns:
+        str: e.g. "19.99" for both format_amount(19.99) and format_amount(1999, cents=True)
+    """
+    if cents:
+        major, minor = divmod(abs(amount), MINOR_UNITS)
+        return f"{'-' if amount < 0 else ''}{major}.{minor:02d}"
+    return f"{amount:.2f}"
+
+
+def discount_minor(price: int, discount_percent: float) -> int:
+    """
+    Apply a percentage discount to a price in minor units
+
+    The discount is rounded half up to a whole minor unit, in the customer's
+    favour: 10% off 1995 takes off 200 (199.5 rounded up) and leaves 1795.
+    Fractional percentages are read as the decimal they print as.
+
+    Args:
+        price: Price in minor units
+        discount_percent: Discount percentage (0-100)
+
+    Returns:
+        int: Discounted price in minor units
+    """
+    if type(discount_percent) is int:
+        return price - (price * discount_percent + 50) // 100
+    from fractions import Fraction
+    discount = Fraction(str(discount_percent)) * price / 100
+    return price - int(discount + Fraction(1, 2))
@@ -0,0 +1,104 @@
+"""
+Observable mixin used to notify the store about changes to its entities
+"""
+
+import threading
+from typing import Any, Callable, Dict, Tuple, Union
+
+
+# listener(entity, event, old_value)
+Listener = Callable[[Any, str, Any], None]
+
+# Above this many listeners the tuple is replaced by a dict for O(1) add/remove
+_MAX_TUPLE_LISTENERS = 8
+
+# Serializes listener changes so concurrent subscribers never drop each other
+_LISTENERS_LOCK = threading.Lock()
+
+# A small tuple, or a dict once there are many listeners
+Listeners = Union[Tuple[Listener, ...], Dict[Listener, None]]
+
+
+def _with_listener(listeners: Listeners, listener: Listener) -> Listeners:
+    """
+    Add a listener to a collection; the caller holds _LISTENERS_LOCK
+
+    Returns:
+        The collection to store (dicts are updated in place)
+    """
+    if isinstance(listeners, dict):
+        listeners[listener] = None
+        return listeners
+    if len(listeners) < _MAX_TUPLE_LISTENERS:
+        return listeners + (listener,)
+    return dict.fromkeys(listeners + (listener,))
+
+
+def _without_listener(listeners: Listeners, listener: Listener) -> Listeners:
+    """
+    Remove a listener known to be in a collection; the caller holds _LISTENERS_LOCK
+
+    Returns:
+        The collection to store (dicts are updated in place)
+    """
+    if isinstance(listeners, dict):
+        del listeners[listener]
+        return listeners
+    remaining = list(listeners)
+    remaining.remove(listener)
+    return tuple(remaining)
+
+
+def _call_listeners(listeners: Listeners, entity: Any, event: str, old_value: Any) -> None:
+    """Call every listener of a collection"""
+    if isinstance(listeners, dict):
+        with _LISTENERS_LOCK:
+            listeners = tuple(listeners)
+    for listener in listeners:
+        listener(entity, event, old_value)
+
+
+class Observable:
+    """Mixin that lets other components subscribe to changes of an entity"""
+
+    __slots__ = ('_listeners',)
+
+    def _init_listeners(self) -> None:
+        """Initialize the listeners (a tuple is smaller than a list)"""
+        self._listeners: Listeners = ()
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Subscribe to changes of this entity
+
+        Args:
+            listener: Callable invoked as listener(entity, event, old_value)
+        """
+        with _LISTENERS_LOCK:
+            self._listeners = _with_listener(self._listeners, listener)
+
+    def remove_listener(self, listener: Listener) -> bool:
+        """
+        Unsubscribe from changes of this entity
+
+        Args:
+            listener: Previously added listener
+
+        Returns:
+            bool: True if listener removed successfully
+        """
+        with _LISTENERS_LOCK:
+            if listener not in self._listeners:
+                return False
+            self._listeners = _without_listener(self._listeners, listener)
+        return True
+
+    def _notify(self, event: str, old_value: Any = None) -> None:
+        """
+        Notify all listeners about a change
+
+        Args:
+            event: Name of the changed attribute or action
+            old_value: Value before the change
+        """
+        _call_listeners(self._listeners, self, event, old_value)
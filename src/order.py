@@ -3,9 +3,13 @@ Order class for managing e-commerce orders
 """
 
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 from enum import Enum
 from src.cart import Cart
+from src.line_items import LineItems
+from src.locking import NO_LOCK
+from src.money import format_amount
+from src.observable import Observable
 
 
 class OrderStatus(Enum):
@@ -18,10 +22,27 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"
 
 
-class Order:
+# Order state machine: {target status: statuses an order may move to it from}
+TRANSITIONS: Dict[OrderStatus, Tuple[OrderStatus, ...]] = {
+    OrderStatus.CONFIRMED: (OrderStatus.PENDING,),
+    OrderStatus.PROCESSING: (OrderStatus.CONFIRMED,),
+    OrderStatus.SHIPPED: (OrderStatus.PROCESSING,),
+    OrderStatus.DELIVERED: (OrderStatus.SHIPPED,),
+    OrderStatus.CANCELLED: (OrderStatus.PENDING, OrderStatus.CONFIRMED,
+                            OrderStatus.PROCESSING, OrderStatus.SHIPPED),
+}
+
+_TERMINAL = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+
+
+class Order(Observable):
     """Represents an order in the e-commerce system"""
     
-    def __init__(self, order_id: str, user_id: str, cart: Cart, shipping_address: str = ""):
+    __slots__ = ('order_id', 'user_id', 'items', 'shipping_address', 'total_amount',
+                 'status', 'order_date', 'delivery_date', '_summaries', '_cents', '_lock')
+    
+    def __init__(self, order_id: str, user_id: str, cart: Cart, shipping_address: str = "",
+                 total_amount: Optional[float] = None):
         """
         Initialize an order
         
@@ -30,15 +51,78 @@ class Order:
             user_id: ID of the user placing the order
             cart: Cart object containing items
             shipping_address: Shipping address for the order
+            total_amount: Amount charged, e.g. after promotions (defaults to the cart total)
+        """
+        self._init_fields(order_id, user_id, cart.get_line_items(),
+                          cart.get_total() if total_amount is None else total_amount,
+                          shipping_address, datetime.now())
+    
+    @classmethod
+    def from_items(cls, order_id: str, user_id: str, items: Mapping, total_amount: float,
+                   shipping_address: str = "", order_date: Optional[datetime] = None) -> 'Order':
+        """
+        Create an order from precomputed line items instead of a cart
+        
+        Args:
+            order_id: Unique identifier for the order
+            user_id: ID of the user placing the order
+            items: LineItems, or line items in the shape returned by Cart.get_cart_items()
+            total_amount: Order total
+            shipping_address: Shipping address for the order
+            order_date: Order timestamp (defaults to now)
+            
+        Returns:
+            Order: New pending order
         """
+        order = cls.__new__(cls)
+        order._init_fields(order_id, user_id, LineItems.from_dict(items), total_amount, shipping_address,
+                           order_date or datetime.now())
+        return order
+    
+    def _init_fields(self, order_id: str, user_id: str, items: LineItems, total_amount: float,
+                     shipping_address: str, order_date: datetime) -> None:
+        """Set the fields of a new pending order"""
         self.order_id = order_id
         self.user_id = user_id
-        self.items = cart.get_cart_items().copy()
+        self.items = items
         self.shipping_address = shipping_address
-        self.total_amount = cart.get_total()
+        self.total_amount = total_amount
         self.status = OrderStatus.PENDING
-        self.order_date = datetime.now()
+        self.order_date = order_date
         self.delivery_date = None
+        self._summaries: Optional[Dict[str, str]] = None  # {format: serialized summary}
+        self._cents = False  # set by a money="cents" store: amounts are ints in minor units
+        self._lock = NO_LOCK
+        self._init_listeners()
+    
+    def _transition(self, new_status: OrderStatus) -> bool:
+        """
+        Atomically move the order to a new status if the state machine allows it
+        
+        Args:
+            new_status: Status to move the order to
+            
+        Returns:
+            bool: True if order status updated successfully
+        """
+        with self._lock:
+            if self.status not in TRANSITIONS[new_status]:
+                return False
+            if new_status == OrderStatus.DELIVERED:
+                self.delivery_date = datetime.now()
+            self._set_status(new_status)
+        return True
+    
+    def _set_status(self, new_status: OrderStatus) -> None:
+        """
+        Change the order status and notify listeners
+        
+        Args:
+            new_status: Status to move the order to
+        """
+        old_status = self.status
+        self.status = new_status
+        self._notify("status", old_status)
     
     def confirm_order(self) -> bool:
         """
@@ -47,10 +131,7 @@ class Order:
         Returns:
             bool: True if order confirmed successfully
         """
-        if self.status == OrderStatus.PENDING:
-            self.status = OrderStatus.CONFIRMED
-            return True
-        return False
+        return self._transition(OrderStatus.CONFIRMED)
     
     def process_order(self) -> bool:
         """
@@ -59,10 +140,7 @@ class Order:
         Returns:
             bool: True if order status updated successfully
         """
-        if self.status == OrderStatus.CONFIRMED:
-            self.status = OrderStatus.PROCESSING
-            return True
-        return False
+        return self._transition(OrderStatus.PROCESSING)
     
     def ship_order(self) -> bool:
         """
@@ -71,10 +149,7 @@ class Order:
         Returns:
             bool: True if order status updated successfully
         """
-        if self.status == OrderStatus.PROCESSING:
-            self.status = OrderStatus.SHIPPED
-            return True
-        return False
+        return self._transition(OrderStatus.SHIPPED)
     
     def deliver_order(self) -> bool:
         """
@@ -83,11 +158,7 @@ class Order:
         Returns:
             bool: True if order status updated successfully
         """
-        if self.status == OrderStatus.SHIPPED:
-            self.status = OrderStatus.DELIVERED
-            self.delivery_date = datetime.now()
-            return True
-        return False
+        return self._transition(OrderStatus.DELIVERED)
     
     def cancel_order(self) -> bool:
         """
@@ -96,10 +167,7 @@ class Order:
         Returns:
             bool: True if order cancelled successfully
         """
-        if self.status not in [OrderStatus.DELIVERED, OrderStatus.CANCELLED]:
-            self.status = OrderStatus.CANCELLED
-            return True
-        return False
+        return self._transition(OrderStatus.CANCELLED)
     
     def update_shipping_address(self, new_address: str) -> bool:
         """
@@ -111,9 +179,13 @@ class Order:
         Returns:
             bool: True if address updated successfully
         """
-        if self.status in [OrderStatus.SHIPPED, OrderStatus.DELIVERED]:
-            return False
-        self.shipping_address = new_address
+        with self._lock:
+            if self.status in [OrderStatus.SHIPPED, OrderStatus.DELIVERED]:
+                return False
+            old_address = self.shipping_address
+            self.shipping_address = new_address
+            self._summaries = None
+            self._notify("shipping_address", old_address)
         return True
     
     def get_order_summary(self) -> Dict:
@@ -126,17 +198,44 @@ class Order:
         return {
             'order_id': self.order_id,
             'user_id': self.user_id,
-            'items': self.items,
+            'items': self.items.to_dict(),
             'total_amount': self.total_amount,
             'status': self.status.value,
-            'order_date': self.order_date.strftime("%Y-%m-%d %H:%M:%S"),
+            'order_date': self.order_date.isoformat(" ", "seconds"),
             'shipping_address': self.shipping_address,
-            'delivery_date': self.delivery_date.strftime("%Y-%m-%d %H:%M:%S") if self.delivery_date else None
+            'delivery_date': self.delivery_date.isoformat(" ", "seconds") if self.delivery_date else None
         }
     
+    def get_serialized_summary(self, file_format: str, serialize: Callable[['Order'], str]) -> str:
+        """
+        Get the order summary serialized for an export format
+        
+        Delivered and cancelled orders keep the result, since their summary
+        only changes if a cancelled order's shipping address is updated.
+        
+        Args:
+            file_format: Name of the format, used as the cache key
+            serialize: Builds the serialized text from the order
+            
+        Returns:
+            str: Serialized summary
+        """
+        summaries = self._summaries
+        if summaries is not None:
+            text = summaries.get(file_format)
+            if text is not None:
+                return text
+        with self._lock:
+            text = serialize(self)
+            if self.status in _TERMINAL:
+                if self._summaries is None:
+                    self._summaries = {}
+                self._summaries[file_format] = text
+        return text
+    
     def __str__(self) -> str:
         """String representation of the order"""
-        return f"Order(id={self.order_id}, user={self.user_id}, total=${self.total_amount:.2f}, status={self.status.value})"
+        return f"Order(id={self.order_id}, user={self.user_id}, total=${format_amount(self.total_amount, self._cents)}, status={self.status.value})"
     
     def __repr__(self) -> str:
         """Official string representation"""
@@ -0,0 +1,101 @@
+"""
+Secondary indexes for looking up orders by user and by status
+"""
+
+from typing import Dict, List, Tuple
+from src.order import Order, OrderStatus
+
+
+class OrderIndex:
+    """Keeps orders grouped by user and by status"""
+
+    def __init__(self):
+        """Initialize empty indexes"""
+        self.by_user: Dict[str, Dict[str, Order]] = {}  # {user_id: {order_id: Order}}
+        self.by_status: Dict[OrderStatus, Dict[str, Order]] = {
+            status: {} for status in OrderStatus
+        }
+
+    def add_order(self, order: Order) -> None:
+        """
+        Index a newly created order
+
+        Args:
+            order: Order object to index
+        """
+        self.by_user.setdefault(order.user_id, {})[order.order_id] = order
+        self.by_status[order.status][order.order_id] = order
+
+    def add_orders(self, orders: List[Order]) -> None:
+        """
+        Index many newly created orders
+
+        Args:
+            orders: Order objects to index
+        """
+        by_user = self.by_user
+        by_status = self.by_status
+        for order in orders:
+            orders_of_user = by_user.get(order.user_id)
+            if orders_of_user is None:
+                orders_of_user = by_user[order.user_id] = {}
+            orders_of_user[order.order_id] = order
+            by_status[order.status][order.order_id] = order
+
+    def update_status(self, order: Order, old_status: OrderStatus) -> bool:
+        """
+        Move an order to the bucket of its new status
+
+        Args:
+            order: Order whose status changed
+            old_status: Status before the change
+
+        Returns:
+            bool: False if the order had already been moved
+        """
+        if self.by_status[old_status].pop(order.order_id, None) is None:
+            return False
+        self.by_status[order.status][order.order_id] = order
+        return True
+
+    def update_statuses(self, changes: List[Tuple[Order, OrderStatus]]) -> None:
+        """
+        Move many orders to the buckets of their new statuses
+
+        Args:
+            changes: (order, status before the change) pairs
+        """
+        by_status = self.by_status
+        old_status = new_status = old_bucket = new_bucket = None
+        for order, status in changes:
+            # Statuses repeat across a batch, so only look up a bucket when it changes
+            if status is not old_status:
+                old_status, old_bucket = status, by_status[status]
+            if order.status is not new_status:
+                new_status, new_bucket = order.status, by_status[order.status]
+            del old_bucket[order.order_id]
+            new_bucket[order.order_id] = order
+
+    def get_user_orders(self, user_id: str) -> List[Order]:
+        """
+        Get all orders for a user
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            List of orders in creation order
+        """
+        return list(self.by_user.get(user_id, {}).values())
+
+    def get_orders_by_status(self, status: OrderStatus) -> List[Order]:
+        """
+        Get all orders with the given status
+
+        Args:
+            status: Order status
+
+        Returns:
+            List of orders
+        """
+        return list(self.by_status[status].values())
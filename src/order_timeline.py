@@ -0,0 +1,227 @@
+"""
+Time-ordered order index and windowed revenue rollups
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.order import Order, OrderStatus
+
+# Rollup bucket widths in seconds, coarsest first
+DAY = 86400
+HOUR = 3600
+MINUTE = 60
+RESOLUTIONS = (DAY, HOUR, MINUTE)
+
+_STATUSES = tuple(OrderStatus)
+_POSITIONS = {status: position for position, status in enumerate(_STATUSES)}
+_PENDING = _POSITIONS[OrderStatus.PENDING]
+_DELIVERED = _POSITIONS[OrderStatus.DELIVERED]
+
+
+class OrderTimeline:
+    """Orders sorted by order_date for range queries by binary search"""
+
+    def __init__(self):
+        """Initialize an empty timeline"""
+        self._dates: List[datetime] = []
+        self._orders: List[Order] = []
+
+    def add_order(self, order: Order) -> None:
+        """
+        Insert an order at its position in time
+
+        New orders are normally the latest, so this is an append.
+
+        Args:
+            order: Order to insert
+        """
+        dates = self._dates
+        order_date = order.order_date
+        if not dates or order_date >= dates[-1]:
+            dates.append(order_date)
+            self._orders.append(order)
+        else:
+            position = bisect_right(dates, order_date)
+            dates.insert(position, order_date)
+            self._orders.insert(position, order)
+
+    def add_orders(self, orders: Iterable[Order]) -> None:
+        """
+        Insert many orders
+
+        Args:
+            orders: Orders to insert
+        """
+        for order in orders:
+            self.add_order(order)
+
+    def orders_between(self, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None) -> List[Order]:
+        """
+        Get orders placed in [start, end)
+
+        Args:
+            start: Earliest order date (unbounded if None)
+            end: Order date to stop before (unbounded if None)
+
+        Returns:
+            List of orders sorted by order date
+        """
+        low = 0 if start is None else bisect_left(self._dates, start)
+        high = len(self._dates) if end is None else bisect_left(self._dates, end)
+        return self._orders[low:high]
+
+    def count_between(self, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> int:
+        """
+        Count orders placed in [start, end) without building a list
+
+        Args:
+            start: Earliest order date (unbounded if None)
+            end: Order date to stop before (unbounded if None)
+
+        Returns:
+            int: Number of orders
+        """
+        low = 0 if start is None else bisect_left(self._dates, start)
+        high = len(self._dates) if end is None else bisect_left(self._dates, end)
+        return max(0, high - low)
+
+
+class OrderRollups:
+    """
+    Pre-aggregated revenue and status counts per minute, hour and day
+
+    Every bucket holds the delivered revenue and the number of orders that
+    entered each status during it. Orders count as PENDING at their order
+    date and revenue is booked at the delivery date; other transitions are
+    bucketed by the time they are observed. Buckets are aligned to the Unix
+    epoch, so day buckets are UTC days.
+    """
+
+    def __init__(self):
+        """Initialize empty rollups"""
+        # {width: {bucket start: [revenue, count per status in OrderStatus order]}}
+        self.buckets: Dict[int, Dict[int, list]] = {width: {} for width in RESOLUTIONS}
+
+    def _record(self, timestamp: float, position: int, revenue: float = 0) -> None:
+        """Add one status entry (and its revenue) to the buckets holding a timestamp"""
+        for width, table in self.buckets.items():
+            start = int(timestamp // width) * width
+            entry = table.get(start)
+            if entry is None:
+                entry = table[start] = [0] * (len(_STATUSES) + 1)
+            entry[0] += revenue
+            entry[1 + position] += 1
+
+    def order_created(self, order: Order) -> None:
+        """
+        Count a new order, and its delivery if it is already delivered
+
+        Args:
+            order: Order added to the store
+        """
+        self._record(order.order_date.timestamp(), _PENDING)
+        if order.status == OrderStatus.DELIVERED and order.delivery_date is not None:
+            self._record(order.delivery_date.timestamp(), _DELIVERED, order.total_amount)
+        elif order.status != OrderStatus.PENDING:
+            self._record(order.order_date.timestamp(), _POSITIONS[order.status])
+
+    def status_changed(self, order: Order, timestamp: Optional[float] = None) -> None:
+        """
+        Count an order entering its current status
+
+        Args:
+            order: Order whose status changed
+            timestamp: When the change happened (defaults to the delivery date
+                       for deliveries and to now otherwise)
+        """
+        position = _POSITIONS[order.status]
+        if position == _DELIVERED:
+            delivered_at = order.delivery_date.timestamp() if order.delivery_date else timestamp
+            self._record(delivered_at or time.time(), position, order.total_amount)
+        else:
+            self._record(timestamp or time.time(), position)
+
+    def statuses_changed(self, orders: List[Order], status: OrderStatus,
+                         timestamp: Optional[float] = None) -> None:
+        """
+        Count many orders entering the same status at the same time
+
+        Args:
+            orders: Orders that moved
+            status: Status they moved to
+            timestamp: When the change happened (defaults to now, or to the
+                       delivery date of the first order for deliveries)
+        """
+        if not orders:
+            return
+        position = _POSITIONS[status]
+        if timestamp is None:
+            first = orders[0]
+            timestamp = (first.delivery_date.timestamp()
+                         if position == _DELIVERED and first.delivery_date else time.time())
+        revenue = sum(order.total_amount for order in orders) if position == _DELIVERED else 0
+        for width, table in self.buckets.items():
+            start = int(timestamp // width) * width
+            entry = table.get(start)
+            if entry is None:
+                entry = table[start] = [0] * (len(_STATUSES) + 1)
+            entry[0] += revenue
+            entry[1 + position] += len(orders)
+
+    @staticmethod
+    def _cover(start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Split a minute-aligned range into the fewest aligned buckets
+
+        Args:
+            start: Range start in seconds, a multiple of MINUTE
+            end: Range end in seconds, a multiple of MINUTE
+
+        Returns:
+            List of (width, bucket start)
+        """
+        pieces = []
+        current = start
+        while current < end:
+            for width in RESOLUTIONS:
+                if current % width == 0 and current + width <= end:
+                    pieces.append((width, current))
+                    current += width
+                    break
+        return pieces
+
+    def summarize(self, start: datetime, end: datetime) -> Dict:
+        """
+        Aggregate the buckets overlapping [start, end)
+
+        The range is widened to whole minutes. Cost depends on the length of
+        the range in buckets, not on the number of orders.
+
+        Args:
+            start: Window start
+            end: Window end
+
+        Returns:
+            Dict: {'start', 'end', 'revenue', 'orders_created',
+                   'orders_by_status': {status value: orders that entered it}}
+        """
+        first = int(start.timestamp() // MINUTE) * MINUTE
+        last = -int(-end.timestamp() // MINUTE) * MINUTE
+        totals = [0] * (len(_STATUSES) + 1)
+        for width, bucket in self._cover(first, last):
+            entry = self.buckets[width].get(bucket)
+            if entry is not None:
+                for position, value in enumerate(entry):
+                    totals[position] += value
+        return {
+            'start': datetime.fromtimestamp(first),
+            'end': datetime.fromtimestamp(last),
+            'revenue': totals[0],
+            'orders_created': totals[1 + _PENDING],
+            'orders_by_status': {status.value: totals[1 + position]
+                                 for position, status in enumerate(_STATUSES)}
+        }
@@ -0,0 +1,590 @@
+"""
+Write-ahead log and snapshots for persisting Store state across restarts
+
+Every mutation reported by the store's change feed is appended to a JSON-lines
+log with batched fsync. Snapshots of the full state are written periodically
+and recovery loads the latest snapshot, then replays the log records after it.
+Log records carry absolute values (new stock, new quantity, new status), so
+replaying a record whose effect is already in the snapshot is harmless.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.cart_manager import CartManager
+from src.line_items import LineItems, ProductRefs
+from src.order import Order, OrderStatus
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+SNAPSHOT_FORMAT = 1
+_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def _format_date(value: Optional[datetime]) -> Optional[str]:
+    """Serialize a datetime (or None)"""
+    return value.strftime(_DATE_FORMAT) if value else None
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Deserialize a datetime (or None)"""
+    return datetime.strptime(value, _DATE_FORMAT) if value else None
+
+
+def product_to_dict(product: Product) -> Dict:
+    """
+    Serialize a product
+
+    Args:
+        product: Product to serialize
+
+    Returns:
+        Dict: JSON-compatible product record
+    """
+    return {
+        'product_id': product.product_id,
+        'name': product.name,
+        'price': product.price,
+        'description': product.description,
+        'stock': product.stock
+    }
+
+
+def user_to_dict(user: User, carts: Optional[CartManager] = None) -> Dict:
+    """
+    Serialize a user and the contents of their cart
+
+    Args:
+        user: User to serialize
+        carts: Cart manager holding the user's cart if it was evicted
+
+    Returns:
+        Dict: JSON-compatible user record
+    """
+    cart = {}
+    with user._lock:
+        if user._cart is not None:
+            cart = dict(user._cart.items)
+        elif carts is not None:
+            cart = dict(carts.spilled_items(user.user_id) or {})
+    return {
+        'user_id': user.user_id,
+        'name': user.name,
+        'email': user.email,
+        'address': user.address,
+        'is_active': user.is_active,
+        'cart': cart
+    }
+
+
+def order_to_dict(order: Order) -> Dict:
+    """
+    Serialize an order
+
+    Args:
+        order: Order to serialize
+
+    Returns:
+        Dict: JSON-compatible order record
+    """
+    return {
+        'order_id': order.order_id,
+        'user_id': order.user_id,
+        'items': order.items.to_dict(),
+        'shipping_address': order.shipping_address,
+        'total_amount': order.total_amount,
+        'status': order.status.value,
+        'order_date': _format_date(order.order_date),
+        'delivery_date': _format_date(order.delivery_date)
+    }
+
+
+def order_from_dict(record: Dict, refs: Optional[ProductRefs] = None) -> Order:
+    """
+    Rebuild an order from its serialized record
+
+    Args:
+        record: Record produced by order_to_dict
+        refs: Intern table for the line products, normally the owning store's
+
+    Returns:
+        Order: Order with the recorded status and dates
+    """
+    order = Order.from_items(record['order_id'], record['user_id'],
+                             LineItems.from_dict(record['items'], refs),
+                             record['total_amount'], record['shipping_address'],
+                             _parse_date(record['order_date']))
+    order.status = OrderStatus(record['status'])
+    order.delivery_date = _parse_date(record['delivery_date'])
+    return order
+
+
+class WriteAheadLog:
+    """
+    Append-only JSON-lines log with batched fsync
+
+    Every record is flushed to the operating system when it is appended, so
+    it survives a crash of the process. It is fsynced, surviving a crash of
+    the machine, once sync_every records are unsynced or, at the latest,
+    sync_interval seconds after it was appended: an append that leaves
+    records unsynced starts a timer thread that syncs them if no later
+    append has.
+    """
+
+    def __init__(self, path: str, sync_every: int = 64, sync_interval: float = 0.05):
+        """
+        Open a log file for appending
+
+        Args:
+            path: Log file path
+            sync_every: Fsync after this many unsynced records
+            sync_interval: Fsync when the oldest unsynced record is this many seconds old
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+
+    def append(self, record: Dict) -> None:
+        """
+        Append a record, syncing to disk when a batch is due
+
+        Args:
+            record: JSON-compatible record
+        """
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.sync_interval, self._sync_late)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_late(self) -> None:
+        """Timer callback: sync records that no later append has synced"""
+        with self._lock:
+            self._timer = None
+            if not self._file.closed:
+                self._sync()
+
+    def _sync(self) -> None:
+        """Fsync the flushed records; the caller holds the lock"""
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self) -> None:
+        """Fsync every appended record to disk"""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        """Sync and close the log"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+def read_log(path: str) -> Iterator[Dict]:
+    """
+    Read the records of a log file
+
+    A truncated last line (e.g. from a crash mid-write) ends the log.
+
+    Args:
+        path: Log file path
+
+    Yields:
+        Dict: Log records in order
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+def _segment_paths(directory: str) -> List[str]:
+    """Log segment files in sequence order"""
+    return sorted(glob.glob(os.path.join(directory, "wal-*.log")))
+
+
+def _snapshot_paths(directory: str) -> List[str]:
+    """Snapshot files in sequence order"""
+    return sorted(glob.glob(os.path.join(directory, "snapshot-*.json")))
+
+
+def _sequence_of(path: str) -> int:
+    """Sequence number encoded in a segment or snapshot file name"""
+    return int(os.path.basename(path).split("-")[1].split(".")[0])
+
+
+def write_snapshot(store: Store, path: str, seq: int) -> None:
+    """
+    Atomically write a snapshot of the full store state
+
+    Args:
+        store: Store to snapshot
+        path: Snapshot file path
+        seq: Sequence number of the last log record contained in the snapshot
+    """
+    with store._index_lock:
+        products = list(store.products.values())
+        users = list(store.users.values())
+        orders = list(store.orders.values())
+    carts = store.cart_manager
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'seq': seq,
+        'store_name': store.store_name,
+        'money': store.money,  # cents snapshots hold prices in minor units
+        'products': [product_to_dict(product) for product in products],
+        'users': [user_to_dict(user, carts) for user in users],
+        'orders': [order_to_dict(order) for order in orders]
+    }
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(snapshot, handle, separators=(",", ":"))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path: str, **store_options) -> Tuple[Store, int]:
+    """
+    Build a store from a snapshot file
+
+    Args:
+        path: Snapshot file path
+        **store_options: Extra Store constructor arguments (catalog, thread_safe)
+
+    Raises:
+        ValueError: For an unsupported format, or a money option that differs from the snapshot's
+
+    Returns:
+        (store, sequence number of the snapshot)
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        snapshot = json.load(handle)
+    if snapshot.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {snapshot.get('format')}")
+    money = snapshot.get('money', "float")  # older snapshots predate money modes
+    if store_options.setdefault('money', money) != money:
+        raise ValueError(f"Snapshot holds {money} prices, not {store_options['money']}")
+
+    store = Store(snapshot['store_name'], **store_options)
+    store.add_products((Product(record['product_id'], record['name'], record['price'],
+                                record['description'], record['stock'])
+                        for record in snapshot['products']), minor_units=True)
+    users = []
+    for record in snapshot['users']:
+        user = User(record['user_id'], record['name'], record['email'], record['address'])
+        user.is_active = record['is_active']
+        users.append(user)
+    store.register_users(users)
+    for user, record in zip(users, snapshot['users']):
+        for product_id, quantity in record['cart'].items():
+            product = store.products.get(product_id)
+            if product is not None:
+                user.cart._set_quantity(product, quantity)
+    orders = [order_from_dict(record, store._product_refs) for record in snapshot['orders']]
+    store._add_orders(orders)
+    for order in orders:
+        store._order_ids.advance_past(order.order_id)
+    return store, snapshot['seq']
+
+
+def apply_record(store: Store, record: Dict) -> None:
+    """
+    Replay one log record onto a store
+
+    Args:
+        store: Store being recovered
+        record: Log record
+    """
+    op = record['op']
+    if op == "product_added":
+        data = record['product']
+        store.add_product(Product(data['product_id'], data['name'], data['price'],
+                                  data['description'], data['stock']), minor_units=True)
+    elif op == "product_removed":
+        store.remove_product(record['product_id'])
+    elif op in ("product_price", "product_stock", "product_details"):
+        product = store.get_product(record['product_id'])
+        if product is None:
+            return
+        if op == "product_price":
+            product.update_price(record['price'], minor_units=True)
+        elif op == "product_stock":
+            product.update_stock(record['stock'] - product.stock)
+        else:
+            product.update_details(record['name'], record['description'])
+    elif op == "user_registered":
+        data = record['user']
+        user = User(data['user_id'], data['name'], data['email'], data['address'])
+        user.is_active = data['is_active']
+        store.register_user(user)
+    elif op in ("user_profile", "user_active", "cart_item", "cart_clear"):
+        user = store.get_user(record['user_id'])
+        if user is None:
+            return
+        if op == "user_profile":
+            user.update_profile(record['name'], record['email'], record['address'])
+        elif op == "user_active":
+            user._set_active(record['is_active'])
+        elif op == "cart_item":
+            product = store.get_product(record['product_id'])
+            if product is not None:
+                user.cart._set_quantity(product, record['quantity'])
+        else:
+            user.clear_cart()
+    elif op == "order_created":
+        data = record['order']
+        if data['order_id'] not in store.orders:
+            store._add_orders([order_from_dict(data, store._product_refs)])
+            store._order_ids.advance_past(data['order_id'])
+    elif op in ("order_status", "order_address"):
+        order = store.get_order(record['order_id'])
+        if order is None:
+            return
+        if op == "order_status":
+            status = OrderStatus(record['status'])
+            with order._lock:
+                order.delivery_date = _parse_date(record['delivery_date'])
+                if order.status != status:
+                    order._set_status(status)
+        else:
+            order.shipping_address = record['shipping_address']
+
+
+def recover(directory: str, store_name: str = "Store", **store_options) -> Tuple[Store, int]:
+    """
+    Rebuild a store from the latest snapshot and the log records after it
+
+    Args:
+        directory: Persistence directory
+        store_name: Name for a new store if there is no snapshot yet
+        **store_options: Extra Store constructor arguments (catalog, thread_safe)
+
+    Returns:
+        (store, sequence number of the last applied record)
+    """
+    snapshots = _snapshot_paths(directory)
+    if snapshots:
+        store, last_seq = load_snapshot(snapshots[-1], **store_options)
+    else:
+        store, last_seq = Store(store_name, **store_options), 0
+
+    for path in _segment_paths(directory):
+        for record in read_log(path):
+            if record['seq'] > last_seq:
+                apply_record(store, record)
+                last_seq = record['seq']
+    return store, last_seq
+
+
+class StoreJournal:
+    """Logs every mutation of a store and writes periodic snapshots"""
+
+    def __init__(self, store: Store, directory: str, last_seq: Optional[int] = None,
+                 sync_every: int = 64, sync_interval: float = 0.05,
+                 snapshot_every: int = 100_000, keep_snapshots: int = 2):
+        """
+        Start journaling a store
+
+        Args:
+            store: Store to journal
+            directory: Persistence directory
+            last_seq: Last sequence number already on disk for this store (as
+                      returned by recover); None writes a fresh snapshot first
+            sync_every: Fsync after this many unsynced records
+            sync_interval: Fsync when the oldest unsynced record is this many seconds old
+            snapshot_every: Take a snapshot after this many log records
+            keep_snapshots: Number of snapshots (and their log tails) to keep
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.store = store
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self._lock = threading.Lock()
+        self._seq = last_seq or 0
+        self._since_snapshot = 0
+        self._snapshotting = False
+        self._wal = self._open_segment()
+        if last_seq is None:
+            self.snapshot()
+        store.add_listener(self._on_store_event)
+
+    @classmethod
+    def open(cls, directory: str, store_name: str = "Store", store_options: Optional[Dict] = None,
+             **journal_options) -> 'StoreJournal':
+        """
+        Recover the store persisted in a directory and keep journaling it
+
+        Args:
+            directory: Persistence directory (created if missing)
+            store_name: Name for a new store if nothing was persisted yet
+            store_options: Extra Store constructor arguments (catalog, thread_safe)
+            **journal_options: Extra StoreJournal arguments
+
+        Returns:
+            StoreJournal: Journal whose store attribute holds the recovered store
+        """
+        os.makedirs(directory, exist_ok=True)
+        store, last_seq = recover(directory, store_name, **(store_options or {}))
+        journal = cls(store, directory, last_seq, **journal_options)
+        if not _snapshot_paths(directory):
+            # The log alone does not record the store's name and options
+            journal.snapshot()
+        return journal
+
+    def _open_segment(self) -> WriteAheadLog:
+        """Start a new log segment after the current sequence number"""
+        path = os.path.join(self.directory, f"wal-{self._seq + 1:012d}.log")
+        return WriteAheadLog(path, self.sync_every, self.sync_interval)
+
+    def append(self, record: Dict) -> None:
+        """
+        Append a mutation record to the log
+
+        Args:
+            record: Record with an "op" key
+        """
+        with self._lock:
+            self._seq += 1
+            record['seq'] = self._seq
+            self._wal.append(record)
+            self._since_snapshot += 1
+            snapshot_due = self._since_snapshot >= self.snapshot_every and not self._snapshotting
+            if snapshot_due:
+                self._snapshotting = True
+        if snapshot_due:
+            if self.store.thread_safe:
+                # The caller may hold entity locks, so snapshot from another thread
+                threading.Thread(target=self.snapshot, daemon=True).start()
+            else:
+                self.snapshot()
+
+    def snapshot(self) -> str:
+        """
+        Write a snapshot of the current state and start a new log segment
+
+        Returns:
+            str: Path of the snapshot file
+        """
+        with self._lock:
+            self._snapshotting = True
+            seq = self._seq
+            self._wal.close()
+            self._wal = self._open_segment()
+            self._since_snapshot = 0
+        try:
+            path = os.path.join(self.directory, f"snapshot-{seq:012d}.json")
+            write_snapshot(self.store, path, seq)
+            self._prune()
+        finally:
+            self._snapshotting = False
+        return path
+
+    def _prune(self) -> None:
+        """Delete snapshots and log segments no longer needed for recovery"""
+        snapshots = _snapshot_paths(self.directory)
+        if len(snapshots) <= self.keep_snapshots:
+            return
+        for path in snapshots[:-self.keep_snapshots]:
+            os.remove(path)
+        oldest_kept = _sequence_of(snapshots[-self.keep_snapshots])
+        segments = _segment_paths(self.directory)
+        for path, next_path in zip(segments, segments[1:]):
+            # A segment is obsolete once the next one starts at or before the oldest snapshot
+            if _sequence_of(next_path) <= oldest_kept + 1:
+                os.remove(path)
+
+    def sync(self) -> None:
+        """Force all logged records to disk"""
+        with self._lock:
+            self._wal.sync()
+
+    def close(self) -> None:
+        """Stop journaling and close the log"""
+        self.store.remove_listener(self._on_store_event)
+        with self._lock:
+            self._wal.close()
+
+    def _on_store_event(self, store: Store, event: str, payload) -> None:
+        """
+        Translate a store change into a log record
+
+        Args:
+            store: Store that changed
+            event: Store event name
+            payload: Event payload
+        """
+        if event == "product_added":
+            self.append({'op': event, 'product': product_to_dict(payload)})
+        elif event == "product_removed":
+            self.append({'op': event, 'product_id': payload.product_id})
+        elif event == "user_registered":
+            self.append({'op': event, 'user': user_to_dict(payload)})
+        elif event == "order_created":
+            self.append({'op': event, 'order': order_to_dict(payload)})
+        elif event == "product_changed":
+            product, change, _ = payload
+            if change == "price":
+                self.append({'op': "product_price", 'product_id': product.product_id,
+                             'price': product.price})
+            elif change == "stock":
+                self.append({'op': "product_stock", 'product_id': product.product_id,
+                             'stock': product.stock})
+            elif change == "details":
+                self.append({'op': "product_details", 'product_id': product.product_id,
+                             'name': product.name, 'description': product.description})
+        elif event == "user_changed":
+            user, change, _ = payload
+            if change == "profile":
+                self.append({'op': "user_profile", 'user_id': user.user_id, 'name': user.name,
+                             'email': user.email, 'address': user.address})
+            elif change == "active":
+                self.append({'op': "user_active", 'user_id': user.user_id,
+                             'is_active': user.is_active})
+        elif event == "cart_changed":
+            cart, change, old_value = payload
+            if change == "item":
+                product_id = old_value[0]
+                self.append({'op': "cart_item", 'user_id': cart.user_id, 'product_id': product_id,
+                             'quantity': cart.items.get(product_id, 0)})
+            elif change == "clear":
+                self.append({'op': "cart_clear", 'user_id': cart.user_id})
+        elif event == "order_changed":
+            order, change, _ = payload
+            if change == "status":
+                self.append({'op': "order_status", 'order_id': order.order_id,
+                             'status': order.status.value,
+                             'delivery_date': _format_date(order.delivery_date)})
+            elif change == "shipping_address":
+                self.append({'op': "order_address", 'order_id': order.order_id,
+                             'shipping_address': order.shipping_address})
@@ -0,0 +1,223 @@
+"""
+Sorted price index and in-stock set for browsing the catalog by price
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.product import Product
+
+# Position in the price order: (price, product_id)
+PriceKey = Tuple[float, str]
+
+# A batch at least 1/_MERGE_RATIO the size of a sorted list is merged into it
+# in one pass instead of being moved one insertion at a time
+_MERGE_RATIO = 64
+
+
+class PriceIndex:
+    """
+    Products sorted by price, kept for the whole catalog and for in-stock products
+
+    Updates compare the product's current price and stock against the values
+    recorded here, so repeated or late notifications are harmless.
+    """
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self.prices: Dict[str, float] = {}  # {product_id: indexed price}
+        self.in_stock: Set[str] = set()
+        self._all: List[PriceKey] = []
+        self._stocked: List[PriceKey] = []
+        # New products are appended here and sorted in on the next read, so
+        # bulk loads cost one sort instead of one insertion per product
+        self._pending: List[PriceKey] = []
+        self._pending_stocked: List[PriceKey] = []
+
+    def _flush(self) -> None:
+        """Merge pending products into the sorted lists"""
+        if self._pending:
+            self._all.extend(self._pending)
+            self._all.sort()
+            self._pending = []
+        if self._pending_stocked:
+            self._stocked.extend(self._pending_stocked)
+            self._stocked.sort()
+            self._pending_stocked = []
+
+    def add_product(self, product: Product) -> None:
+        """
+        Index a product added to the catalog
+
+        Args:
+            product: Product that was added
+        """
+        key = (product.price, product.product_id)
+        self.prices[product.product_id] = product.price
+        self._pending.append(key)
+        if product.is_available():
+            self.in_stock.add(product.product_id)
+            self._pending_stocked.append(key)
+
+    def remove_product(self, product_id: str) -> None:
+        """
+        Drop a product removed from the catalog
+
+        Args:
+            product_id: ID of the product that was removed
+        """
+        price = self.prices.pop(product_id, None)
+        if price is None:
+            return
+        self._flush()
+        key = (price, product_id)
+        _remove(self._all, key)
+        if product_id in self.in_stock:
+            self.in_stock.discard(product_id)
+            _remove(self._stocked, key)
+
+    def update_product(self, product: Product) -> None:
+        """
+        Bring a product's price and stock membership up to date
+
+        Args:
+            product: Product whose price or stock may have changed
+        """
+        product_id = product.product_id
+        old_price = self.prices.get(product_id)
+        if old_price is None:
+            return  # removed from the catalog
+        price = product.price
+        available = product.is_available()
+        was_available = product_id in self.in_stock
+        if price == old_price and available == was_available:
+            return
+        self._flush()
+        old_key, key = (old_price, product_id), (price, product_id)
+        if price != old_price:
+            self.prices[product_id] = price
+            _remove(self._all, old_key)
+            insort(self._all, key)
+        if was_available:
+            _remove(self._stocked, old_key)
+            self.in_stock.discard(product_id)
+        if available:
+            insort(self._stocked, key)
+            self.in_stock.add(product_id)
+
+    def update_products(self, products: Iterable[Product]) -> None:
+        """
+        Bring many products up to date at once, e.g. after a bulk catalog update
+
+        Args:
+            products: Products whose price or stock may have changed
+        """
+        products = list(products)
+        if len(products) * _MERGE_RATIO < len(self.prices):
+            for product in products:
+                self.update_product(product)
+            return
+        repriced: Set[str] = set()
+        restocked: Set[str] = set()
+        new_keys: List[PriceKey] = []
+        new_stocked: List[PriceKey] = []
+        for product in products:
+            product_id = product.product_id
+            old_price = self.prices.get(product_id)
+            if old_price is None:
+                continue  # removed from the catalog
+            price = product.price
+            available = product.is_available()
+            was_available = product_id in self.in_stock
+            if price == old_price and available == was_available:
+                continue
+            key = (price, product_id)
+            if price != old_price:
+                self.prices[product_id] = price
+                repriced.add(product_id)
+                new_keys.append(key)
+            restocked.add(product_id)
+            if was_available:
+                self.in_stock.discard(product_id)
+            if available:
+                self.in_stock.add(product_id)
+                new_stocked.append(key)
+        self._flush()
+        if repriced:
+            self._all = _merged(self._all, repriced, new_keys)
+        if restocked:
+            self._stocked = _merged(self._stocked, restocked, new_stocked)
+
+    def browse(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+               in_stock: bool = True, limit: int = 20, cursor: Optional[PriceKey] = None,
+               descending: bool = False) -> Tuple[List[str], Optional[PriceKey]]:
+        """
+        Get one page of product IDs in a price range, sorted by price
+
+        Args:
+            min_price: Lowest price (inclusive, unbounded if None)
+            max_price: Highest price (inclusive, unbounded if None)
+            in_stock: Only include products with stock
+            limit: Page size
+            cursor: next_cursor of the previous page, None for the first page
+            descending: Sort from the most to the least expensive
+
+        Returns:
+            (product IDs, cursor of the next page or None on the last page)
+        """
+        self._flush()
+        keys = self._stocked if in_stock else self._all
+        low = 0 if min_price is None else bisect_left(keys, (min_price,))
+        high = len(keys) if max_price is None else bisect_left(keys, (max_price, _AFTER_ALL_IDS))
+        if descending:
+            if cursor is not None:
+                high = min(high, bisect_left(keys, cursor))
+            start = max(low, high - limit)
+            page = keys[start:high][::-1]
+            more = start > low
+        else:
+            if cursor is not None:
+                low = max(low, bisect_right(keys, cursor))
+            end = min(high, low + limit)
+            page = keys[low:end]
+            more = end < high
+        next_cursor = page[-1] if more and page else None
+        return [product_id for _, product_id in page], next_cursor
+
+    def count(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+              in_stock: bool = True) -> int:
+        """
+        Count products in a price range
+
+        Args:
+            min_price: Lowest price (inclusive, unbounded if None)
+            max_price: Highest price (inclusive, unbounded if None)
+            in_stock: Only count products with stock
+
+        Returns:
+            int: Number of products
+        """
+        self._flush()
+        keys = self._stocked if in_stock else self._all
+        low = 0 if min_price is None else bisect_left(keys, (min_price,))
+        high = len(keys) if max_price is None else bisect_left(keys, (max_price, _AFTER_ALL_IDS))
+        return max(0, high - low)
+
+
+# Sorts after every product ID, so (price, _AFTER_ALL_IDS) bounds a price inclusively
+_AFTER_ALL_IDS = "\U0010ffff"
+
+
+def _merged(keys: List[PriceKey], dropped: Set[str], added: List[PriceKey]) -> List[PriceKey]:
+    """Sorted keys without the dropped product IDs, plus the added keys"""
+    kept = [key for key in keys if key[1] not in dropped]
+    added.sort()
+    kept.extend(added)
+    kept.sort()  # two sorted runs, merged in linear time
+    return kept
+
+
+def _remove(keys: List[PriceKey], key: PriceKey) -> None:
+    """Remove a key from a sorted list"""
+    position = bisect_left(keys, key)
+    if position < len(keys) and keys[position] == key:
+        del keys[position]
@@ -2,10 +2,19 @@
 Product class for managing e-commerce products
 """
 
+import math
+from typing import Optional
+from src.locking import NO_LOCK
+from src.money import discount_minor, format_amount, to_minor
+from src.observable import (Listener, Observable, _LISTENERS_LOCK, _call_listeners,
+                            _with_listener, _without_listener)
 
-class Product:
+
+class Product(Observable):
     """Represents a product in the e-commerce system"""
     
+    __slots__ = ('product_id', 'name', 'price', 'description', 'stock', '_cents', '_lock', '_price_listeners')
+    
     def __init__(self, product_id: str, name: str, price: float, description: str = "", stock: int = 0):
         """
         Initialize a product
@@ -13,7 +22,7 @@ class Product:
         Args:
             product_id: Unique identifier for the product
             name: Product name
-            price: Product price
+            price: Product price (converted to minor units when added to a money="cents" store)
             description: Product description
             stock: Available stock quantity
         """
@@ -22,20 +31,81 @@ class Product:
         self.price = price
         self.description = description
         self.stock = stock
+        self._cents = False  # set by a money="cents" store: price is an int in minor units
+        self._lock = NO_LOCK
+        self._init_listeners()
+    
+    def _init_listeners(self) -> None:
+        """Initialize the listeners for all events and for price changes only"""
+        Observable._init_listeners(self)
+        self._price_listeners = ()
+    
+    def add_price_listener(self, listener: Listener) -> None:
+        """
+        Subscribe to price changes only
+        
+        Carts use this so that stock changes of popular products are not
+        fanned out to every cart holding them.
+        
+        Args:
+            listener: Callable invoked as listener(product, "price", old_price)
+        """
+        with _LISTENERS_LOCK:
+            self._price_listeners = _with_listener(self._price_listeners, listener)
+    
+    def remove_price_listener(self, listener: Listener) -> bool:
+        """
+        Unsubscribe from price changes
+        
+        Args:
+            listener: Previously added price listener
+            
+        Returns:
+            bool: True if listener removed successfully
+        """
+        with _LISTENERS_LOCK:
+            if listener not in self._price_listeners:
+                return False
+            self._price_listeners = _without_listener(self._price_listeners, listener)
+        return True
     
-    def update_price(self, new_price: float) -> bool:
+    def _notify(self, event: str, old_value=None) -> None:
+        """
+        Notify all listeners, and price listeners about price changes
+        
+        Args:
+            event: Name of the changed attribute or action
+            old_value: Value before the change
+        """
+        Observable._notify(self, event, old_value)
+        if event == "price" and self._price_listeners:
+            _call_listeners(self._price_listeners, self, event, old_value)
+    
+    def update_price(self, new_price: float, minor_units: bool = False) -> bool:
         """
         Update the product price
         
+        Once the product is in a money="cents" store the new price is read in
+        major units, int or float alike, and converted to minor units, like
+        prices of products being added.
+        
         Args:
             new_price: New price for the product
+            minor_units: The price is already in minor units (cents stores only)
             
         Returns:
             bool: True if price updated successfully
         """
-        if new_price < 0:
+        if new_price < 0 or not math.isfinite(new_price):
             return False
-        self.price = new_price
+        if self._cents and not minor_units:
+            new_price = to_minor(new_price)
+        with self._lock:
+            old_price = self.price
+            self.price = new_price
+        # Notified outside the lock: carts holding this product lock themselves
+        # in the handler, while checkout locks the cart before its products
+        self._notify("price", old_price)
         return True
     
     def update_stock(self, quantity: int) -> bool:
@@ -48,10 +118,34 @@ class Product:
         Returns:
             bool: True if stock updated successfully
         """
-        new_stock = self.stock + quantity
-        if new_stock < 0:
-            return False
-        self.stock = new_stock
+        with self._lock:
+            old_stock = self.stock
+            new_stock = old_stock + quantity
+            if new_stock < 0:
+                return False
+            self.stock = new_stock
+            self._notify("stock", old_stock)
+        return True
+    
+    def update_details(self, name: Optional[str] = None, description: Optional[str] = None) -> bool:
+        """
+        Update the product name and/or description
+        
+        Args:
+            name: New name (optional)
+            description: New description (optional)
+            
+        Returns:
+            bool: True if details updated successfully
+        """
+        with self._lock:
+            old_details = (self.name, self.description)
+            if name:
+                self.name = name
+            if description is not None:
+                self.description = description
+            if (self.name, self.description) != old_details:
+                self._notify("details", old_details)
         return True
     
     def is_available(self) -> bool:
@@ -67,20 +161,25 @@ class Product:
         """
         Calculate discounted prices
         
+        In a money="cents" store the price stays exact: the discount is
+        rounded half up to a whole minor unit (see src.money.discount_minor).
+        
         Args:
             discount_percent: Discount percentage (0-100)
             
         Returns:
-            float: Discounted price
+            float: Discounted price (int in minor units in a money="cents" store)
         """
         if discount_percent < 0 or discount_percent > 100:
             return self.price
+        if self._cents:
+            return discount_minor(self.price, discount_percent)
         discount_amount = self.price * (discount_percent / 100)
         return self.price - discount_amount
     
     def __str__(self) -> str:
         """String representation of the product"""
-        return f"Product(id={self.product_id}, name={self.name}, price=${self.price:.2f}, stock={self.stock})"
+        return f"Product(id={self.product_id}, name={self.name}, price=${format_amount(self.price, self._cents)}, stock={self.stock})"
     
     def __repr__(self) -> str:
         """Official string representation"""
@@ -0,0 +1,375 @@
+"""
+Promotion rules compiled into per-product evaluators and applied to cart totals
+"""
+
+import math
+import threading
+from bisect import bisect_right
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Set, Tuple, Union
+from src.cart import Cart
+from src.money import Amount, discount_minor, to_minor
+
+# Discount of one line given its unit price and quantity
+LineEvaluator = Callable[[Amount, int], Amount]
+
+
+class BuyXGetY(NamedTuple):
+    """Of every buy + get units of a product, get units are free"""
+    rule_id: str
+    product_id: str
+    buy: int
+    get: int = 1
+
+
+class PercentOff(NamedTuple):
+    """Percentage off every line of the listed products, e.g. a category sale"""
+    rule_id: str
+    product_ids: FrozenSet[str]
+    percent: float
+
+
+class CartThreshold(NamedTuple):
+    """Percentage or fixed amount off carts whose total after line discounts reaches min_subtotal"""
+    rule_id: str
+    min_subtotal: Amount
+    percent: float = 0
+    amount_off: Amount = 0
+
+
+class Coupon(NamedTuple):
+    """One user's percentage or fixed amount off, once the total after thresholds reaches min_subtotal"""
+    rule_id: str
+    user_id: str
+    percent: float = 0
+    amount_off: Amount = 0
+    min_subtotal: Amount = 0
+
+
+Rule = Union[BuyXGetY, PercentOff, CartThreshold, Coupon]
+
+
+class CartPricing(NamedTuple):
+    """Cart total before and after promotions"""
+    subtotal: Amount
+    discount: Amount
+    total: Amount
+    applied: Tuple[Tuple[str, Amount], ...]  # (rule_id, discount) of every rule that applied
+
+
+def percent_of(amount: Amount, percent: float, cents: bool = False) -> Amount:
+    """
+    A percentage of an amount
+
+    Args:
+        amount: Amount in major units, or int in minor units if cents is True
+        percent: Percentage (0-100)
+        cents: Round the result half up to a whole minor unit
+
+    Returns:
+        Amount: Discount
+    """
+    if cents:
+        return amount - discount_minor(amount, percent)
+    return amount * percent / 100
+
+
+def _line_evaluator(rule: Rule, cents: bool) -> LineEvaluator:
+    """Compile a product rule into a function of (unit price, quantity)"""
+    if isinstance(rule, BuyXGetY):
+        group, free = rule.buy + rule.get, rule.get
+        return lambda price, quantity: price * (quantity // group * free)
+    percent = rule.percent
+    return lambda price, quantity: percent_of(price * quantity, percent, cents)
+
+
+def _validate(rule: Rule, cents: bool) -> Rule:
+    """
+    Reject rules that could never apply or would overcharge
+
+    Args:
+        rule: Rule to check
+        cents: Whether the engine prices carts in minor units
+
+    Returns:
+        Rule: The rule, with its amounts converted from major to minor units if cents is True
+    """
+    if isinstance(rule, BuyXGetY):
+        if rule.buy < 1 or rule.get < 1:
+            raise ValueError(f"Rule {rule.rule_id}: buy and get must be at least 1")
+    elif isinstance(rule, PercentOff):
+        if not 0 < rule.percent <= 100:
+            raise ValueError(f"Rule {rule.rule_id}: percent must be in (0, 100]")
+    elif isinstance(rule, (CartThreshold, Coupon)):
+        if (rule.percent > 0) == (rule.amount_off > 0) or not 0 <= rule.percent <= 100:
+            raise ValueError(f"Rule {rule.rule_id}: give either a percent in (0, 100] or an amount_off")
+        if not (math.isfinite(rule.amount_off) and math.isfinite(rule.min_subtotal)):
+            raise ValueError(f"Rule {rule.rule_id}: amounts must be finite")
+        if cents:
+            # Like product prices, amounts are given in major units
+            rule = rule._replace(amount_off=to_minor(rule.amount_off),
+                                 min_subtotal=to_minor(rule.min_subtotal))
+    else:
+        raise ValueError(f"Unknown rule type: {type(rule).__name__}")
+    return rule
+
+
+def _best_cart_discount(amount: Amount, rules: Iterable[Union[CartThreshold, Coupon]], cents: bool) -> Tuple:
+    """
+    Largest discount of eligible cart rules on an amount
+
+    Returns:
+        (rule_id, discount), or (None, 0) if no rule applies
+    """
+    best_id, best = None, 0
+    for rule in rules:
+        if amount < rule.min_subtotal:
+            continue
+        discount = percent_of(amount, rule.percent, cents) if rule.percent else rule.amount_off
+        if discount > best:
+            best_id, best = rule.rule_id, discount
+    return best_id, min(best, amount)
+
+
+class PromotionEngine:
+    """
+    Active promotion rules, compiled so a cart only evaluates the rules for its lines
+
+    Product rules (BuyXGetY, PercentOff) are compiled into evaluators indexed
+    by product ID, keeping only the best PercentOff of each product. Cart thresholds are kept sorted by min_subtotal with the
+    best percentage and amount seen so far, so one bisect finds the best
+    eligible threshold. Coupons are indexed by user ID.
+
+    Every line gets its best product rule, then the cart gets its best
+    threshold, then the user's best coupon applies to what is left. Results
+    are memoized on the cart until the cart or the rule set changes.
+
+    Rule changes rebuild the affected index entries and swap them in whole,
+    so carts can be priced from other threads while rules change.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = (), money: str = "float"):
+        """
+        Initialize the engine
+
+        Args:
+            rules: Initial rules
+            money: Money mode of the store the engine prices carts for
+                   ("float" or "cents", see Store)
+        """
+        if money not in ("float", "cents"):
+            raise ValueError(f"Unknown money mode: {money}")
+        self.money = money
+        self._cents = money == "cents"
+        self.version = 0  # incremented by every rule change
+        self._rules: Dict[str, Rule] = {}
+        self._product_rules: Dict[str, List[Union[BuyXGetY, PercentOff]]] = {}
+        # Compiled from _product_rules: {product_id: ((rule_id, evaluator), ...)}
+        self._line_rules: Dict[str, Tuple[Tuple[str, LineEvaluator], ...]] = {}
+        self._threshold_rules: List[CartThreshold] = []
+        # (min subtotals ascending, best (rule_id, percent) and (rule_id, amount_off) up to each)
+        self._thresholds: Tuple[List, List] = ([], [])
+        self._coupons: Dict[str, Tuple[Coupon, ...]] = {}
+        self._lock = threading.Lock()
+        self.add_rules(rules)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def get_rule(self, rule_id: str):
+        """
+        Get an active rule
+
+        Args:
+            rule_id: ID of the rule
+
+        Returns:
+            Rule or None if not active
+        """
+        return self._rules.get(rule_id)
+
+    def add_rule(self, rule: Rule) -> bool:
+        """
+        Activate a rule
+
+        Args:
+            rule: BuyXGetY, PercentOff, CartThreshold or Coupon
+
+        Returns:
+            bool: True if added, False if a rule with that ID is already active
+        """
+        return not self.add_rules([rule])
+
+    def add_rules(self, rules: Iterable[Rule]) -> List[str]:
+        """
+        Activate many rules at once
+
+        Args:
+            rules: Rules to add
+
+        Raises:
+            ValueError: For an invalid rule; rules before it stay active
+
+        Returns:
+            List of rule IDs that were skipped because they are already active
+        """
+        skipped = []
+        with self._lock:
+            changed_products: Set[str] = set()
+            thresholds_changed = False
+            try:
+                for rule in rules:
+                    rule = _validate(rule, self._cents)
+                    if rule.rule_id in self._rules:
+                        skipped.append(rule.rule_id)
+                        continue
+                    self._rules[rule.rule_id] = rule
+                    if isinstance(rule, CartThreshold):
+                        self._threshold_rules.append(rule)
+                        thresholds_changed = True
+                    elif isinstance(rule, Coupon):
+                        self._coupons[rule.user_id] = self._coupons.get(rule.user_id, ()) + (rule,)
+                    else:
+                        for product_id in self._products_of(rule):
+                            self._product_rules.setdefault(product_id, []).append(rule)
+                            changed_products.add(product_id)
+            finally:
+                for product_id in changed_products:
+                    self._compile_product(product_id)
+                if thresholds_changed:
+                    self._compile_thresholds()
+                self.version += 1
+        return skipped
+
+    def remove_rule(self, rule_id: str) -> bool:
+        """
+        Deactivate a rule
+
+        Args:
+            rule_id: ID of the rule
+
+        Returns:
+            bool: True if the rule was active
+        """
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            if isinstance(rule, (BuyXGetY, PercentOff)):
+                for product_id in self._products_of(rule):
+                    self._product_rules[product_id].remove(rule)
+                    self._compile_product(product_id)
+            elif isinstance(rule, CartThreshold):
+                self._threshold_rules.remove(rule)
+                self._compile_thresholds()
+            else:
+                remaining = tuple(coupon for coupon in self._coupons[rule.user_id] if coupon.rule_id != rule_id)
+                if remaining:
+                    self._coupons[rule.user_id] = remaining
+                else:
+                    del self._coupons[rule.user_id]
+            self.version += 1
+        return True
+
+    @staticmethod
+    def _products_of(rule: Union[BuyXGetY, PercentOff]) -> Iterable[str]:
+        """Product IDs a product rule applies to"""
+        return (rule.product_id,) if isinstance(rule, BuyXGetY) else rule.product_ids
+
+    def _compile_product(self, product_id: str) -> None:
+        """
+        Rebuild the evaluators of one product; the caller must hold the engine lock
+
+        A larger percentage always gives a larger discount, so only the best
+        PercentOff rule of a product is kept.
+        """
+        rules = self._product_rules.get(product_id)
+        if not rules:
+            self._product_rules.pop(product_id, None)
+            self._line_rules.pop(product_id, None)
+            return
+        entries = [(rule.rule_id, _line_evaluator(rule, self._cents)) for rule in rules if isinstance(rule, BuyXGetY)]
+        best_percent = None
+        for rule in rules:
+            if isinstance(rule, PercentOff) and (best_percent is None or rule.percent > best_percent.percent):
+                best_percent = rule
+        if best_percent is not None:
+            entries.append((best_percent.rule_id, _line_evaluator(best_percent, self._cents)))
+        self._line_rules[product_id] = tuple(entries)
+
+    def _compile_thresholds(self) -> None:
+        """Rebuild the sorted thresholds with running best percentage and amount"""
+        mins = []
+        best = []
+        best_percent = best_amount = (None, 0)
+        for rule in sorted(self._threshold_rules, key=lambda rule: rule.min_subtotal):
+            if rule.percent > best_percent[1]:
+                best_percent = (rule.rule_id, rule.percent)
+            if rule.amount_off > best_amount[1]:
+                best_amount = (rule.rule_id, rule.amount_off)
+            mins.append(rule.min_subtotal)
+            best.append((best_percent, best_amount))
+        self._thresholds = (mins, best)
+
+    def price_cart(self, cart: Cart) -> CartPricing:
+        """
+        Price a cart with the active promotions
+
+        Returns the memoized result while neither the cart nor the rules
+        have changed.
+
+        Args:
+            cart: Cart to price
+
+        Returns:
+            CartPricing: Subtotal, discount, total and the rules that applied
+        """
+        cached = cart._pricing
+        if cached is not None and cached[0] is self and cached[1] == self.version:
+            return cached[2]
+        with cart._lock:
+            version = self.version
+            pricing = self._evaluate(cart)
+            cart._pricing = (self, version, pricing)
+        return pricing
+
+    def _evaluate(self, cart: Cart) -> CartPricing:
+        """Apply line rules, then the best threshold, then the best coupon"""
+        subtotal = cart.get_total()
+        applied = []
+        discount = 0
+        line_rules = self._line_rules
+        unit_prices = cart._unit_prices
+        for product_id, quantity in cart.items.items():
+            evaluators = line_rules.get(product_id)
+            if evaluators is None:
+                continue
+            price = unit_prices[product_id]
+            best_id, best = None, 0
+            for rule_id, evaluate in evaluators:
+                amount = evaluate(price, quantity)
+                if amount > best:
+                    best_id, best = rule_id, amount
+            if best_id is not None:
+                applied.append((best_id, best))
+                discount += best
+
+        remaining = subtotal - discount
+        mins, best = self._thresholds
+        position = bisect_right(mins, remaining)
+        if position:
+            (percent_id, percent), (amount_id, amount_off) = best[position - 1]
+            percent_discount = percent_of(remaining, percent, self._cents) if percent else 0
+            rule_id, amount = ((percent_id, percent_discount) if percent_discount >= amount_off
+                               else (amount_id, amount_off))
+            amount = min(amount, remaining)
+            if amount > 0:
+                applied.append((rule_id, amount))
+                discount += amount
+                remaining -= amount
+
+        rule_id, amount = _best_cart_discount(remaining, self._coupons.get(cart.user_id, ()), self._cents)
+        if rule_id is not None:
+            applied.append((rule_id, amount))
+            discount += amount
+            remaining -= amount
+        return CartPricing(subtotal, discount, remaining, tuple(applied))
@@ -0,0 +1,95 @@
+"""
+Inverted token index for fast product search
+"""
+
+import re
+from typing import Dict, Iterable, List, Set
+from src.product import Product
+
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search tokens
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens in order of appearance
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """Maps search tokens to the IDs of the products containing them"""
+
+    def __init__(self):
+        """Initialize an empty index"""
+        # {token: {product_id: None}} - dicts keep insertion order
+        self.postings: Dict[str, Dict[str, None]] = {}
+        self.product_tokens: Dict[str, Set[str]] = {}  # {product_id: tokens}
+
+    def add_product(self, product: Product) -> None:
+        """
+        Index a product's name and description
+
+        Args:
+            product: Product object to index
+        """
+        tokens = set(tokenize(product.name))
+        tokens.update(tokenize(product.description))
+        self.product_tokens[product.product_id] = tokens
+        for token in tokens:
+            self.postings.setdefault(token, {})[product.product_id] = None
+
+    def remove_product(self, product_id: str) -> None:
+        """
+        Remove a product from the index
+
+        Args:
+            product_id: ID of the product to remove
+        """
+        for token in self.product_tokens.pop(product_id, ()):
+            posting = self.postings[token]
+            del posting[product_id]
+            if not posting:
+                del self.postings[token]
+
+    def update_product(self, product: Product) -> None:
+        """
+        Re-index a product after its name or description changed
+
+        Args:
+            product: Product object to re-index
+        """
+        self.remove_product(product.product_id)
+        self.add_product(product)
+
+    def search(self, keywords: Iterable[str], match_all: bool = True) -> List[str]:
+        """
+        Find products containing the given tokens
+
+        Args:
+            keywords: Lowercase tokens to look up
+            match_all: True for AND semantics, False for OR semantics
+
+        Returns:
+            List of matching product IDs
+        """
+        postings = [self.postings.get(token, {}) for token in set(keywords)]
+        if not postings:
+            return []
+
+        if match_all:
+            postings.sort(key=len)
+            smallest, rest = postings[0], postings[1:]
+            return [product_id for product_id in smallest
+                    if all(product_id in posting for posting in rest)]
+
+        results: Dict[str, None] = {}
+        for posting in postings:
+            results.update(posting)
+        return list(results)
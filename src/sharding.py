@@ -0,0 +1,519 @@
+"""
+Process-sharded store front-end for using several cores
+
+Users, carts and orders are partitioned across worker processes by a stable
+hash of user_id; every worker runs its own Store. The front-end process owns
+the product catalog and its stock, so stock is reserved centrally before a
+shard turns a cart into an order. Catalog changes are replicated to all
+shards so carts and orders see current names and prices.
+"""
+
+import multiprocessing
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from src.locking import OrderIdAllocator
+from src.order import Order, OrderStatus
+from src.persistence import order_from_dict, order_to_dict, product_to_dict
+from src.product import Product
+from src.store import Store
+from src.user import User
+
+
+def shard_for(user_id: str, shards: int) -> int:
+    """
+    Pick the shard owning a user (stable across processes and restarts)
+
+    Args:
+        user_id: ID of the user
+        shards: Number of shards
+
+    Returns:
+        int: Shard index
+    """
+    return zlib.crc32(user_id.encode("utf-8")) % shards
+
+
+# Worker-side command handlers, each called as handler(store, *args)
+
+def _add_products(store: Store, records: List[Dict]) -> None:
+    # Prices come from the catalog store, already converted in a cents store
+    store.add_products((Product(record['product_id'], record['name'], record['price'],
+                                record['description'], record['stock']) for record in records),
+                       minor_units=True)
+
+
+def _remove_product(store: Store, product_id: str) -> None:
+    store.remove_product(product_id)
+
+
+def _update_price(store: Store, product_id: str, price: float) -> None:
+    product = store.get_product(product_id)
+    if product is not None:
+        product.update_price(price, minor_units=True)
+
+
+def _register_users(store: Store, records: List[Tuple[str, str, str, str]]) -> List[str]:
+    return store.register_users(User(*record) for record in records)
+
+
+def _add_items(store: Store, lines: List[Tuple[str, str, int]]) -> List[bool]:
+    results = []
+    for user_id, product_id, quantity in lines:
+        user = store.get_user(user_id)
+        product = store.get_product(product_id)
+        if user is None or product is None:
+            results.append(False)
+            continue
+        # Stock is checked by the front-end, the replica's stock is not authoritative
+        cart = user.cart
+        cart._set_quantity(product, cart.items.get(product_id, 0) + quantity)
+        results.append(True)
+    return results
+
+
+def _get_carts(store: Store, user_ids: List[str]) -> Dict[str, Optional[Dict[str, int]]]:
+    carts = {}
+    for user_id in user_ids:
+        user = store.get_user(user_id)
+        carts[user_id] = dict(user.cart.items) if user else None
+    return carts
+
+
+def _create_orders(store: Store, requests: List[Tuple[str, str, str]]) -> List[Dict]:
+    orders = []
+    for user_id, order_id, shipping_address in requests:
+        user = store.get_user(user_id)
+        cart = user.cart
+        total = store._charged_total(cart)
+        order = Order.from_items(order_id, user_id, cart.get_line_items(store._product_refs),
+                                 cart.get_total() if total is None else total,
+                                 shipping_address or user.address)
+        orders.append(order)
+        user.clear_cart()
+    store._add_orders(orders)
+    return [order_to_dict(order) for order in orders]
+
+
+def _get_user_orders(store: Store, user_id: str) -> List[Dict]:
+    return [order_to_dict(order) for order in store.get_user_orders(user_id)]
+
+
+def _transition_order(store: Store, order_id: str, action: str) -> bool:
+    order = store.get_order(order_id)
+    if order is None:
+        return False
+    return getattr(order, action)()
+
+
+def _statistics(store: Store) -> Dict:
+    return store.get_store_statistics()
+
+
+_HANDLERS: Dict[str, Callable] = {
+    'add_products': _add_products,
+    'remove_product': _remove_product,
+    'update_price': _update_price,
+    'register_users': _register_users,
+    'add_items': _add_items,
+    'get_carts': _get_carts,
+    'create_orders': _create_orders,
+    'get_user_orders': _get_user_orders,
+    'transition_order': _transition_order,
+    'statistics': _statistics,
+}
+
+_ORDER_ACTIONS = ('confirm_order', 'process_order', 'ship_order', 'deliver_order', 'cancel_order')
+
+
+def _worker_main(connection, store_name: str, money: str) -> None:
+    """
+    Serve commands for one shard until told to stop
+
+    Args:
+        connection: Pipe end connected to the front-end
+        store_name: Name of the shard's store
+        money: Money mode of the shard's store, the same as the front-end's
+    """
+    store = Store(store_name, money=money)
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            connection.close()
+            return
+        try:
+            connection.send((True, _HANDLERS[command](store, *args)))
+        except Exception as error:  # report to the caller instead of killing the shard
+            connection.send((False, error))
+
+
+class ShardedStore:
+    """Store front-end that spreads users, carts and orders over worker processes"""
+
+    def __init__(self, store_name: str, processes: int = 0, money: str = "float"):
+        """
+        Start the worker processes
+
+        Args:
+            store_name: Name of the store
+            processes: Number of shards (defaults to the CPU count)
+            money: "float" or "cents", as for Store
+        """
+        self.store_name = store_name
+        self.catalog = Store(store_name, money=money)  # authoritative products and stock
+        self._order_ids = OrderIdAllocator()
+        self._order_shards: Dict[str, int] = {}  # {order_id: shard}
+        self._lock = threading.RLock()
+        self._connections = []
+        self._processes = []
+        for shard in range(processes or multiprocessing.cpu_count()):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_main,
+                                              args=(child, f"{store_name} #{shard}", money), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    @property
+    def shards(self) -> int:
+        """Number of worker processes"""
+        return len(self._connections)
+
+    def _call_all(self, requests: Dict[int, Tuple[str, tuple]]) -> Dict[int, object]:
+        """
+        Send one command per shard, then collect the replies so shards work in parallel
+
+        Args:
+            requests: {shard: (command, args)}
+
+        Returns:
+            Dict: {shard: result}
+        """
+        with self._lock:
+            for shard, request in requests.items():
+                self._connections[shard].send(request)
+            replies = {shard: self._connections[shard].recv() for shard in requests}
+        results = {}
+        for shard, (ok, result) in replies.items():
+            if not ok:
+                raise result
+            results[shard] = result
+        return results
+
+    def _call(self, shard: int, command: str, *args) -> object:
+        """Run one command on one shard"""
+        return self._call_all({shard: (command, args)})[shard]
+
+    def _broadcast(self, command: str, *args) -> None:
+        """Run one command on every shard"""
+        self._call_all({shard: (command, args) for shard in range(self.shards)})
+
+    def _group_by_shard(self, user_ids: Iterable[str]) -> Dict[int, List[str]]:
+        """Split user IDs by owning shard"""
+        groups: Dict[int, List[str]] = {}
+        for user_id in user_ids:
+            groups.setdefault(shard_for(user_id, self.shards), []).append(user_id)
+        return groups
+
+    def add_product(self, product: Product) -> bool:
+        """
+        Add a product to the central catalog and replicate it to all shards
+
+        Args:
+            product: Product object to add
+
+        Returns:
+            bool: True if product added successfully
+        """
+        return not self.add_products([product])
+
+    def add_products(self, products: Iterable[Product]) -> List[str]:
+        """
+        Add many products to the central catalog and replicate them
+
+        Args:
+            products: Product objects to add
+
+        Returns:
+            List of IDs that were skipped because they already exist
+        """
+        products = list(products)
+        with self._lock:
+            skipped = self.catalog.add_products(products)
+            rejected = set(skipped)
+            self._broadcast('add_products', [product_to_dict(product) for product in products
+                                             if product.product_id not in rejected])
+        return skipped
+
+    def remove_product(self, product_id: str) -> bool:
+        """
+        Remove a product from the catalog and all shards
+
+        Args:
+            product_id: ID of the product to remove
+
+        Returns:
+            bool: True if product removed successfully
+        """
+        with self._lock:
+            if not self.catalog.remove_product(product_id):
+                return False
+            self._broadcast('remove_product', product_id)
+        return True
+
+    def get_product(self, product_id: str) -> Optional[Product]:
+        """
+        Get a product from the central catalog
+
+        Args:
+            product_id: ID of the product
+
+        Returns:
+            Product or None if not found
+        """
+        return self.catalog.get_product(product_id)
+
+    def update_price(self, product_id: str, new_price: float) -> bool:
+        """
+        Change a product's price everywhere
+
+        Args:
+            product_id: ID of the product
+            new_price: New price
+
+        Returns:
+            bool: True if price updated successfully
+        """
+        with self._lock:
+            product = self.catalog.get_product(product_id)
+            if product is None or not product.update_price(new_price):
+                return False
+            self._broadcast('update_price', product_id, product.price)  # as converted by the catalog
+        return True
+
+    def register_user(self, user: User) -> bool:
+        """
+        Register a user on its shard
+
+        Args:
+            user: User object to register
+
+        Returns:
+            bool: True if user registered successfully
+        """
+        return not self.register_users([user])
+
+    def register_users(self, users: Iterable[User]) -> List[str]:
+        """
+        Register many users, one request per shard
+
+        Args:
+            users: User objects to register
+
+        Returns:
+            List of IDs that were skipped because they already exist
+        """
+        groups: Dict[int, List[Tuple[str, str, str, str]]] = {}
+        for user in users:
+            groups.setdefault(shard_for(user.user_id, self.shards), []).append(
+                (user.user_id, user.name, user.email, user.address))
+        results = self._call_all({shard: ('register_users', (records,))
+                                  for shard, records in groups.items()})
+        return [user_id for skipped in results.values() for user_id in skipped]
+
+    def add_to_cart(self, user_id: str, product_id: str, quantity: int = 1) -> bool:
+        """
+        Add a product to a user's cart
+
+        Args:
+            user_id: ID of the user
+            product_id: ID of the product
+            quantity: Quantity to add
+
+        Returns:
+            bool: True if item added successfully
+        """
+        return self.add_to_carts([(user_id, product_id, quantity)])[0]
+
+    def add_to_carts(self, lines: Iterable[Tuple[str, str, int]]) -> List[bool]:
+        """
+        Add many (user_id, product_id, quantity) lines to carts
+
+        Stock is checked against the central catalog, like Cart.add_item.
+
+        Args:
+            lines: Cart lines to add
+
+        Returns:
+            List of success flags in input order
+        """
+        lines = list(lines)
+        results = [False] * len(lines)
+        groups: Dict[int, List[int]] = {}
+        for position, (user_id, product_id, quantity) in enumerate(lines):
+            product = self.catalog.get_product(product_id)
+            if quantity > 0 and product is not None and product.stock >= quantity:
+                groups.setdefault(shard_for(user_id, self.shards), []).append(position)
+        replies = self._call_all({shard: ('add_items', ([lines[p] for p in positions],))
+                                  for shard, positions in groups.items()})
+        for shard, positions in groups.items():
+            for position, added in zip(positions, replies[shard]):
+                results[position] = added
+        return results
+
+    def create_order(self, user_id: str, shipping_address: str = "") -> Optional[Order]:
+        """
+        Create an order from a user's cart
+
+        Args:
+            user_id: ID of the user
+            shipping_address: Shipping address (defaults to the user's address)
+
+        Returns:
+            Detached copy of the Order, or None if creation failed
+        """
+        return self.create_orders([user_id], shipping_address)[user_id]['order']
+
+    def create_orders(self, user_ids: Iterable[str], shipping_address: str = "") -> Dict[str, Dict]:
+        """
+        Check out many users; shards build their orders in parallel
+
+        Args:
+            user_ids: IDs of the users checking out
+            shipping_address: Shipping address (defaults to each user's address)
+
+        Returns:
+            Dict: {user_id: {'order': Order or None, 'error': None or failure reason}},
+                  with detached copies of the orders
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        results = {user_id: {'order': None, 'error': None} for user_id in user_ids}
+        with self._lock:
+            groups = self._group_by_shard(user_ids)
+            carts = {}
+            for reply in self._call_all({shard: ('get_carts', (ids,))
+                                         for shard, ids in groups.items()}).values():
+                carts.update(reply)
+
+            accepted: List[str] = []
+            for user_id in user_ids:
+                cart = carts[user_id]
+                if cart is None:
+                    results[user_id]['error'] = "user not found"
+                elif not cart:
+                    results[user_id]['error'] = "cart is empty"
+                else:
+                    short = self._reserve(cart)
+                    if short is None:
+                        accepted.append(user_id)
+                    else:
+                        results[user_id]['error'] = f"insufficient stock for {short}"
+
+            requests: Dict[int, List[Tuple[str, str, str]]] = {}
+            for user_id, order_id in zip(accepted, self._order_ids.allocate(len(accepted))):
+                shard = shard_for(user_id, self.shards)
+                requests.setdefault(shard, []).append((user_id, order_id, shipping_address))
+                self._order_shards[order_id] = shard
+            replies = self._call_all({shard: ('create_orders', (batch,))
+                                      for shard, batch in requests.items()})
+        for records in replies.values():
+            for record in records:
+                results[record['user_id']]['order'] = order_from_dict(record, self.catalog._product_refs)
+        return results
+
+    def _reserve(self, cart: Dict[str, int]) -> Optional[str]:
+        """
+        Reserve central stock for a cart
+
+        Args:
+            cart: {product_id: quantity}
+
+        Returns:
+            None if stock reserved successfully, else the ID of a product that is short
+        """
+        products = {}
+        for product_id, quantity in cart.items():
+            product = self.catalog.get_product(product_id)
+            if product is None or product.stock < quantity:
+                return product_id
+            products[product_id] = product
+        # The front-end lock serializes reservations, so the check above still holds
+        self.catalog._reserve_stock(cart, products)
+        return None
+
+    def get_user_orders(self, user_id: str) -> List[Order]:
+        """
+        Get all orders for a user
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            List of detached copies of the orders
+        """
+        records = self._call(shard_for(user_id, self.shards), 'get_user_orders', user_id)
+        return [order_from_dict(record, self.catalog._product_refs) for record in records]
+
+    def transition_order(self, order_id: str, action: str) -> bool:
+        """
+        Apply a status method to an order on its shard
+
+        Args:
+            order_id: ID of the order
+            action: One of confirm_order, process_order, ship_order,
+                    deliver_order, cancel_order
+
+        Returns:
+            bool: True if order status updated successfully
+        """
+        if action not in _ORDER_ACTIONS:
+            raise ValueError(f"Unknown order action: {action}")
+        shard = self._order_shards.get(order_id)
+        if shard is None:
+            return False
+        return self._call(shard, 'transition_order', order_id, action)
+
+    def get_store_statistics(self) -> Dict:
+        """
+        Get store statistics aggregated over all shards
+
+        Returns:
+            Dict: Store statistics in the same shape as Store.get_store_statistics
+        """
+        catalog = self.catalog.get_store_statistics()
+        shards = self._call_all({shard: ('statistics', ()) for shard in range(self.shards)})
+        orders_by_status = {status.value: 0 for status in OrderStatus}
+        for stats in shards.values():
+            for status, count in stats['orders_by_status'].items():
+                orders_by_status[status] += count
+        return {
+            'store_name': self.store_name,
+            'total_products': catalog['total_products'],
+            'available_products': catalog['available_products'],
+            'total_users': sum(stats['total_users'] for stats in shards.values()),
+            'total_orders': sum(stats['total_orders'] for stats in shards.values()),
+            'total_revenue': sum(stats['total_revenue'] for stats in shards.values()),
+            'orders_by_status': orders_by_status
+        }
+
+    def close(self) -> None:
+        """Stop all worker processes"""
+        with self._lock:
+            for connection, process in zip(self._connections, self._processes):
+                if process.is_alive():
+                    connection.send(('close', ()))
+                connection.close()
+            for process in self._processes:
+                process.join()
+            self._connections, self._processes = [], []
+
+    def __enter__(self) -> 'ShardedStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        """String representation of the sharded store"""
+        return f"ShardedStore(name={self.store_name}, shards={self.shards}, products={len(self.catalog.products)})"
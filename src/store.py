@@ -2,40 +2,191 @@
 Store class for managing the e-commerce store
 """
 
-from typing import Dict, List, Optional
+import math
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from typing import IO, TYPE_CHECKING, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple, Union
+from src.autocomplete import Autocomplete, Score
+from src.line_items import LineItems, ProductRefs, intern_product
+from src.locking import NO_LOCK, OrderIdAllocator, StripedLock
+from src.money import to_minor
+from src.observable import Observable
 from src.product import Product
 from src.user import User
-from src.order import Order, OrderStatus
+from src.cart import Cart
+from src.order import TRANSITIONS, Order, OrderStatus
+from src.order_index import OrderIndex
+from src.order_timeline import OrderRollups, OrderTimeline
+from src.price_index import PriceIndex, PriceKey
+from src.search_index import SearchIndex, tokenize
+from src.store_stats import StoreCounters
 
+if TYPE_CHECKING:
+    # Imported where used, so workers that never call them start faster
+    from src.cart_manager import CartManager
+    from src.promotions import CartPricing, PromotionEngine
 
-class Store:
-    """Represents the main e-commerce store"""
+
+class Store(Observable):
+    """
+    Represents the main e-commerce store
+    
+    Listeners added with add_listener() receive a feed of every mutation as
+    listener(store, event, payload):
+        "product_added" / "product_removed": Product
+        "user_registered": User
+        "order_created": Order
+        "product_changed" / "user_changed" / "cart_changed" / "order_changed":
+            (entity, change, old_value) forwarded from the entity's own events
+    """
     
-    def __init__(self, store_name: str):
+    def __init__(self, store_name: str, catalog: str = "dict", thread_safe: bool = False,
+                 money: str = "float"):
         """
         Initialize the store
         
         Args:
             store_name: Name of the store
+            catalog: "dict" to keep Product objects in a dict, "columnar" to keep
+                     prices and stock in NumPy arrays (requires numpy), "mvcc" to
+                     also publish immutable catalog versions for lock-free readers
+            thread_safe: Guard products, users, carts and orders with striped
+                         locks so the store can be shared between threads
+            money: "float" for float prices, "cents" to keep every price, cart
+                   and order total and revenue figure as an exact int in minor
+                   units (prices are given in major units and converted, see
+                   add_product())
         """
+        if money not in ("float", "cents"):
+            raise ValueError(f"Unknown money mode: {money}")
+        if money == "cents" and catalog == "columnar":
+            raise ValueError("The columnar catalog stores float prices; use money=\"float\"")
         self.store_name = store_name
-        self.products: Dict[str, Product] = {}
+        self.money = money
+        self.products: MutableMapping[str, Product] = self._create_catalog(catalog)
+        self._versioned = catalog == "mvcc"
+        if catalog == "columnar":
+            self.products.add_listener(self._on_catalog_event)
         self.users: Dict[str, User] = {}
         self.orders: Dict[str, Order] = {}
+        # Versioned catalogs keep their own postings, which readers search instead
+        self._search_index: Optional[SearchIndex] = None if self._versioned else SearchIndex()
+        self._price_index = PriceIndex()
+        self._autocomplete = Autocomplete()
+        self._order_index = OrderIndex()
+        self._order_timeline = OrderTimeline()
+        self._rollups = OrderRollups()
+        self._counters = StoreCounters()
+        self._order_ids = OrderIdAllocator()
+        self._product_refs: ProductRefs = {}  # interned order line products, see intern_product()
+        self.cart_manager: Optional['CartManager'] = None  # set by manage_carts()
+        self.promotions: Optional['PromotionEngine'] = None  # set by use_promotions()
+        self._init_listeners()
+        
+        self.thread_safe = thread_safe
+        if thread_safe:
+            # Lock order: user -> product -> order -> index, the index lock is always innermost
+            self._index_lock = threading.RLock()
+            self._user_locks = StripedLock()
+            self._product_locks = StripedLock()
+            self._order_locks = StripedLock()
+        else:
+            self._index_lock = NO_LOCK
     
-    def add_product(self, product: Product) -> bool:
+    @staticmethod
+    def _create_catalog(catalog: str) -> MutableMapping[str, Product]:
+        """
+        Create the product mapping for the given catalog mode
+        
+        Args:
+            catalog: Catalog mode ("dict", "columnar" or "mvcc")
+            
+        Returns:
+            Empty product mapping
+        """
+        if catalog == "dict":
+            return {}
+        if catalog == "columnar":
+            from src.columnar_catalog import ColumnarCatalog
+            return ColumnarCatalog()
+        if catalog == "mvcc":
+            from src.versioned_catalog import VersionedCatalog
+            return VersionedCatalog()
+        raise ValueError(f"Unknown catalog mode: {catalog}")
+    
+    def add_product(self, product: Product, minor_units: bool = False) -> bool:
         """
         Add a product to the store
         
+        In a money="cents" store the price is read in major units, int or
+        float alike (100 is $100.00), and converted to minor units.
+        
+        Args:
+            product: Product object to add
+            minor_units: The price is already in minor units (cents stores
+                         only, e.g. when restoring a snapshot)
+            
+        Returns:
+            bool: True if product added successfully
+        """
+        with self._index_lock:
+            return self._insert_product(product, minor_units)
+    
+    def add_products(self, products: Iterable[Product], minor_units: bool = False) -> List[str]:
+        """
+        Add many products to the store at once
+        
+        Args:
+            products: Product objects to add
+            minor_units: Prices are already in minor units, see add_product()
+            
+        Returns:
+            List of IDs that were skipped because they already exist
+        """
+        with self._index_lock, self._catalog_batch():
+            return [product.product_id for product in products
+                    if not self._insert_product(product, minor_units)]
+    
+    def _catalog_batch(self):
+        """
+        Group catalog writes into one published version in "mvcc" mode
+        
+        Returns:
+            Context manager (does nothing for other catalogs)
+        """
+        return self.products.batch() if self._versioned else NO_LOCK
+    
+    def _insert_product(self, product: Product, minor_units: bool = False) -> bool:
+        """
+        Add a product and index it; the caller must hold the index lock
+        
         Args:
             product: Product object to add
+            minor_units: The price is already in minor units
             
         Returns:
             bool: True if product added successfully
         """
         if product.product_id in self.products:
             return False
+        if self.money == "cents":
+            # A product already added to a cents store holds minor units
+            if not (minor_units or product._cents):
+                product.price = to_minor(product.price)
+            product._cents = True
         self.products[product.product_id] = product
+        # Columnar catalogs store a view instead of the given object
+        product = self.products[product.product_id]
+        if self.thread_safe:
+            product._lock = self._product_locks.lock_for(product.product_id)
+        if self._search_index is not None:
+            self._search_index.add_product(product)
+        self._price_index.add_product(product)
+        self._autocomplete.add_product(product)
+        self._counters.product_added(product)
+        product.add_listener(self._on_product_event)
+        self._notify("product_added", product)
         return True
     
     def remove_product(self, product_id: str) -> bool:
@@ -48,9 +199,17 @@ class Store:
         Returns:
             bool: True if product removed successfully
         """
-        if product_id not in self.products:
-            return False
-        del self.products[product_id]
+        with self._index_lock:
+            if product_id not in self.products:
+                return False
+            product = self.products.pop(product_id)
+            product.remove_listener(self._on_product_event)
+            if self._search_index is not None:
+                self._search_index.remove_product(product_id)
+            self._price_index.remove_product(product_id)
+            self._autocomplete.remove_product(product_id)
+            self._counters.product_removed(product)
+            self._notify("product_removed", product)
         return True
     
     def get_product(self, product_id: str) -> Optional[Product]:
@@ -65,10 +224,71 @@ class Store:
         """
         return self.products.get(product_id)
     
-    def search_products(self, keyword: str) -> List[Product]:
+    def search_products(self, keyword: str, mode: str = "all") -> List[Product]:
         """
         Search products by keyword
         
+        With catalog="mvcc" the search reads one pinned catalog version
+        without taking locks, and results are sorted by product ID.
+        
+        Args:
+            keyword: Search keyword(s)
+            mode: "all" to match every keyword, "any" to match at least one,
+                  "substring" for a full scan matching the keyword anywhere
+            
+        Returns:
+            List of matching products
+        """
+        if mode == "substring":
+            return self._search_products_substring(keyword)
+        if mode not in ("all", "any"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        if self._versioned:
+            return self.products.lookup(self.products.snapshot().search(tokenize(keyword), mode == "all"))
+        
+        with self._index_lock:
+            product_ids = self._search_index.search(tokenize(keyword), match_all=(mode == "all"))
+            return [self.products[product_id] for product_id in product_ids]
+    
+    def autocomplete(self, text: str, limit: int = 10) -> List[Product]:
+        """
+        Suggest products for a search box as the user types
+        
+        Complete words must appear in the product name and the last word is
+        matched as a prefix. Suggestions are ranked by the autocomplete score
+        (stock unless changed with set_autocomplete_score()) and read from
+        per-token rankings. A prefix alone costs one step per token it matches
+        plus the suggestions read (one- and two-character prefixes are cached);
+        with complete words, the cost grows with the rarest word's products
+        when few of them match the rest of the query.
+        
+        Args:
+            text: Query typed so far
+            limit: Number of suggestions
+            
+        Returns:
+            List of products, best first
+        """
+        with self._index_lock:
+            return [self.products[product_id]
+                    for product_id in self._autocomplete.complete(text, limit)]
+    
+    def set_autocomplete_score(self, score: Score) -> None:
+        """
+        Change how autocomplete suggestions are ranked
+        
+        The score is re-read whenever a product's price, stock or details change.
+        
+        Args:
+            score: Ranking function called as score(product), higher first
+        """
+        with self._index_lock:
+            self._autocomplete.rebuild(self.products.values(), score)
+    
+    def _search_products_substring(self, keyword: str) -> List[Product]:
+        """
+        Search products by scanning every name and description
+        
         Args:
             keyword: Search keyword
             
@@ -76,26 +296,136 @@ class Store:
             List of matching products
         """
         keyword_lower = keyword.lower()
+        if self._versioned:
+            return [record.product for record in self.products.snapshot().records()
+                    if keyword_lower in record.name.lower() or keyword_lower in record.description.lower()]
         results = []
-        for product in self.products.values():
-            if (keyword_lower in product.name.lower() or 
-                keyword_lower in product.description.lower()):
-                results.append(product)
+        with self._index_lock:
+            for product in self.products.values():
+                if (keyword_lower in product.name.lower() or 
+                    keyword_lower in product.description.lower()):
+                    results.append(product)
         return results
     
+    def _on_product_event(self, product: Product, event: str, old_value) -> None:
+        """
+        Keep store indexes current when a product changes
+        
+        Args:
+            product: Product that changed
+            event: Name of the change
+            old_value: Value before the change
+        """
+        with self._index_lock:
+            if self._versioned:
+                self.products.refresh(product)
+            if event == "details":
+                if self._search_index is not None:
+                    self._search_index.update_product(product)
+                self._autocomplete.update_product(product)
+            elif event == "stock":
+                self._counters.stock_changed(product, old_value)
+                self._price_index.update_product(product)
+                self._autocomplete.update_product(product)
+            elif event == "price":
+                self._price_index.update_product(product)
+                self._autocomplete.update_product(product)
+        self._notify("product_changed", (product, event, old_value))
+    
+    def _on_catalog_event(self, catalog, event: str, changes: List[Tuple[Product, object]]) -> None:
+        """
+        Update the price index and autocomplete once for a bulk columnar update
+        
+        The per-product events that follow find the indexes already current.
+        
+        Args:
+            catalog: ColumnarCatalog that changed
+            event: "price" or "stock"
+            changes: (product, old value) per changed product
+        """
+        with self._index_lock:
+            products = [product for product, _ in changes]
+            self._price_index.update_products(products)
+            self._autocomplete.update_products(products)
+    
     def get_available_products(self) -> List[Product]:
         """
         Get all available products (in stock)
         
+        With catalog="mvcc" stock is read from one pinned catalog version
+        without taking locks.
+        
         Returns:
             List of available products
         """
-        return [product for product in self.products.values() if product.is_available()]
+        if self._versioned:
+            return [record.product for record in self.products.snapshot().available()]
+        with self._index_lock:
+            return [product for product in self.products.values() if product.is_available()]
+    
+    def browse_products(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                        in_stock: bool = True, limit: int = 20, cursor: Optional[PriceKey] = None,
+                        descending: bool = False) -> Dict:
+        """
+        Get one page of products in a price range, sorted by price
+        
+        Pages are found by bisecting a sorted price index, so the cost depends
+        on the page size rather than on the catalog size. Like prices, the
+        bounds are given in major units and converted in a money="cents" store.
+        
+        Args:
+            min_price: Lowest price (inclusive, unbounded if None)
+            max_price: Highest price (inclusive, unbounded if None)
+            in_stock: Only include available products
+            limit: Page size
+            cursor: 'next_cursor' of the previous page, None for the first page
+            descending: Sort from the most to the least expensive
+            
+        Returns:
+            Dict: {'products': List of products, 'next_cursor': cursor of the
+                   next page, or None on the last page}
+        """
+        if self.money == "cents":
+            min_price = None if min_price is None else to_minor(min_price)
+            max_price = None if max_price is None else to_minor(max_price)
+        with self._index_lock:
+            product_ids, next_cursor = self._price_index.browse(
+                min_price, max_price, in_stock, limit, cursor, descending)
+            return {
+                'products': [self.products[product_id] for product_id in product_ids],
+                'next_cursor': next_cursor
+            }
     
     def register_user(self, user: User) -> bool:
         """
         Register a new user
         
+        Args:
+            user: User object to register
+            
+        Returns:
+            bool: True if user registered successfully
+        """
+        with self._index_lock:
+            return self._insert_user(user)
+    
+    def register_users(self, users: Iterable[User]) -> List[str]:
+        """
+        Register many users at once
+        
+        Args:
+            users: User objects to register
+            
+        Returns:
+            List of IDs that were skipped because they already exist
+        """
+        with self._index_lock:
+            return [user.user_id for user in users if not self._insert_user(user)]
+    
+    def _insert_user(self, user: User) -> bool:
+        """
+        Register a user; the caller must hold the index lock
+        
         Args:
             user: User object to register
             
@@ -104,9 +434,115 @@ class Store:
         """
         if user.user_id in self.users:
             return False
+        if self.thread_safe:
+            user._set_lock(self._user_locks.lock_for(user.user_id))
         self.users[user.user_id] = user
+        user.add_listener(self._on_user_event)
+        if user._cart is not None:
+            user._cart.add_listener(self._on_cart_event)
+        self._notify("user_registered", user)
         return True
     
+    def _on_user_event(self, user: User, event: str, old_value) -> None:
+        """
+        Follow the user's cart once it is created and forward user changes
+        
+        Args:
+            user: User that changed
+            event: Name of the change
+            old_value: Value before the change
+        """
+        if event == "cart":
+            user._cart.add_listener(self._on_cart_event)
+            if self.cart_manager is not None:
+                self.cart_manager.cart_created(user)
+        self._notify("user_changed", (user, event, old_value))
+    
+    def _on_cart_event(self, cart: Cart, event: str, old_value) -> None:
+        """
+        Forward cart changes to store listeners
+        
+        Args:
+            cart: Cart that changed
+            event: Name of the change
+            old_value: Value before the change
+        """
+        if self.cart_manager is not None:
+            self.cart_manager.cart_touched(cart.user_id)
+        self._notify("cart_changed", (cart, event, old_value))
+    
+    def manage_carts(self, ttl: Optional[float] = None, max_carts: Optional[int] = None,
+                     spill: Optional[MutableMapping[str, Dict[str, int]]] = None) -> 'CartManager':
+        """
+        Start tracking cart activity so idle carts can be evicted
+        
+        Call sweep() on the returned manager periodically, e.g. between
+        requests or from a timer thread on a thread-safe store. Evicted carts
+        are refilled on the next access to User.cart.
+        
+        Args:
+            ttl: Seconds after which an untouched cart is evicted (no limit if None)
+            max_carts: Most resident carts kept after a sweep, least recently
+                       touched evicted first (no limit if None)
+            spill: Where evicted cart quantities are kept (in-memory dict if None)
+            
+        Returns:
+            CartManager: Manager with sweep() and stats()
+        """
+        from src.cart_manager import CartManager
+        with self._index_lock:
+            self.cart_manager = CartManager(self.users, self.products, ttl, max_carts, spill)
+            return self.cart_manager
+    
+    def use_promotions(self, engine: Optional['PromotionEngine'] = None) -> 'PromotionEngine':
+        """
+        Apply promotion rules to cart pricing and to the amount charged at checkout
+        
+        Order line items keep the undiscounted unit prices; the order's
+        total_amount is the cart total after promotions.
+        
+        Args:
+            engine: Engine holding the active rules (a new empty one if None),
+                    created with this store's money mode
+            
+        Raises:
+            ValueError: If the engine's money mode differs from the store's
+            
+        Returns:
+            PromotionEngine: Engine to add and remove rules on
+        """
+        from src.promotions import PromotionEngine
+        if engine is not None and engine.money != self.money:
+            raise ValueError(f"Engine uses money=\"{engine.money}\", the store uses money=\"{self.money}\"")
+        with self._index_lock:
+            self.promotions = PromotionEngine(money=self.money) if engine is None else engine
+            return self.promotions
+    
+    def get_cart_pricing(self, user_id: str) -> Optional['CartPricing']:
+        """
+        Get a user's cart total with the active promotions applied
+        
+        Args:
+            user_id: ID of the user
+            
+        Returns:
+            CartPricing or None if the user is not found
+        """
+        user = self.get_user(user_id)
+        if not user:
+            return None
+        with user._lock:
+            cart = user.cart
+            if self.promotions is None:
+                from src.promotions import CartPricing
+                total = cart.get_total()
+                return CartPricing(total, 0, total, ())
+            return self.promotions.price_cart(cart)
+    
+    def _charged_total(self, cart: Cart) -> Optional[float]:
+        """Cart total after promotions, or None to charge the plain cart total"""
+        return None if self.promotions is None else self.promotions.price_cart(cart).total
+    
     def get_user(self, user_id: str) -> Optional[User]:
         """
         Get a user by ID
@@ -123,6 +559,9 @@ class Store:
         """
         Create an order from user's cart
         
+        Stock for every line is checked and reserved atomically, so the order
+        fails without side effects if any product is short.
+        
         Args:
             user_id: ID of the user
             shipping_address: Shipping address
@@ -134,17 +573,204 @@ class Store:
         if not user:
             return None
         
-        if user.cart.get_item_count() == 0:
-            return None
+        with user._lock:
+            cart = user.cart
+            if cart.get_item_count() == 0:
+                return None
+            
+            with self._lock_products(cart.items):
+                if not self._reserve_stock(cart.items, cart.products):
+                    return None
+                order_id = self._order_ids.next_id()
+                total = self._charged_total(cart)
+                order = Order.from_items(order_id, user_id, cart.get_line_items(self._product_refs),
+                                         cart.get_total() if total is None else total,
+                                         shipping_address or user.address)
+            self._add_order(order)
+            
+            # Clear user's cart after order creation
+            user.clear_cart()
         
-        order_id = f"ORD-{len(self.orders) + 1:06d}"
-        order = Order(order_id, user_id, user.cart, shipping_address or user.address)
-        self.orders[order_id] = order
+        return order
+    
+    def create_orders_batch(self, user_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Create orders from the carts of many users at once
         
-        # Clear user's cart after order creation
-        user.clear_cart()
+        Stock is checked and decremented once per product for the whole batch,
+        order IDs are allocated as one block and all orders share a timestamp.
+        Users are served in the given order, so when stock runs short the
+        earlier users win. Each order is shipped to the user's address.
+        Users without a cart are reported as "cart is empty"; no cart is
+        created for them.
         
-        return order
+        This saves the per-order stock locking and index updates of
+        create_order(). With 5-line carts (benchmarks/batch_checkout.py, best
+        of 5 runs) it is on par with a create_order() loop below 10 users,
+        1.5x faster at 100 users and about 3x faster from 2,000 users on
+        (about 4x with thread_safe=True). Each order is still built, its cart
+        cleared and both announced to listeners one by one, so the cost stays
+        linear in the number of orders.
+        
+        Args:
+            user_ids: IDs of the users checking out
+            
+        Returns:
+            Dict: {user_id: {'order': Order or None, 'error': None or failure reason}}
+        """
+        results: Dict[str, Dict] = {}
+        users: List[User] = []
+        for user_id in user_ids:
+            if user_id in results:
+                continue
+            user = self.get_user(user_id)
+            if not user:
+                results[user_id] = {'order': None, 'error': "user not found"}
+                continue
+            results[user_id] = {'order': None, 'error': None}
+            users.append(user)
+        
+        with ExitStack() as stack:
+            if self.thread_safe:
+                stack.enter_context(self._user_locks.acquire(user.user_id for user in users))
+            carts = [(user, self._checkout_cart(user)) for user in users]
+            if self.thread_safe:
+                stack.enter_context(self._product_locks.acquire(
+                    {product_id for _, cart in carts if cart is not None for product_id in cart.items}))
+            
+            # Check every cart against the stock left by earlier users in the batch
+            remaining: Dict[str, int] = {}
+            products: Dict[str, Product] = {}
+            accepted = []
+            for user, cart in carts:
+                if cart is None or not cart.items:
+                    results[user.user_id]['error'] = "cart is empty"
+                    continue
+                short = None
+                for product_id, quantity in cart.items.items():
+                    if product_id not in remaining:
+                        product = cart.products[product_id]
+                        products[product_id] = product
+                        remaining[product_id] = product.stock
+                    if remaining[product_id] < quantity:
+                        short = product_id
+                        break
+                if short is not None:
+                    results[user.user_id]['error'] = f"insufficient stock for {short}"
+                    continue
+                for product_id, quantity in cart.items.items():
+                    remaining[product_id] -= quantity
+                accepted.append((user, cart))
+            
+            for product_id, product in products.items():
+                reserved = product.stock - remaining[product_id]
+                if reserved:
+                    product.update_stock(-reserved)
+            
+            order_ids = self._order_ids.allocate(len(accepted))
+            order_date = datetime.now()
+            orders = []
+            refs = {product_id: intern_product(product_id, product.name, product.price, self._product_refs)
+                    for product_id, product in products.items()}
+            for order_id, (user, cart) in zip(order_ids, accepted):
+                lines = tuple(refs[product_id] for product_id in cart.items)
+                quantities = tuple(cart.items.values())
+                total = self._charged_total(cart)
+                if total is None:
+                    total = 0
+                    for (_, _, price), quantity in zip(lines, quantities):
+                        total += price * quantity
+                order = Order.from_items(order_id, user.user_id, LineItems(lines, quantities), total,
+                                         user.address, order_date)
+                results[user.user_id]['order'] = order
+                orders.append(order)
+                cart.clear()
+            self._add_orders(orders)
+        
+        return results
+    
+    def _checkout_cart(self, user: User) -> Optional[Cart]:
+        """
+        Get a user's cart for checkout without creating an empty one
+        
+        Args:
+            user: User checking out
+            
+        Returns:
+            Cart, or None if the user has no cart
+        """
+        cart = user._cart
+        if cart is None and self.cart_manager is not None and self.cart_manager.spilled_items(user.user_id):
+            return user.cart  # refilled from the spill
+        return cart
+    
+    def _lock_products(self, product_ids: Iterable[str]):
+        """
+        Lock several products at once in a deadlock-free order
+        
+        Args:
+            product_ids: IDs of the products to lock
+            
+        Returns:
+            Context manager holding the locks
+        """
+        if not self.thread_safe:
+            return NO_LOCK
+        return self._product_locks.acquire(product_ids)
+    
+    @staticmethod
+    def _reserve_stock(quantities: Dict[str, int], products: Dict[str, Product]) -> bool:
+        """
+        Decrement stock for every line if all lines can be fulfilled
+        
+        The caller must hold the locks of all involved products.
+        
+        Args:
+            quantities: {product_id: quantity} to reserve
+            products: {product_id: Product} for every line
+            
+        Returns:
+            bool: True if stock reserved successfully
+        """
+        for product_id, quantity in quantities.items():
+            if products[product_id].stock < quantity:
+                return False
+        for product_id, quantity in quantities.items():
+            products[product_id].update_stock(-quantity)
+        return True
+    
+    def _add_order(self, order: Order) -> None:
+        """
+        Register a new order with the store and its indexes
+        
+        Args:
+            order: Newly created order
+        """
+        self._add_orders([order])
+    
+    def _add_orders(self, orders: List[Order]) -> None:
+        """
+        Register new orders with the store and its indexes
+        
+        Args:
+            orders: Newly created orders
+        """
+        cents = self.money == "cents"
+        for order in orders:
+            order._cents = cents
+            if self.thread_safe:
+                order._lock = self._order_locks.lock_for(order.order_id)
+            order.add_listener(self._on_order_event)
+        with self._index_lock:
+            for order in orders:
+                self.orders[order.order_id] = order
+            self._order_index.add_orders(orders)
+            self._order_timeline.add_orders(orders)
+            self._counters.orders_created(orders)
+            for order in orders:
+                self._rollups.order_created(order)
+        for order in orders:
+            self._notify("order_created", order)
     
     def get_order(self, order_id: str) -> Optional[Order]:
         """
@@ -168,20 +794,261 @@ class Store:
         Returns:
             List of orders
         """
-        return [order for order in self.orders.values() if order.user_id == user_id]
+        with self._index_lock:
+            return self._order_index.get_user_orders(user_id)
+    
+    def get_orders_by_status(self, status: OrderStatus) -> List[Order]:
+        """
+        Get all orders with the given status
+        
+        Args:
+            status: Order status
+            
+        Returns:
+            List of orders
+        """
+        with self._index_lock:
+            return self._order_index.get_orders_by_status(status)
+    
+    def get_orders_between(self, start: Optional[datetime] = None,
+                           end: Optional[datetime] = None) -> List[Order]:
+        """
+        Get orders placed in a time range, found by binary search
+        
+        Args:
+            start: Earliest order date (unbounded if None)
+            end: Order date to stop before (unbounded if None)
+            
+        Returns:
+            List of orders sorted by order date
+        """
+        with self._index_lock:
+            return self._order_timeline.orders_between(start, end)
+    
+    def get_revenue_report(self, start: datetime, end: Optional[datetime] = None) -> Dict:
+        """
+        Get revenue and order counts for a time window from pre-aggregated rollups
+        
+        Revenue is booked when an order is delivered and the counts are orders
+        entering each status during the window, so the cost depends on the
+        window length, not on the order history. The window is widened to
+        whole minutes.
+        
+        Args:
+            start: Window start, e.g. datetime.now() - timedelta(hours=1)
+            end: Window end (defaults to now)
+            
+        Returns:
+            Dict: {'start', 'end', 'revenue', 'orders_created', 'orders_by_status'}
+        """
+        with self._index_lock:
+            return self._rollups.summarize(start, end or datetime.now())
+    
+    def iter_orders(self, status: Optional[OrderStatus] = None, user_id: Optional[str] = None,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Order]:
+        """
+        Stream orders matching the given filters one at a time
+        
+        The most selective index (user, then date range, then status) picks
+        the candidates and the other filters are checked while iterating.
+        Orders that change while the stream is read are yielded as they are
+        when reached.
+        
+        Args:
+            status: Only orders with this status
+            user_id: Only orders of this user
+            start: Earliest order date (unbounded if None)
+            end: Order date to stop before (unbounded if None)
+            
+        Yields:
+            Order: Matching orders, sorted by order date when a date range is given
+        """
+        if status is not None:
+            status = OrderStatus(status)
+        dated = start is not None or end is not None
+        with self._index_lock:
+            if user_id is not None:
+                orders = self._order_index.get_user_orders(user_id)
+            elif dated:
+                orders = self._order_timeline.orders_between(start, end)
+                dated = False
+            elif status is not None:
+                orders = self._order_index.get_orders_by_status(status)
+                status = None
+            else:
+                orders = list(self.orders.values())
+        for order in orders:
+            if status is not None and order.status is not status:
+                continue
+            if dated and ((start is not None and order.order_date < start)
+                          or (end is not None and order.order_date >= end)):
+                continue
+            yield order
+    
+    def iter_orders_export(self, file_format: str = "jsonl", status: Optional[OrderStatus] = None,
+                           user_id: Optional[str] = None, start: Optional[datetime] = None,
+                           end: Optional[datetime] = None, chunk_size: int = 1000) -> Iterator[str]:
+        """
+        Stream matching orders as chunks of JSONL or CSV text
+        
+        Summaries are serialized as they are written, never collected into
+        a list; delivered and cancelled orders reuse their cached text.
+        
+        Args:
+            file_format: "jsonl" or "csv"
+            status: Only orders with this status
+            user_id: Only orders of this user
+            start: Earliest order date (unbounded if None)
+            end: Order date to stop before (unbounded if None)
+            chunk_size: Orders per chunk
+            
+        Yields:
+            str: Text of up to chunk_size orders
+        """
+        from src.export import iter_export
+        return iter_export(self.iter_orders(status, user_id, start, end), file_format, chunk_size)
+    
+    def export_orders(self, destination: Union[str, IO[str]], file_format: str = "jsonl",
+                      status: Optional[OrderStatus] = None, user_id: Optional[str] = None,
+                      start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      chunk_size: int = 1000) -> int:
+        """
+        Write matching orders to a JSONL or CSV file in buffered chunks
+        
+        Args:
+            destination: Path (gzip-compressed if it ends in .gz) or open text file
+            file_format: "jsonl" or "csv"
+            status: Only orders with this status
+            user_id: Only orders of this user
+            start: Earliest order date (unbounded if None)
+            end: Order date to stop before (unbounded if None)
+            chunk_size: Orders per write
+            
+        Returns:
+            int: Number of orders written
+        """
+        from src.export import iter_export, write_export
+        written = 0
+        
+        def counted() -> Iterator[Order]:
+            nonlocal written
+            for order in self.iter_orders(status, user_id, start, end):
+                written += 1
+                yield order
+        
+        write_export(iter_export(counted(), file_format, chunk_size), destination)
+        return written
+    
+    def transition_orders(self, order_ids: Iterable[str], target_status: OrderStatus) -> Dict[str, str]:
+        """
+        Move many orders to a new status at once
+        
+        Every transition is checked against the order state machine, delivered
+        orders share one delivery timestamp and the indexes and counters are
+        updated in a single pass. Orders that cannot move are left untouched.
+        
+        Args:
+            order_ids: IDs of the orders to move
+            target_status: Status to move them to
+            
+        Returns:
+            Dict: {order_id: failure reason} for orders that were not moved,
+                  empty when all transitions succeeded
+        """
+        target_status = OrderStatus(target_status)
+        if target_status not in TRANSITIONS:
+            raise ValueError(f"Orders cannot be moved to {target_status.value}")
+        allowed = TRANSITIONS[target_status]
+        order_ids = list(dict.fromkeys(order_ids))
+        failures: Dict[str, str] = {}
+        changes = []
+        now = datetime.now()
+        delivered = target_status == OrderStatus.DELIVERED
+        lock = self._order_locks.acquire(order_ids) if self.thread_safe else NO_LOCK
+        with lock:
+            orders = self.orders
+            for order_id in order_ids:
+                order = orders.get(order_id)
+                if order is None:
+                    failures[order_id] = "order not found"
+                    continue
+                old_status = order.status
+                if old_status not in allowed:
+                    failures[order_id] = f"cannot move from {old_status.value} to {target_status.value}"
+                    continue
+                order.status = target_status
+                if delivered:
+                    order.delivery_date = now
+                changes.append((order, old_status))
+            
+            with self._index_lock:
+                self._order_index.update_statuses(changes)
+                self._counters.statuses_changed(changes)
+                self._rollups.statuses_changed([order for order, _ in changes], target_status,
+                                               now.timestamp())
+            
+            # Orders only watched by this store skip straight to the store feed;
+            # others get their usual event, which the store listener ignores
+            own_listeners = (self._on_order_event,)
+            for order, old_status in changes:
+                if order._listeners == own_listeners:
+                    if self._listeners:
+                        self._notify("order_changed", (order, "status", old_status))
+                else:
+                    order._notify("status", old_status)
+        return failures
+    
+    def _on_order_event(self, order: Order, event: str, old_value) -> None:
+        """
+        Keep order indexes current when an order changes
+        
+        Args:
+            order: Order that changed
+            event: Name of the change
+            old_value: Value before the change
+        """
+        if event == "status":
+            with self._index_lock:
+                # Orders moved by transition_orders() are already re-indexed
+                if self._order_index.update_status(order, old_value):
+                    self._counters.status_changed(order, old_value)
+                    self._rollups.status_changed(order)
+        self._notify("order_changed", (order, event, old_value))
     
     def get_store_statistics(self) -> Dict:
         """
-        Get store statistics
+        Get store statistics from running counters
+        
+        Returns:
+            Dict: Store statistics
+        """
+        counters = self._counters
+        with self._index_lock:
+            return {
+                'store_name': self.store_name,
+                'total_products': len(self.products),
+                'available_products': counters.available_products,
+                'total_users': len(self.users),
+                'total_orders': len(self.orders),
+                'total_revenue': counters.delivered_revenue,
+                'orders_by_status': {
+                    status.value: count for status, count in counters.orders_by_status.items()
+                }
+            }
+    
+    def _compute_store_statistics(self) -> Dict:
+        """
+        Recompute store statistics with a full scan of products and orders
         
         Returns:
             Dict: Store statistics
         """
-        total_revenue = sum(
-            order.total_amount 
-            for order in self.orders.values() 
-            if order.status == OrderStatus.DELIVERED
-        )
+        orders_by_status = {status.value: 0 for status in OrderStatus}
+        total_revenue = 0
+        for order in self.orders.values():
+            orders_by_status[order.status.value] += 1
+            if order.status == OrderStatus.DELIVERED:
+                total_revenue += order.total_amount
         
         return {
             'store_name': self.store_name,
@@ -189,9 +1056,55 @@ class Store:
             'available_products': len(self.get_available_products()),
             'total_users': len(self.users),
             'total_orders': len(self.orders),
-            'total_revenue': total_revenue
+            'total_revenue': total_revenue,
+            'orders_by_status': orders_by_status
         }
     
+    def verify_statistics(self) -> Dict:
+        """
+        Compare the running counters against a full recompute
+        
+        In a thread-safe store this should be called while no writers are active.
+        
+        Returns:
+            Dict: Mismatched statistics as {name: (counter_value, recomputed_value)},
+                  empty when the counters are consistent
+        """
+        with self._index_lock:
+            current = self.get_store_statistics()
+            expected = self._compute_store_statistics()
+        mismatches = {}
+        for key, value in expected.items():
+            if key == 'total_revenue' and type(value) is not int:
+                consistent = math.isclose(current[key], value, rel_tol=1e-9, abs_tol=1e-6)
+            else:
+                consistent = current[key] == value
+            if not consistent:
+                mismatches[key] = (current[key], value)
+        return mismatches
+    
+    def metrics(self) -> Dict:
+        """
+        Get call counts and latency histograms of the instrumented methods
+        
+        Instrumentation is process-wide and off until src.metrics.enable() is called.
+        
+        Returns:
+            Dict: Metrics snapshot (see src.metrics.snapshot)
+        """
+        from src import metrics
+        return metrics.snapshot()
+    
+    def metrics_text(self) -> str:
+        """
+        Get the metrics in the Prometheus text exposition format
+        
+        Returns:
+            str: Metrics text for a local scraper
+        """
+        from src import metrics
+        return metrics.exposition()
+    
     def __str__(self) -> str:
         """String representation of the store"""
         return f"Store(name={self.store_name}, products={len(self.products)}, users={len(self.users)}, orders={len(self.orders)})"
@@ -0,0 +1,115 @@
+"""
+Running counters behind the store statistics
+"""
+
+from typing import Dict, Iterable, Tuple
+from src.order import Order, OrderStatus
+from src.product import Product
+
+
+class StoreCounters:
+    """Counters updated on every mutation so statistics are O(1) to read"""
+
+    def __init__(self):
+        """Initialize all counters to zero"""
+        self.delivered_revenue = 0
+        self.available_products = 0
+        self.orders_by_status: Dict[OrderStatus, int] = {status: 0 for status in OrderStatus}
+
+    def product_added(self, product: Product) -> None:
+        """
+        Count a product added to the catalog
+
+        Args:
+            product: Product that was added
+        """
+        if product.is_available():
+            self.available_products += 1
+
+    def product_removed(self, product: Product) -> None:
+        """
+        Stop counting a product removed from the catalog
+
+        Args:
+            product: Product that was removed
+        """
+        if product.is_available():
+            self.available_products -= 1
+
+    def stock_changed(self, product: Product, old_stock: int) -> None:
+        """
+        Track products moving in or out of stock
+
+        Args:
+            product: Product whose stock changed
+            old_stock: Stock before the change
+        """
+        was_available = old_stock > 0
+        if product.is_available() != was_available:
+            self.available_products += -1 if was_available else 1
+
+    def order_created(self, order: Order) -> None:
+        """
+        Count a newly created order
+
+        Args:
+            order: Order that was created
+        """
+        self.orders_by_status[order.status] += 1
+        if order.status == OrderStatus.DELIVERED:
+            self.delivered_revenue += order.total_amount
+
+    def orders_created(self, orders: Iterable[Order]) -> None:
+        """
+        Count many newly created orders
+
+        Args:
+            orders: Orders that were created
+        """
+        for order in orders:
+            self.order_created(order)
+
+    def status_changed(self, order: Order, old_status: OrderStatus) -> None:
+        """
+        Move an order between status counters
+
+        Args:
+            order: Order whose status changed
+            old_status: Status before the change
+        """
+        self.orders_by_status[old_status] -= 1
+        self.orders_by_status[order.status] += 1
+        if order.status == OrderStatus.DELIVERED:
+            self.delivered_revenue += order.total_amount
+        elif old_status == OrderStatus.DELIVERED:
+            self.delivered_revenue -= order.total_amount
+
+    def statuses_changed(self, changes: Iterable[Tuple[Order, OrderStatus]]) -> None:
+        """
+        Move many orders between status counters
+
+        Consecutive changes between the same pair of statuses are counted as
+        one run, so the status dict is only touched once per run.
+
+        Args:
+            changes: (order, status before the change) pairs
+        """
+        counts = self.orders_by_status
+        delivered = OrderStatus.DELIVERED
+        run_old = run_new = None
+        run = 0
+        for order, old_status in changes:
+            new_status = order.status
+            if old_status is not run_old or new_status is not run_new:
+                if run:
+                    counts[run_old] -= run
+                    counts[run_new] += run
+                run_old, run_new, run = old_status, new_status, 0
+            run += 1
+            if new_status is delivered:
+                self.delivered_revenue += order.total_amount
+            elif old_status is delivered:
+                self.delivered_revenue -= order.total_amount
+        if run:
+            counts[run_old] -= run
+            counts[run_new] += run
@@ -4,11 +4,15 @@ User class for managing e-commerce users.
 
 from typing import Optional
 from src.cart import Cart
+from src.locking import NO_LOCK
+from src.observable import Observable
 
 
-class User:
+class User(Observable):
     """Represents a user in the e-commerce system"""
     
+    __slots__ = ('user_id', 'name', 'email', 'address', '_cart', 'is_active', '_lock')
+    
     def __init__(self, user_id: str, name: str, email: str, address: str = ""):
         """
         Initialize a user
@@ -23,8 +27,10 @@ class User:
         self.name = name
         self.email = email
         self.address = address
-        self.cart = Cart(user_id)
+        self._cart: Optional[Cart] = None  # created on first access
         self.is_active = True
+        self._lock = NO_LOCK
+        self._init_listeners()
     
     def update_profile(self, name: Optional[str] = None, email: Optional[str] = None, 
                       address: Optional[str] = None) -> bool:
@@ -39,21 +45,52 @@ class User:
         Returns:
             bool: True if profile updated successfully
         """
+        old_profile = (self.name, self.email, self.address)
         if name:
             self.name = name
         if email:
             self.email = email
         if address:
             self.address = address
+        if (self.name, self.email, self.address) != old_profile:
+            self._notify("profile", old_profile)
         return True
     
     def activate_account(self) -> None:
         """Activate the user account"""
-        self.is_active = True
+        self._set_active(True)
     
     def deactivate_account(self) -> None:
         """Deactivate the user account"""
-        self.is_active = False
+        self._set_active(False)
+    
+    def _set_active(self, is_active: bool) -> None:
+        """
+        Change the account status and notify listeners
+        
+        Args:
+            is_active: New account status
+        """
+        if self.is_active != is_active:
+            self.is_active = is_active
+            self._notify("active", not is_active)
+    
+    @property
+    def cart(self) -> Cart:
+        """User's shopping cart, created on first access (accesses count as cart manager hits)"""
+        cart = self._cart
+        if cart is None:
+            with self._lock:
+                if self._cart is None:
+                    cart = Cart(self.user_id)
+                    cart._lock = self._lock
+                    self._cart = cart
+                    self._notify("cart")
+                    return cart
+                cart = self._cart
+        if cart._on_access is not None:
+            cart._on_access(self.user_id)
+        return cart
     
     def get_cart(self) -> Cart:
         """
@@ -64,9 +101,22 @@ class User:
         """
         return self.cart
     
+    def _set_lock(self, lock) -> None:
+        """
+        Set the lock guarding this user and their cart
+        
+        Args:
+            lock: Reentrant lock (or NO_LOCK)
+        """
+        with self._lock:
+            self._lock = lock
+            if self._cart is not None:
+                self._cart._lock = lock
+    
     def clear_cart(self) -> None:
         """Clear the user's shopping cart"""
-        self.cart.clear()
+        if self._cart is not None:
+            self._cart.clear()
     
     def __str__(self) -> str:
         """String representation of the user"""
@@ -0,0 +1,537 @@
+"""
+Multi-version product catalog: writers publish immutable snapshots, readers pin them without locks
+"""
+
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+from src.product import Product
+from src.search_index import tokenize
+
+# Interior nodes are lists of 32 children; hash trie leaves are dicts, vector leaves lists
+_BITS = 5
+_FANOUT = 1 << _BITS
+_MASK = _FANOUT - 1
+_LEAF_SIZE = 32  # average entries per hash trie leaf before it grows a level
+
+
+class ProductRecord(NamedTuple):
+    """Immutable state of a product in one catalog version"""
+    product_id: str
+    name: str
+    price: float
+    description: str
+    stock: int
+    product: Product  # live object the record was taken from
+
+    def is_available(self) -> bool:
+        """Check if the product was in stock in this version"""
+        return self.stock > 0
+
+
+class _Trie:
+    """
+    Persistent hash map; versions share every node a write did not touch
+
+    Published nodes are never modified. A _TrieBuilder copies the nodes on
+    the path to each key it writes, once per batch.
+    """
+
+    __slots__ = ('root', 'levels', 'count')
+
+    def __init__(self, root: Optional[list] = None, levels: int = 1, count: int = 0):
+        self.root = [None] * _FANOUT if root is None else root
+        self.levels = levels
+        self.count = count
+
+    def get(self, key: str, default=None):
+        """Value of a key, or default"""
+        node = self.root
+        code = hash(key)
+        for _ in range(self.levels):
+            node = node[code & _MASK]
+            if node is None:
+                return default
+            code >>= _BITS
+        return node.get(key, default)
+
+    def replace(self, key: str, value) -> '_Trie':
+        """
+        New version with an existing key's value replaced, copying only its path
+
+        Args:
+            key: Key already in the trie
+            value: New value
+
+        Returns:
+            _Trie: New version
+        """
+        path = []
+        node = self.root
+        code = hash(key)
+        for _ in range(self.levels):
+            position = code & _MASK
+            path.append((node, position))
+            node = node[position]
+            code >>= _BITS
+        node = dict(node)
+        node[key] = value
+        for parent, position in reversed(path):
+            parent = parent.copy()
+            parent[position] = node
+            node = parent
+        return _Trie(node, self.levels, self.count)
+
+    def leaves(self) -> List[dict]:
+        """The non-empty leaves, collected one level at a time"""
+        nodes = [self.root]
+        for _ in range(self.levels):
+            nodes = [child for node in nodes for child in node if child]
+        return nodes
+
+
+class _TrieBuilder:
+    """Batch of writes to a _Trie, producing a new version that shares untouched nodes"""
+
+    def __init__(self, trie: _Trie):
+        self.root = trie.root
+        self.levels = trie.levels
+        self.count = trie.count
+        self._owned: Dict[int, object] = {}  # {id: node copied by this builder}, kept alive
+
+    def _own(self, node):
+        """A copy of the node this builder may modify"""
+        if id(node) in self._owned:
+            return node
+        node = node.copy()
+        self._owned[id(node)] = node
+        return node
+
+    def _leaf(self, key: str, create: bool) -> Optional[dict]:
+        """Owned leaf holding a key, copying the path to it"""
+        node = self.root = self._own(self.root)
+        code = hash(key)
+        for depth in range(self.levels, 0, -1):
+            position = code & _MASK
+            child = node[position]
+            if child is None:
+                if not create:
+                    return None
+                child = {} if depth == 1 else [None] * _FANOUT
+                self._owned[id(child)] = child
+            else:
+                child = self._own(child)
+            node[position] = child
+            node = child
+            code >>= _BITS
+        return node
+
+    def get(self, key: str, default=None):
+        """Value of a key including the writes made so far"""
+        return _Trie(self.root, self.levels).get(key, default)
+
+    def set(self, key: str, value) -> None:
+        """Insert or replace a key"""
+        leaf = self._leaf(key, True)
+        if key not in leaf:
+            self.count += 1
+        leaf[key] = value
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+        leaf = self._leaf(key, False)
+        if leaf is not None and key in leaf:
+            del leaf[key]
+            self.count -= 1
+
+    def build(self) -> _Trie:
+        """Finish the batch, growing a level if the leaves became too large"""
+        trie = _Trie(self.root, self.levels, self.count)
+        self._owned = {}
+        if trie.count <= _LEAF_SIZE * _FANOUT ** trie.levels:
+            return trie
+        grown = _TrieBuilder(_Trie(levels=trie.levels + 1))
+        for leaf in trie.leaves():
+            for key, value in leaf.items():
+                grown.set(key, value)
+        return grown.build()
+
+
+class _Vector:
+    """
+    Persistent vector indexed by slot; versions share every node a write did not touch
+
+    Each leaf holds 32 consecutive slots, so a scan visits values in slot
+    order rather than hash order.
+    """
+
+    __slots__ = ('root', 'shift', 'size')
+
+    def __init__(self, root: Optional[list] = None, shift: int = 0, size: int = 0):
+        self.root = [None] * _FANOUT if root is None else root
+        self.shift = shift
+        self.size = size
+
+    def get(self, slot: int):
+        """Value at a slot, or None"""
+        if slot >= self.size:
+            return None
+        node = self.root
+        shift = self.shift
+        while shift:
+            node = node[(slot >> shift) & _MASK]
+            shift -= _BITS
+        return node[slot & _MASK]
+
+    def replace(self, slot: int, value) -> '_Vector':
+        """
+        New version with one slot's value replaced, copying only its path
+
+        Args:
+            slot: Slot below size
+            value: New value
+
+        Returns:
+            _Vector: New version
+        """
+        root = node = self.root.copy()
+        shift = self.shift
+        while shift:
+            position = (slot >> shift) & _MASK
+            child = node[position] = node[position].copy()
+            node = child
+            shift -= _BITS
+        node[slot & _MASK] = value
+        return _Vector(root, self.shift, self.size)
+
+    def leaves(self) -> List[list]:
+        """The leaves in slot order"""
+        nodes = [self.root]
+        for _ in range(self.shift // _BITS):
+            nodes = [child for node in nodes for child in node if child is not None]
+        return nodes
+
+
+class _VectorBuilder:
+    """Batch of writes to a _Vector, producing a new version that shares untouched nodes"""
+
+    def __init__(self, vector: _Vector):
+        self.root = vector.root
+        self.shift = vector.shift
+        self.size = vector.size
+        self._owned: Dict[int, list] = {}  # {id: node copied or created by this builder}
+
+    def _own(self, node: Optional[list]) -> list:
+        """A copy of the node (or a new node) this builder may modify"""
+        if node is None:
+            node = [None] * _FANOUT
+        elif id(node) in self._owned:
+            return node
+        else:
+            node = node.copy()
+        self._owned[id(node)] = node
+        return node
+
+    def get(self, slot: int):
+        """Value at a slot including the writes made so far"""
+        return _Vector(self.root, self.shift, self.size).get(slot)
+
+    def set(self, slot: int, value) -> None:
+        """Set a slot, growing the vector if it lies past the end"""
+        while slot >> self.shift >= _FANOUT:
+            root = self._own(None)
+            root[0] = self.root
+            self.root = root
+            self.shift += _BITS
+        node = self.root = self._own(self.root)
+        shift = self.shift
+        while shift:
+            position = (slot >> shift) & _MASK
+            child = node[position] = self._own(node[position])
+            node = child
+            shift -= _BITS
+        node[slot & _MASK] = value
+        self.size = max(self.size, slot + 1)
+
+    def build(self) -> _Vector:
+        """Finish the batch"""
+        self._owned = {}
+        return _Vector(self.root, self.shift, self.size)
+
+
+class CatalogVersion(Mapping):
+    """
+    Immutable catalog state: {product_id: ProductRecord} plus a search index
+
+    Holding a version pins it; later writes publish new versions and never
+    change this one.
+    """
+
+    __slots__ = ('version', '_slots', '_records', '_count', '_postings')
+
+    def __init__(self, version: int, slots: Mapping, records: _Vector, count: int, postings: _Trie):
+        """
+        Initialize a version
+
+        Args:
+            version: Version number, incremented by every publish
+            slots: {product_id: slot}, shared by every version of the catalog
+            records: ProductRecord by slot, None where a product was removed
+            count: Number of records
+            postings: {search token: {product_id: True}}
+        """
+        self.version = version
+        self._slots = slots
+        self._records = records
+        self._count = count
+        self._postings = postings
+
+    def __getitem__(self, product_id: str) -> ProductRecord:
+        record = self.get(product_id)
+        if record is None:
+            raise KeyError(product_id)
+        return record
+
+    def get(self, product_id: str, default=None):
+        """Record of a product, or default"""
+        slot = self._slots.get(product_id)
+        record = None if slot is None else self._records.get(slot)
+        return default if record is None else record
+
+    def __contains__(self, product_id) -> bool:
+        return self.get(product_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (record.product_id for record in self.records())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def records(self) -> List[ProductRecord]:
+        """Get the product records, in the order the products were added"""
+        return [record for leaf in self._records.leaves() for record in leaf if record is not None]
+
+    def available(self) -> List[ProductRecord]:
+        """
+        Get the products in stock in this version
+
+        Returns:
+            List of records with stock
+        """
+        return [record for leaf in self._records.leaves() for record in leaf
+                if record is not None and record.stock > 0]
+
+    def search(self, keywords: Iterable[str], match_all: bool = True) -> List[str]:
+        """
+        Find products containing the given tokens in this version
+
+        Args:
+            keywords: Lowercase tokens to look up
+            match_all: True for AND semantics, False for OR semantics
+
+        Returns:
+            List of matching product IDs, sorted
+        """
+        postings = [self._postings.get(token) for token in set(keywords)]
+        if match_all:
+            if not postings or None in postings:
+                return []
+            postings.sort(key=lambda posting: posting.count)
+            matches = [product_id for leaf in postings[0].leaves() for product_id in leaf]
+            for posting in postings[1:]:
+                matches = [product_id for product_id in matches if posting.get(product_id)]
+        else:
+            matches = {product_id for posting in postings if posting is not None
+                       for leaf in posting.leaves() for product_id in leaf}
+        return sorted(matches)
+
+
+def _tokens(record: ProductRecord) -> Set[str]:
+    """Search tokens of a record, as indexed by SearchIndex"""
+    tokens = set(tokenize(record.name))
+    tokens.update(tokenize(record.description))
+    return tokens
+
+
+class _CatalogBuilder:
+    """Writes collected for the next published version"""
+
+    def __init__(self, current: CatalogVersion, slots: Dict[str, int]):
+        self.current = current
+        self.slots = slots
+        self.records = _VectorBuilder(current._records)
+        self.count = current._count
+        self.posting_changes: Dict[str, List[Set[str]]] = {}  # {token: [added IDs, removed IDs]}
+
+    def _change_postings(self, product_id: str, tokens: Iterable[str], added: bool) -> None:
+        """Add a product to or remove it from the postings of some tokens"""
+        for token in tokens:
+            change = self.posting_changes.get(token)
+            if change is None:
+                change = self.posting_changes[token] = [set(), set()]
+            added_ids, removed_ids = change
+            if added:
+                added_ids.add(product_id)
+                removed_ids.discard(product_id)
+            else:
+                removed_ids.add(product_id)
+                added_ids.discard(product_id)
+
+    def put(self, product: Product) -> None:
+        """Record the product's current state"""
+        record = ProductRecord(product.product_id, product.name, product.price,
+                               product.description, product.stock, product)
+        slot = self.slots.get(record.product_id)
+        if slot is None:
+            slot = self.slots[record.product_id] = len(self.slots)
+        old = self.records.get(slot)
+        if old is not None and old[1:] == record[1:]:
+            return
+        if old is None or old.name != record.name or old.description != record.description:
+            old_tokens = _tokens(old) if old is not None else set()
+            new_tokens = _tokens(record)
+            self._change_postings(record.product_id, old_tokens - new_tokens, False)
+            self._change_postings(record.product_id, new_tokens - old_tokens, True)
+        if old is None:
+            self.count += 1
+        self.records.set(slot, record)
+
+    def remove(self, product_id: str) -> None:
+        """Drop a product"""
+        slot = self.slots.get(product_id)
+        old = None if slot is None else self.records.get(slot)
+        if old is None:
+            return
+        self._change_postings(product_id, _tokens(old), False)
+        self.records.set(slot, None)
+        self.count -= 1
+
+    def build(self) -> CatalogVersion:
+        """The version with every collected write applied"""
+        postings = self.current._postings
+        if self.posting_changes:
+            builder = _TrieBuilder(postings)
+            for token, (added, removed) in self.posting_changes.items():
+                posting = _TrieBuilder(postings.get(token) or _Trie())
+                for product_id in removed:
+                    posting.delete(product_id)
+                for product_id in added:
+                    posting.set(product_id, True)
+                if posting.count:
+                    builder.set(token, posting.build())
+                else:
+                    builder.delete(token)
+            postings = builder.build()
+        return CatalogVersion(self.current.version + 1, self.slots, self.records.build(),
+                              self.count, postings)
+
+
+class VersionedCatalog(MutableMapping):
+    """
+    Mapping of product_id -> Product that also publishes immutable catalog versions
+
+    The mapping holds the live Product objects, as the dict catalog does.
+    Every change (adding or removing a product, or a price, stock or details
+    event passed to refresh()) publishes a new CatalogVersion that shares all
+    untouched nodes with the previous one: records live in a persistent
+    vector in the order products were added, search postings in persistent
+    hash tries. snapshot() returns the
+    latest version with a single attribute read, so readers never wait for
+    writers and never see a half-applied write. Writes must be serialized by
+    the caller (the store's index lock); batch() groups several writes into
+    one version.
+    """
+
+    def __init__(self):
+        """Initialize an empty catalog"""
+        self._products: Dict[str, Product] = {}
+        self._slots: Dict[str, int] = {}  # {product_id: slot}, kept after removal so slots are never reused
+        self._current = CatalogVersion(0, self._slots, _Vector(), 0, _Trie())
+        self._builder: Optional[_CatalogBuilder] = None
+
+    def snapshot(self) -> CatalogVersion:
+        """
+        Pin the latest published version
+
+        Returns:
+            CatalogVersion: Immutable view of the catalog
+        """
+        return self._current
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Publish the writes made inside the block as one version"""
+        if self._builder is not None:
+            yield
+            return
+        self._builder = _CatalogBuilder(self._current, self._slots)
+        try:
+            yield
+        finally:
+            builder, self._builder = self._builder, None
+            self._current = builder.build()
+
+    def refresh(self, product: Product) -> None:
+        """
+        Publish a product's current price, stock and details
+
+        Args:
+            product: Product that changed
+        """
+        product_id = product.product_id
+        if self._products.get(product_id) is not product:
+            return
+        if self._builder is None:
+            # Price and stock changes leave the search postings alone, so
+            # publish them by copying the product's trie path only
+            current = self._current
+            slot = self._slots[product_id]
+            old = current._records.get(slot)
+            if old.name == product.name and old.description == product.description:
+                record = ProductRecord(product_id, product.name, product.price,
+                                       product.description, product.stock, product)
+                if record != old:
+                    self._current = CatalogVersion(current.version + 1, self._slots,
+                                                   current._records.replace(slot, record),
+                                                   current._count, current._postings)
+                return
+        with self.batch():
+            self._builder.put(product)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._products))
+
+    def __contains__(self, product_id) -> bool:
+        return product_id in self._products
+
+    def __getitem__(self, product_id: str) -> Product:
+        return self._products[product_id]
+
+    def get(self, product_id: str, default=None):
+        """Live product, or default"""
+        return self._products.get(product_id, default)
+
+    def lookup(self, product_ids: Iterable[str]) -> List[Product]:
+        """
+        Get the live products of IDs read from a version
+
+        Args:
+            product_ids: Product IDs
+
+        Returns:
+            List of products, leaving out IDs removed since
+        """
+        return [product for product in map(self._products.get, product_ids) if product is not None]
+
+    def __setitem__(self, product_id: str, product: Product) -> None:
+        self._products[product_id] = product
+        with self.batch():
+            self._builder.put(product)
+
+    def __delitem__(self, product_id: str) -> None:
+        del self._products[product_id]
+        with self.batch():
+            self._builder.remove(product_id)